@@ -7,9 +7,49 @@ Course: ITAI 2376 - Boomer Health Summary Project
 """
 
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 
+from deadlines import Deadline, expired
+from fuzzy_match import has_ocr_confusables, ocr_shape
+from lab_registry import scan_lab_results
+from records import Medication, TestResult, json_default
+from vocabulary import EMPTY_VOCABULARY, Lexicon, Vocabulary, compile_lexicon, merge_terms, trie_pattern
+
+# Guided-form fields: None for a list of strings, else (required keys, optional keys)
+# of each item, whose values must be strings
+STRUCTURED_ITEMS = {
+    'diagnoses': None,
+    'instructions': None,
+    'followups': None,
+    'medications': (('name',), ('dosage',)),
+    'test_results': (('test', 'value'), ()),
+}
+
+
+def check_structured_field(field: str, items) -> None:
+    """
+    Raise ValueError (naming the field and item) unless items is a list
+    with the shape STRUCTURED_ITEMS gives
+    """
+    if not isinstance(items, (list, tuple)):
+        raise ValueError(f"'{field}' must be a list")
+    shape = STRUCTURED_ITEMS[field]
+    for number, item in enumerate(items, 1):
+        if shape is None:
+            if not isinstance(item, str):
+                raise ValueError(f"'{field}' item {number} must be a string")
+            continue
+        required, optional = shape
+        if not isinstance(item, dict):
+            raise ValueError(f"'{field}' item {number} must be an object with {', '.join(map(repr, required))}")
+        for key in required + optional:
+            if key in required and key not in item:
+                raise ValueError(f"'{field}' item {number} is missing '{key}'")
+            if key in item and not isinstance(item[key], str):
+                raise ValueError(f"'{field}' item {number}: '{key}' must be a string")
+
+
 class MedicalExtractor:
     """
     Agent 1: Extracts diagnoses, medications, symptoms, instructions, 
@@ -18,8 +58,14 @@ class MedicalExtractor:
     Designed for: Discharge papers, after-visit summaries, prescriptions
     """
     
-    def __init__(self):
-        """Initialize the extractor with medical keyword patterns"""
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        """
+        Initialize the extractor with medical keyword patterns
+        
+        Args:
+            vocabulary: Extra terms loaded from data files (see vocabulary.py),
+                        added to the built-in lists below
+        """
         
         # Common diagnoses that appear in discharge papers
         self.diagnosis_keywords = [
@@ -32,19 +78,43 @@ class MedicalExtractor:
             'infection', 'fracture', 'osteoporosis', 'gerd', 'reflux'
         ]
         
-        # Medication name patterns
+        # Medication name patterns for drugs not in known_medications
+        # (known names are matched by the compiled lexicon)
         self.medication_patterns = [
-            # Common medications by name
-            r'\b(metformin|lisinopril|atorvastatin|amlodipine|metoprolol)\b',
-            r'\b(omeprazole|levothyroxine|albuterol|gabapentin|losartan)\b',
-            r'\b(hydrochlorothiazide|sertraline|ibuprofen|aspirin|warfarin)\b',
-            r'\b(furosemide|lasix|prednisone|insulin|lantus|humalog)\b',
             # Pattern: "drugname dosage" (e.g., "Lisinopril 10mg")
             r'\b([A-Z][a-z]+)\s+\d+\s*mg\b',
             # Pattern: "drugname tablet/capsule"
             r'\b([A-Z][a-z]+)\s+(tablet|capsule|pill)\b',
         ]
         
+        # Known medication names
+        self.known_medications = [
+            'metformin', 'lisinopril', 'atorvastatin', 'amlodipine', 'metoprolol',
+            'omeprazole', 'levothyroxine', 'albuterol', 'gabapentin', 'losartan',
+            'hydrochlorothiazide', 'sertraline', 'ibuprofen', 'aspirin', 'warfarin',
+            'furosemide', 'lasix', 'prednisone', 'insulin', 'lantus', 'humalog'
+        ]
+        
+        # Approximate lookup for names OCR mangled ("Lisinoprll", "Metf0rmin"),
+        # only for text that came through OCR; typed English near-misses
+        # ("aspiring", "Lasik") must not turn into medications
+        self.ocr_input_methods = ('photo_ocr', 'pdf')
+        self.fuzzy_min_confidence = 0.8
+        # Edits that OCR look-alikes do not explain are only accepted on words this long
+        self.fuzzy_min_length = 8
+        # Word-like tokens, including OCR look-alikes such as 0, 1 and |
+        self.medication_token_pattern = re.compile(r'(?<![A-Za-z0-9|!$@])[A-Za-z][A-Za-z0-9|!$@]{4,}')
+        
+        # Any word directly followed by a dosage ("Lisinopril 10mg", "Metf0rmin: 500 mg"),
+        # indexed once per document by dosage_index()
+        self.dosage_after_word_pattern = re.compile(
+            r'(?<![A-Za-z0-9|!$@])([A-Za-z][A-Za-z0-9|!$@]*)[:\s]+(\d+\s*mg|\d+\s*mcg|\d+\s*units?)', re.IGNORECASE)
+        # Last word of a medication name (the word the index is keyed by)
+        self.name_tail_pattern = re.compile(r'(?<![A-Za-z0-9|!$@])[A-Za-z][A-Za-z0-9|!$@]*$')
+        
+        # Dosage format accepted from structured entry (e.g. "10mg", "0.5 mg", "20 units")
+        self.dosage_pattern = re.compile(r'^\d+(?:\.\d+)?\s*(?:mg|mcg|ml|units?)$', re.IGNORECASE)
+        
         # Symptom keywords
         self.symptom_keywords = [
             'pain', 'chest pain', 'back pain', 'abdominal pain',
@@ -71,33 +141,153 @@ class MedicalExtractor:
             'call if', 'contact if', 'seek care', 'emergency', 'urgent',
             'in 1 week', 'in 2 weeks', 'in one month', 'next week'
         ]
+        
+        # Each indicator list as one regex, so a sentence is scanned once, not once per indicator
+        self.instruction_indicator_pattern = re.compile(trie_pattern(self.instruction_indicators))
+        self.followup_indicator_pattern = re.compile(trie_pattern(self.followup_indicators))
+        
+        # Section headers found on discharge papers, by the section they start.
+        # Headers are matched case-insensitively, ignoring "(...)" asides.
+        self.section_headers = {
+            'diagnoses': ['diagnoses', 'diagnosis', 'discharge diagnoses', 'discharge diagnosis',
+                          'final diagnoses', 'admitting diagnosis', 'problem list', 'assessment'],
+            'medications': ['medications', 'medication', 'medications prescribed', 'discharge medications',
+                            'medication list', 'current medications', 'home medications',
+                            'new medications', 'prescriptions'],
+            'instructions': ['instructions', 'discharge instructions', 'patient instructions',
+                             'home care instructions', 'care instructions', 'diet', 'activity'],
+            'followups': ['follow-up', 'follow up', 'followup', 'follow-up appointments',
+                          'follow up appointments', 'appointments', 'follow-up care'],
+            'vitals': ['vital signs', 'vitals', 'labs', 'lab results', 'laboratory results', 'test results'],
+            'symptoms': ['symptoms', 'chief complaint', 'reason for visit', 'presenting symptoms',
+                         'history of present illness'],
+            'warnings': ['warning signs', 'emergency signs', 'when to call', 'return precautions',
+                         'call your doctor if', 'seek emergency care'],
+        }
+        self.section_lookup = {
+            header: section
+            for section, headers in self.section_headers.items()
+            for header in headers
+        }
+        
+        # Candidate header lines: "TITLE:" at the start of a line (optionally numbered)
+        self.header_pattern = re.compile(
+            r"^[ \t]*(?:\d+[.)][ \t]*)?(?P<title>[A-Za-z][A-Za-z0-9 /&,()'+-]{1,60}?)[ \t]*:(?P<rest>[^\n]*)$",
+            re.MULTILINE
+        )
+        
+        # A list item's bullet or number: "- ", "* ", "• ", "1. ", "2) "
+        self.bullet_pattern = re.compile(r"^[ \t]*(?:[-*\u2022]|\d+[.)])[ \t]+")
+        
+        # Which sections each extractor reads (the whole text if none are present).
+        # Warning-sign lists name symptoms too, so those are kept
+        self.section_scopes = {
+            'diagnoses': ('diagnoses',),
+            'medications': ('medications',),
+            'symptoms': ('symptoms', 'warnings'),
+            'instructions': ('instructions',),
+            'followups': ('followups',),
+            'test_results': ('vitals',),
+        }
+        
+        # Common medical abbreviations Agent 2 knows how to explain
+        self.medical_abbreviations = [
+            'BP', 'HR', 'RR', 'O2', 'SpO2', 'CHF', 'COPD', 'CAD', 'MI', 
+            'CVA', 'TIA', 'DM', 'HTN', 'CKD', 'GERD', 'AFIB', 'UTI',
+            'SOB', 'DOE', 'CP', 'HA', 'N/V', 'BM', 'PRN', 'QD', 'BID', 'TID'
+        ]
+        
+        self.use_vocabulary(vocabulary or EMPTY_VOCABULARY)
+    
+    def build_lexicon(self, vocabulary: Vocabulary) -> Lexicon:
+        """The built-in lists plus a vocabulary's terms, compiled into matchers"""
+        return compile_lexicon(
+            merge_terms(self.diagnosis_keywords, vocabulary, 'diagnoses'),
+            merge_terms(self.known_medications, vocabulary, 'medications'),
+            merge_terms(self.symptom_keywords, vocabulary, 'symptoms'),
+            merge_terms(self.medical_abbreviations, vocabulary, 'abbreviations'),
+        )
+    
+    def use_vocabulary(self, vocabulary: Vocabulary, lexicon: Optional[Lexicon] = None):
+        """
+        Switch to the built-in lists plus a (new) vocabulary
+        
+        Everything is compiled first and then swapped in one assignment, so
+        extractions already running (in other threads too) are not affected:
+        extract_all reads self.lexicon once per document.
+        
+        Args:
+            vocabulary: The vocabulary to use
+            lexicon: build_lexicon(vocabulary), if the caller already compiled it
+        """
+        lexicon = lexicon or self.build_lexicon(vocabulary)
+        self.vocabulary = vocabulary
+        self.lexicon = lexicon
     
-    def extract_all(self, document_text: str, input_method: str = "unknown") -> Dict:
+    def extract_all(self, document_text: str, input_method: str = "unknown",
+                    deadline: Optional[Deadline] = None, lexicon: Optional[Lexicon] = None) -> Dict:
         """
         Main extraction method - extracts all medical information
         
         Args:
             document_text: Raw text from discharge paper, prescription, or user input
             input_method: "photo_ocr", "free_text", or "guided_form"
+            deadline: Request deadline; once its 'extract' stage has passed,
+                      the remaining (least important) fields are left empty
+            lexicon: Lexicon to match against (defaults to self.lexicon)
             
         Returns:
             Dictionary with extracted information ready for Agent 2
         """
         
-        # Clean the document
-        text_lower = document_text.lower()
+        # One lexicon for the whole document, even if use_vocabulary() swaps it meanwhile
+        lexicon = lexicon or self.lexicon
+        
+        # Each extractor reads only its own sections when the document has headers
+        sections = self.segment_sections(document_text)
+        scoped = {
+            field: self.section_text(document_text, sections, names)
+            for field, names in self.section_scopes.items()
+        }
+        # Inside its own section every line is an instruction or follow-up;
+        # only the whole-text fallback needs the indicator words
+        def listed(field, fallback):
+            if any(name in sections for name in self.section_scopes[field]):
+                return self.section_items(scoped[field])
+            return fallback(scoped[field].lower())
+        
+        # Extract each category, most important first so a deadline cuts the least useful ones
+        extractors = (
+            ('medications', lambda: self.extract_medications(scoped['medications'], lexicon,
+                                                             input_method in self.ocr_input_methods, deadline)),
+            ('diagnoses', lambda: self.extract_diagnoses(scoped['diagnoses'].lower(), lexicon)),
+            ('test_results', lambda: self.extract_test_results(scoped['test_results'])),
+            ('followups', lambda: listed('followups', self.extract_followups)),
+            ('instructions', lambda: listed('instructions', self.extract_instructions)),
+            ('symptoms', lambda: self.extract_symptoms(scoped['symptoms'].lower(), lexicon)),
+            ('flagged_terms', lambda: self.flag_medical_abbreviations(document_text, lexicon)),
+        )
+        found = {}
+        skipped = []
+        for field, extract in extractors:
+            if expired(deadline, 'extract'):
+                skipped.append(field)
+                found[field] = []
+            else:
+                found[field] = extract()
         
-        # Extract each category
         extracted_data = {
             'input_method': input_method,
-            'diagnoses': self.extract_diagnoses(text_lower),
-            'medications': self.extract_medications(document_text),
-            'symptoms': self.extract_symptoms(text_lower),
-            'instructions': self.extract_instructions(text_lower),
-            'followups': self.extract_followups(text_lower),
-            'test_results': self.extract_test_results(document_text),
-            'flagged_terms': self.flag_medical_abbreviations(document_text),
-            'raw_text_preview': document_text[:200] + "..." if len(document_text) > 200 else document_text
+            'diagnoses': found['diagnoses'],
+            'medications': found['medications'],
+            'symptoms': found['symptoms'],
+            'instructions': found['instructions'],
+            'followups': found['followups'],
+            'test_results': found['test_results'],
+            'flagged_terms': found['flagged_terms'],
+            'unrecognized_terms': [],
+            'raw_text_preview': document_text[:200] + "..." if len(document_text) > 200 else document_text,
+            'skipped_fields': skipped
         }
         
         # Add quality score
@@ -105,27 +295,248 @@ class MedicalExtractor:
         
         return extracted_data
     
-    def extract_diagnoses(self, text: str) -> List[str]:
-        """Extract diagnoses from document"""
-        diagnoses = []
+    def segment_sections(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Find section headers in one pass and index where each section's text is
+        
+        A line starts a section when its title is a known header (content may
+        follow the colon, e.g. "Diagnosis: Hypertension"), or when it is an
+        all-caps title alone on its line (e.g. "HOSPITAL COURSE:"), which
+        ends the previous section without starting one we extract from.
+        
+        Returns:
+            {section name: [(start, end), ...]} character spans of section bodies
+        """
+        headers = []
+        for match in self.header_pattern.finditer(text):
+            title = ' '.join(re.sub(r'\([^)]*\)', ' ', match.group('title')).split()).lower()
+            section = self.section_lookup.get(title)
+            if section is None:
+                section = next((self.section_lookup[header] for header in self.section_lookup
+                                if title.startswith(header + ' ')), None)
+            if section is None:
+                if match.group('rest').strip() or not match.group('title').isupper():
+                    continue
+                section = 'other'
+            headers.append((section, match.start(), match.end('title') + 1))
+        
+        index = {}
+        for i, (section, _, body_start) in enumerate(headers):
+            body_end = headers[i + 1][1] if i + 1 < len(headers) else len(text)
+            index.setdefault(section, []).append((body_start, body_end))
+        return index
+    
+    def section_text(self, text: str, sections: Dict[str, List[Tuple[int, int]]], names) -> str:
+        """Text of the named sections joined together, or the whole text if none exist"""
+        spans = sorted(span for name in names for span in sections.get(name, ()))
+        if not spans:
+            return text
+        return "\n".join(text[start:end] for start, end in spans)
+    
+    def section_items(self, text: str) -> List[str]:
+        """
+        Items of a section body: one per bullet or numbered line
+        
+        In a bulleted list, unbulleted lines continue the item above them
+        (a wrapped line); without bullets every non-empty line is an item.
+        """
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        bulleted = any(self.bullet_pattern.match(line) for line in lines)
+        items = []
+        for line in lines:
+            bullet = self.bullet_pattern.match(line)
+            if bullet:
+                items.append(line[bullet.end():].strip())
+            elif bulleted and items:
+                items[-1] += ' ' + line
+            else:
+                items.append(line)
+        
+        items = [item[0].upper() + item[1:] for item in items if item]
+        return list(dict.fromkeys(items))
+    
+    def extract_structured(self,
+                           diagnoses: Optional[List[str]] = None,
+                           medications: Optional[List[Dict[str, str]]] = None,
+                           instructions: Optional[List[str]] = None,
+                           followups: Optional[List[str]] = None,
+                           test_results: Optional[List[Dict[str, str]]] = None,
+                           lexicon: Optional[Lexicon] = None) -> Dict:
+        """
+        Guided-form fast path - validates structured fields against the
+        lexicons instead of running the free-text regexes
+        
+        Args:
+            diagnoses: Diagnosis names, e.g. ["Hypertension", "CHF"]
+            medications: Dicts with 'name' and optional 'dosage' keys
+            instructions: Instruction lines as typed by the user
+            followups: Follow-up lines as typed by the user
+            test_results: Dicts with 'test' and 'value' keys
+            lexicon: Lexicon to validate against (defaults to self.lexicon)
+            
+        Returns:
+            Dictionary in the same shape as extract_all(), ready for Agent 2
+            
+        Raises:
+            ValueError: a field is not a list of the shape STRUCTURED_ITEMS gives
+        """
+        fields = {'diagnoses': diagnoses, 'medications': medications, 'instructions': instructions,
+                  'followups': followups, 'test_results': test_results}
+        for field, items in fields.items():
+            if items is not None:
+                check_structured_field(field, items)
+        
+        lexicon = lexicon or self.lexicon
+        abbreviation_lexicon = {abbrev.upper(): abbrev for abbrev in lexicon.abbreviations}
+        # Names are shown as the lexicon spells them ("CHF", not "Chf"); all-lowercase
+        # built-in terms and unknown names are title-cased
+        spellings = {term.lower(): term for term in (*lexicon.diagnoses, *lexicon.medications)
+                     if not term.islower()}
+        spellings.update({abbrev.lower(): abbrev for abbrev in lexicon.abbreviations})
+        
+        # Diagnoses: keep unknown entries (Agent 2 explains them generically) but report them
+        clean_diagnoses = []
+        flagged = []
+        for diagnosis in diagnoses or []:
+            diagnosis = ' '.join(diagnosis.split())
+            if not diagnosis:
+                continue
+            if diagnosis.upper() in abbreviation_lexicon:
+                flagged.append(abbreviation_lexicon[diagnosis.upper()])
+            clean_diagnoses.append(spellings.get(diagnosis.lower(), diagnosis.title()))
         
-        for diagnosis in self.diagnosis_keywords:
-            if diagnosis in text:
-                # Capitalize for readability
-                diagnoses.append(diagnosis.title())
+        # Medications: normalize names and check the dosage format
+        clean_medications = []
+        seen = set()
+        for med in medications or []:
+            name = ' '.join(med.get('name', '').split())
+            if not name or name.lower() in seen:
+                continue
+            seen.add(name.lower())
+            dosage = med.get('dosage', '').strip()
+            if not self.dosage_pattern.match(dosage):
+                dosage = "See prescription"
+            clean_medications.append(Medication(spellings.get(name.lower(), name.title()), dosage))
+        
+        # Free-text lines are taken as-is, just trimmed
+        clean_instructions = [line.strip() for line in instructions or [] if line.strip()]
+        clean_followups = [line.strip() for line in followups or [] if line.strip()]
+        clean_results = [
+            TestResult(test['test'].strip(), test['value'].strip())
+            for test in test_results or []
+            if test.get('test', '').strip() and test.get('value', '').strip()
+        ]
+        
+        extracted_data = {
+            'input_method': 'guided_form',
+            'diagnoses': list(dict.fromkeys(clean_diagnoses)),
+            'medications': clean_medications,
+            'symptoms': [],
+            'instructions': list(dict.fromkeys(clean_instructions)),
+            'followups': list(dict.fromkeys(clean_followups)),
+            'test_results': clean_results,
+            'flagged_terms': list(dict.fromkeys(flagged)),
+            'unrecognized_terms': self.unrecognized_terms(clean_diagnoses, clean_medications, lexicon),
+            'raw_text_preview': '',
+            'skipped_fields': []
+        }
+        
+        extracted_data['extraction_quality'] = self.assess_extraction_quality(extracted_data)
+        
+        return extracted_data
+    
+    def unrecognized_terms(self, diagnoses: List[str], medications: List[Medication],
+                           lexicon: Optional[Lexicon] = None) -> List[str]:
+        """Diagnoses and medication names that are not in the lexicon (Agent 2 explains them generically)"""
+        lexicon = lexicon or self.lexicon
+        diagnosis_lexicon = set(lexicon.diagnoses)
+        medication_lexicon = set(lexicon.medications)
+        unrecognized = [diagnosis for diagnosis in diagnoses if diagnosis.lower() not in diagnosis_lexicon]
+        unrecognized += [med.name for med in medications if med.name.lower() not in medication_lexicon]
+        return list(dict.fromkeys(unrecognized))
+    
+    def merge_extractions(self, extractions: List[Dict], input_method: str = "photo_ocr") -> Dict:
+        """
+        Combine per-page extractions (in page order) into one document
+        
+        Args:
+            extractions: extract_all() results, one per page
+            input_method: Input method for the combined result
+            
+        Returns:
+            Dictionary in the same shape as extract_all(), ready for Agent 2
+        """
+        merged = {
+            'input_method': input_method,
+            'diagnoses': [],
+            'medications': [],
+            'symptoms': [],
+            'instructions': [],
+            'followups': [],
+            'test_results': [],
+            'flagged_terms': [],
+            'unrecognized_terms': [],
+            'raw_text_preview': extractions[0]['raw_text_preview'] if extractions else '',
+            'skipped_fields': []
+        }
+        medications = {}
+        
+        for page in extractions:
+            for field in ('diagnoses', 'symptoms', 'instructions', 'followups',
+                          'flagged_terms', 'unrecognized_terms', 'skipped_fields'):
+                merged[field].extend(page.get(field, []))
+            merged['test_results'].extend(page.get('test_results', []))
+            
+            # Same medication on two pages: keep the first dosage that was actually found
+            for med in map(Medication.coerce, page.get('medications', [])):
+                known = medications.get(med.name.lower())
+                if known is None or (known.dosage == "See prescription" and med.dosage != "See prescription"):
+                    medications[med.name.lower()] = med
+        
+        for field in ('diagnoses', 'symptoms', 'instructions', 'followups',
+                      'flagged_terms', 'unrecognized_terms', 'skipped_fields'):
+            merged[field] = list(dict.fromkeys(merged[field]))
+        merged['flagged_terms'] = merged['flagged_terms'][:8]
+        merged['medications'] = list(medications.values())
+        merged['extraction_quality'] = self.assess_extraction_quality(merged)
+        
+        return merged
+    
+    def extract_diagnoses(self, text: str, lexicon: Optional[Lexicon] = None) -> List[str]:
+        """Extract diagnoses from document (every known diagnosis in one regex pass)"""
+        # Capitalize for readability
+        diagnoses = [diagnosis.title() for diagnosis in (lexicon or self.lexicon).diagnosis_matcher.find(text)]
         
         # Remove duplicates while preserving order
         return list(dict.fromkeys(diagnoses))
     
-    def extract_medications(self, text: str) -> List[Dict[str, str]]:
+    def extract_medications(self, text: str, lexicon: Optional[Lexicon] = None,
+                            ocr: bool = False, deadline: Optional[Deadline] = None) -> List[Medication]:
         """
         Extract medications with dosages
-        Returns list of dicts with 'name' and 'dosage' keys
+        Returns list of Medication records (name, dosage)
+        
+        Args:
+            text: Document text (or its medication sections)
+            lexicon: Lexicon to match against (defaults to self.lexicon)
+            ocr: The text came through OCR, so garbled drug names are looked up approximately
+            deadline: Request deadline; once its 'extract' stage has passed,
+                      no more garbled names are looked up
         """
+        lexicon = lexicon or self.lexicon
         medications = []
         text_lower = text.lower()
+        # Every "word + dosage" in the document, so each medication's dosage
+        # is a dict lookup instead of another scan of the whole text
+        dosages = self.dosage_index(text)
+        
+        # Known medications, all in one pass, in the order the document lists them
+        for med_name in lexicon.medication_matcher.find(text_lower, text_order=True):
+            dosage = self.find_dosage_for_medication(med_name, text, dosages)
+            medications.append(Medication(med_name.title(), dosage))
         
-        # Find medication names and dosages
+        # Other medication names and dosages
+        candidates = []
         for pattern in self.medication_patterns:
             matches = re.findall(pattern, text_lower, re.IGNORECASE)
             
@@ -134,30 +545,107 @@ class MedicalExtractor:
                     med_name = match[0] if match[0] else match
                 else:
                     med_name = match
-                
-                # Try to find dosage near this medication
-                dosage = self.find_dosage_for_medication(med_name, text)
-                
-                medications.append({
-                    'name': med_name.strip().title(),
-                    'dosage': dosage
-                })
+                candidates.append(med_name)
+        
+        # A name repeated thousands of times is looked up once
+        for med_name in dict.fromkeys(candidates):
+            # Try to find dosage near this medication
+            dosage = self.find_dosage_for_medication(med_name, text, dosages)
+            
+            medications.append(Medication(self.canonical_medication(med_name, lexicon, ocr), dosage))
+        
+        # Known drugs whose names OCR garbled beyond what the patterns match
+        # (each distinct word is looked up once, however often it repeats)
+        found = {med.name.lower() for med in medications}
+        for token in dict.fromkeys(self.medication_token_pattern.findall(text) if ocr else ()):
+            if expired(deadline, 'extract'):
+                break
+            name = self.match_medication(token, lexicon, ocr, near_dosage=token.lower() in dosages)
+            if name is None or name in found:
+                continue
+            found.add(name)
+            dosage = self.find_dosage_for_medication(token, text, dosages)
+            medications.append(Medication(name.title(), dosage))
         
         # Remove duplicates
         seen = set()
         unique_meds = []
         for med in medications:
-            med_key = med['name'].lower()
-            if med_key not in seen and len(med['name']) > 2:
+            med_key = med.name.lower()
+            if med_key not in seen and len(med.name) > 2:
                 seen.add(med_key)
                 unique_meds.append(med)
         
         return unique_meds
     
-    def find_dosage_for_medication(self, med_name: str, text: str) -> str:
-        """Try to find dosage information for a medication"""
+    def canonical_medication(self, med_name: str, lexicon: Optional[Lexicon] = None, ocr: bool = False) -> str:
+        """Lexicon spelling of a medication name found next to a dosage, else the name as found"""
+        name = self.match_medication(med_name.strip(), lexicon, ocr, near_dosage=True)
+        return (name or med_name.strip()).title()
+    
+    def match_medication(self, word: str, lexicon: Optional[Lexicon] = None, ocr: bool = False,
+                         near_dosage: bool = False) -> Optional[str]:
+        """
+        Lexicon name a word stands for, or None
+        
+        Words matching a name exactly (after mapping OCR digits and symbols
+        back to letters) always count. An approximate match needs OCR input,
+        and then either the difference is only OCR look-alikes
+        ("Lisinoprll"), or the word is at least fuzzy_min_length letters and
+        contains OCR symbols or sits right before a dosage ("Atorvastatn 20mg").
+        
+        Args:
+            word: Word as written in the document
+            lexicon: Lexicon to match against (defaults to self.lexicon)
+            ocr: The text came through OCR
+            near_dosage: The word is directly followed by a dosage
+        """
+        match = (lexicon or self.lexicon).medication_index.lookup(word, self.fuzzy_min_confidence)
+        if match is None or match.distance == 0:
+            return match and match.name
+        if not ocr:
+            return None
+        if ocr_shape(word) == ocr_shape(match.name):
+            return match.name
+        if len(word) >= self.fuzzy_min_length and (near_dosage or has_ocr_confusables(word)):
+            return match.name
+        return None
+    
+    def dosage_index(self, text: str) -> Dict[str, List[Tuple[int, str]]]:
+        """
+        Index every dosage that directly follows a word, in one pass
+        
+        Returns:
+            {lowercased word: [(position of the word, dosage), ...]} in document order
+        """
+        index = {}
+        for match in self.dosage_after_word_pattern.finditer(text):
+            index.setdefault(match.group(1).lower(), []).append((match.start(1), match.group(2)))
+        return index
+    
+    def find_dosage_for_medication(self, med_name: str, text: str,
+                                   index: Optional[Dict[str, List[Tuple[int, str]]]] = None) -> str:
+        """
+        Try to find dosage information for a medication
+        
+        Args:
+            med_name: Medication name as written (may be several words)
+            text: Document text
+            index: dosage_index(text), shared by every medication in the document;
+                   without it the whole text is scanned for this one name
+        """
+        tail = self.name_tail_pattern.search(med_name)
+        if index is not None and tail:
+            # The name's last word must carry the dosage, and the text before
+            # it must match the rest of the name
+            prefix = med_name[:tail.start()].lower()
+            for start, dosage in index.get(tail.group().lower(), ()):
+                if start >= len(prefix) and text[start - len(prefix):start].lower() == prefix:
+                    return dosage
+            return "See prescription"
+        
         # Look for dosage pattern near the medication name
-        pattern = rf'{med_name}[:\s]+(\d+\s*mg|\d+\s*mcg|\d+\s*units?)'
+        pattern = rf'{re.escape(med_name)}[:\s]+(\d+\s*mg|\d+\s*mcg|\d+\s*units?)'
         match = re.search(pattern, text, re.IGNORECASE)
         
         if match:
@@ -165,13 +653,9 @@ class MedicalExtractor:
         
         return "See prescription"
     
-    def extract_symptoms(self, text: str) -> List[str]:
+    def extract_symptoms(self, text: str, lexicon: Optional[Lexicon] = None) -> List[str]:
         """Extract symptoms patient experienced"""
-        symptoms = []
-        
-        for symptom in self.symptom_keywords:
-            if symptom in text:
-                symptoms.append(symptom.title())
+        symptoms = [symptom.title() for symptom in (lexicon or self.lexicon).symptom_matcher.find(text)]
         
         return list(dict.fromkeys(symptoms))
     
@@ -188,12 +672,10 @@ class MedicalExtractor:
             if len(sentence) < 10:  # Skip very short fragments
                 continue
                 
-            for indicator in self.instruction_indicators:
-                if indicator in sentence.lower():
-                    # Capitalize first letter
-                    cleaned = sentence[0].upper() + sentence[1:] if sentence else sentence
-                    instructions.append(cleaned)
-                    break  # Only add sentence once
+            if self.instruction_indicator_pattern.search(sentence.lower()):
+                # Capitalize first letter
+                cleaned = sentence[0].upper() + sentence[1:] if sentence else sentence
+                instructions.append(cleaned)
         
         return list(dict.fromkeys(instructions))
     
@@ -210,57 +692,25 @@ class MedicalExtractor:
             if len(sentence) < 10:
                 continue
                 
-            for indicator in self.followup_indicators:
-                if indicator in sentence.lower():
-                    cleaned = sentence[0].upper() + sentence[1:] if sentence else sentence
-                    followups.append(cleaned)
-                    break
+            if self.followup_indicator_pattern.search(sentence.lower()):
+                cleaned = sentence[0].upper() + sentence[1:] if sentence else sentence
+                followups.append(cleaned)
         
         return list(dict.fromkeys(followups))
     
-    def extract_test_results(self, text: str) -> List[Dict[str, str]]:
+    def extract_test_results(self, text: str) -> List[TestResult]:
         """
         Extract test results (blood pressure, lab values, etc.)
+        Every test in lab_registry.LAB_DEFINITIONS is found in one pass
         """
-        results = []
-        
-        # Blood pressure pattern (e.g., "BP: 140/90" or "Blood pressure 130/85")
-        bp_pattern = r'(?:BP|blood pressure)[:\s]+(\d{2,3}/\d{2,3})'
-        bp_matches = re.findall(bp_pattern, text, re.IGNORECASE)
-        for bp in bp_matches:
-            results.append({'test': 'Blood Pressure', 'value': bp})
-        
-        # A1C pattern (e.g., "A1C: 7.5%" or "HbA1c 6.8")
-        a1c_pattern = r'(?:A1C|HbA1c)[:\s]+(\d+\.?\d*)\s*%?'
-        a1c_matches = re.findall(a1c_pattern, text, re.IGNORECASE)
-        for a1c in a1c_matches:
-            results.append({'test': 'A1C (Diabetes)', 'value': f"{a1c}%"})
-        
-        # Weight pattern
-        weight_pattern = r'(?:weight|wt)[:\s]+(\d+)\s*(?:lbs?|pounds?)'
-        weight_matches = re.findall(weight_pattern, text, re.IGNORECASE)
-        for weight in weight_matches:
-            results.append({'test': 'Weight', 'value': f"{weight} lbs"})
-        
-        return results
+        return scan_lab_results(text)
     
-    def flag_medical_abbreviations(self, text: str) -> List[str]:
+    def flag_medical_abbreviations(self, text: str, lexicon: Optional[Lexicon] = None) -> List[str]:
         """
         Flag medical abbreviations that Agent 2 should explain
         """
-        # Common medical abbreviations
-        abbreviations = [
-            'BP', 'HR', 'RR', 'O2', 'SpO2', 'CHF', 'COPD', 'CAD', 'MI', 
-            'CVA', 'TIA', 'DM', 'HTN', 'CKD', 'GERD', 'AFIB', 'UTI',
-            'SOB', 'DOE', 'CP', 'HA', 'N/V', 'BM', 'PRN', 'QD', 'BID', 'TID'
-        ]
-        
-        found = []
-        for abbrev in abbreviations:
-            # Look for abbreviation as whole word
-            pattern = rf'\b{abbrev}\b'
-            if re.search(pattern, text):
-                found.append(abbrev)
+        # Abbreviations as whole words, case-sensitive, in lexicon order
+        found = (lexicon or self.lexicon).abbreviation_matcher.find(text)
         
         return found[:8]  # Limit to top 8
     
@@ -290,7 +740,7 @@ class MedicalExtractor:
     
     def to_json(self, extracted_data: Dict) -> str:
         """Convert extracted data to JSON for Agent 2"""
-        return json.dumps(extracted_data, indent=2)
+        return json.dumps(extracted_data, indent=2, default=json_default)
     
     def format_for_display(self, extracted_data: Dict) -> str:
         """
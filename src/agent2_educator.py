@@ -7,19 +7,89 @@ Course: ITAI 2376 - Boomer Health Summary Project
 """
 
 import json
-from typing import Dict, List
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Union
+
+from lab_registry import LABS_BY_NAME
+from records import (
+    AbbreviationExplanation, DiagnosisExplanation, ExtractionContext, Medication,
+    MedicationExplanation, TestResult, TestResultExplanation, json_default
+)
+from renderer import DEFAULT_RENDERER
+from vocabulary import EMPTY_VOCABULARY, Vocabulary
+
+
+# Interpretation bands: a reading gets MESSAGES[i] where i is the number of
+# thresholds it meets or exceeds (shared with batch_interpretation.py)
+BP_SYSTOLIC_THRESHOLDS = (120, 130, 140)
+BP_MESSAGES = (
+    "Your blood pressure is in the normal range. Keep up the good work!",
+    "Your blood pressure is slightly elevated. Lifestyle changes can help bring it down.",
+    "Your blood pressure is in the 'high' range (Stage 1). Your doctor may recommend medication and lifestyle changes.",
+    "Your blood pressure is significantly elevated (Stage 2). Follow your doctor's treatment plan closely.",
+)
+BP_UNREADABLE_MESSAGE = "Blood pressure measurement recorded. Discuss with your doctor."
+
+A1C_THRESHOLDS = (5.7, 6.5, 7.0, 8.0)
+A1C_MESSAGES = (
+    "Your blood sugar control is normal. Great job!",
+    "You're in the 'prediabetes' range. Lifestyle changes can help prevent diabetes.",
+    "Your diabetes is fairly well controlled, but there's room for improvement.",
+    "Your diabetes control needs improvement. Work with your doctor to adjust your plan.",
+    "Your blood sugar has been quite high. It's important to work closely with your doctor.",
+)
+A1C_UNREADABLE_MESSAGE = "A1C test result recorded. This shows your average blood sugar over the past 3 months."
+
+# Wording for terms without a specific explanation (also used by explain_generic)
+GENERIC_DIAGNOSIS = "{} is a medical condition your doctor has identified. Ask your doctor to explain what this means for you specifically."
+GENERIC_MEDICATION = "This medication was prescribed by your doctor. Ask them or your pharmacist what it's for and how to take it properly."
+GENERIC_REMINDER = "Take exactly as prescribed. Call your doctor if you have questions or side effects."
+GENERIC_TEST = "Ask your doctor to explain what this test result means for you."
+
+
+def parse_systolic(bp_value: str) -> Optional[int]:
+    """Systolic number from a reading like "142/88" (None if unreadable)"""
+    try:
+        return int(bp_value.split('/')[0])
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def parse_a1c(a1c_value: str) -> Optional[float]:
+    """A1C number from a reading like "8.2%" (None if unreadable)"""
+    try:
+        return float(a1c_value.replace('%', ''))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+class ExplanationTables(NamedTuple):
+    """Agent 2's lookup tables (read-only, replaced as a whole by use_vocabulary)"""
+    diagnoses: Mapping[str, Mapping[str, str]]  # term -> {'simple', 'explanation', 'analogy'}
+    medications: Mapping[str, str]              # term -> what it does
+    abbreviations: Mapping[str, str]            # ABBREVIATION -> meaning
+
 
 class HealthExplainer:
     """
     Agent 2: Translates medical jargon into plain English explanations
     that older adults can understand and act on.
+    
+    Holds no per-document state, and its tables are never changed in
+    place, so one instance can be shared by many threads.
     """
     
-    def __init__(self):
-        """Initialize with medical term explanations"""
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        """
+        Initialize with medical term explanations
+        
+        Args:
+            vocabulary: Extra explanations loaded from data files (see vocabulary.py)
+        """
         
         # Plain-language explanations for common diagnoses
-        self.diagnosis_explanations = {
+        diagnosis_explanations = {
             'hypertension': {
                 'simple': 'High Blood Pressure',
                 'explanation': "Your blood pressure is higher than it should be. Think of it like a garden hose with too much water pressure - it puts extra strain on your blood vessels and heart. This is very common and manageable with medication and lifestyle changes.",
@@ -108,7 +178,7 @@ class HealthExplainer:
         }
         
         # Medication explanations (what they do, not medical advice)
-        self.medication_explanations = {
+        medication_explanations = {
             'lisinopril': "A blood pressure medication that helps relax your blood vessels, making it easier for your heart to pump blood.",
             'metformin': "Helps your body use insulin better and lowers blood sugar. Usually the first medication prescribed for Type 2 diabetes.",
             'atorvastatin': "A 'statin' that lowers cholesterol by reducing how much your liver produces. Helps prevent heart attacks and strokes.",
@@ -127,7 +197,7 @@ class HealthExplainer:
         }
         
         # Medical abbreviation translations
-        self.abbreviation_explanations = {
+        abbreviation_explanations = {
             'BP': 'Blood Pressure',
             'HR': 'Heart Rate',
             'CHF': 'Congestive Heart Failure',
@@ -144,171 +214,247 @@ class HealthExplainer:
             'QD': 'Once a day',
             'PRN': 'As needed',
         }
+        
+        # Read-only all the way down, since every thread shares these tables
+        self.builtin_explanations = ExplanationTables(
+            MappingProxyType({term: MappingProxyType(info) for term, info in diagnosis_explanations.items()}),
+            MappingProxyType(medication_explanations),
+            MappingProxyType(abbreviation_explanations),
+        )
+        self.use_vocabulary(vocabulary or EMPTY_VOCABULARY)
     
-    def explain_all(self, extracted_data: Dict) -> Dict:
+    def build_tables(self, vocabulary: Vocabulary) -> ExplanationTables:
+        """The built-in explanations plus a vocabulary's (its entries win for the same term)"""
+        diagnoses, medications, abbreviations = (dict(table) for table in self.builtin_explanations)
+        for term, entry in vocabulary.explained('diagnoses').items():
+            diagnoses[term] = MappingProxyType({
+                'simple': entry.simple or term.title(),
+                'explanation': entry.explanation,
+                'analogy': entry.analogy,
+            })
+        for term, entry in vocabulary.explained('medications').items():
+            medications[term] = entry.explanation
+        for term, entry in vocabulary.explained('abbreviations').items():
+            abbreviations[term.upper()] = entry.explanation
+        
+        return ExplanationTables(
+            MappingProxyType(diagnoses), MappingProxyType(medications), MappingProxyType(abbreviations)
+        )
+    
+    def use_vocabulary(self, vocabulary: Vocabulary, tables: Optional[ExplanationTables] = None):
+        """
+        Switch to the built-in explanations plus a (new) vocabulary's
+        
+        The tables are rebuilt and then swapped in one assignment; explain_all
+        reads them once per document.
+        
+        Args:
+            vocabulary: The vocabulary to use
+            tables: build_tables(vocabulary), if the caller already built them
+        """
+        tables = tables or self.build_tables(vocabulary)
+        self.vocabulary = vocabulary
+        self.tables = tables
+    
+    @property
+    def diagnosis_explanations(self) -> Mapping[str, Mapping[str, str]]:
+        return self.tables.diagnoses
+    
+    @property
+    def medication_explanations(self) -> Mapping[str, str]:
+        return self.tables.medications
+    
+    @property
+    def abbreviation_explanations(self) -> Mapping[str, str]:
+        return self.tables.abbreviations
+    
+    def explain_all(self, context: Union[ExtractionContext, Dict],
+                    tables: Optional[ExplanationTables] = None) -> Dict:
         """
         Main method: Takes Agent 1's output and creates plain-language explanations
         
         Args:
-            extracted_data: Dictionary from Agent 1
+            context: Shared ExtractionContext (or Agent 1's extraction dict)
+            tables: Explanation tables to use (defaults to self.tables)
             
         Returns:
-            Dictionary with explanations ready for Agent 3
+            Dictionary with explanations ready for Agent 3. Agent 1's data is
+            not copied in - Agent 3 reads the same shared context.
         """
+        if isinstance(context, dict):
+            context = ExtractionContext.from_extraction(context)
+        
+        # One set of tables for the whole document, even if use_vocabulary() swaps them meanwhile
+        tables = tables or self.tables
         
         explained_data = {
-            'diagnoses_explained': self.explain_diagnoses(extracted_data.get('diagnoses', [])),
-            'medications_explained': self.explain_medications(extracted_data.get('medications', [])),
-            'abbreviations_explained': self.explain_abbreviations(extracted_data.get('flagged_terms', [])),
-            'test_results_explained': self.explain_test_results(extracted_data.get('test_results', [])),
-            'disclaimer': self.get_disclaimer(),
-            'original_extraction': extracted_data  # Keep original for reference
+            'diagnoses_explained': self.explain_diagnoses(context.diagnoses, tables),
+            'medications_explained': self.explain_medications(context.medications, tables),
+            'abbreviations_explained': self.explain_abbreviations(context.flagged_terms, tables),
+            'test_results_explained': self.explain_test_results(context.test_results),
+            'disclaimer': self.get_disclaimer()
         }
         
         return explained_data
     
-    def explain_diagnoses(self, diagnoses: List[str]) -> List[Dict]:
+    def explain_generic(self, context: ExtractionContext) -> Dict:
+        """
+        Same shape as explain_all, but every item gets the generic wording
+        (used when the request's time budget has run out before Stage 2)
+        """
+        return {
+            'diagnoses_explained': [
+                DiagnosisExplanation(diagnosis, diagnosis, GENERIC_DIAGNOSIS.format(diagnosis))
+                for diagnosis in context.diagnoses
+            ],
+            'medications_explained': [
+                MedicationExplanation(med.name, med.dosage, GENERIC_MEDICATION, GENERIC_REMINDER)
+                for med in context.medications
+            ],
+            'abbreviations_explained': [],
+            'test_results_explained': [
+                TestResultExplanation(test.test, test.value, GENERIC_TEST, 'Varies')
+                for test in context.test_results
+            ],
+            'disclaimer': self.get_disclaimer()
+        }
+    
+    def explain_diagnoses(self, diagnoses: List[str],
+                          tables: Optional[ExplanationTables] = None) -> List[DiagnosisExplanation]:
         """Explain each diagnosis in plain language"""
         explained = []
+        diagnosis_explanations = (tables or self.tables).diagnoses
         
         for diagnosis in diagnoses:
             dx_lower = diagnosis.lower()
             
-            if dx_lower in self.diagnosis_explanations:
-                info = self.diagnosis_explanations[dx_lower]
-                explained.append({
-                    'diagnosis': diagnosis,
-                    'simple_name': info['simple'],
-                    'explanation': info['explanation'],
-                    'analogy': info.get('analogy', '')
-                })
+            if dx_lower in diagnosis_explanations:
+                info = diagnosis_explanations[dx_lower]
+                explained.append(DiagnosisExplanation(
+                    diagnosis=diagnosis,
+                    simple_name=info['simple'],
+                    explanation=info['explanation'],
+                    analogy=info.get('analogy', '')
+                ))
             else:
                 # Generic explanation for unknown diagnoses
-                explained.append({
-                    'diagnosis': diagnosis,
-                    'simple_name': diagnosis,
-                    'explanation': f"{diagnosis} is a medical condition your doctor has identified. Ask your doctor to explain what this means for you specifically.",
-                    'analogy': ''
-                })
+                explained.append(DiagnosisExplanation(
+                    diagnosis=diagnosis,
+                    simple_name=diagnosis,
+                    explanation=GENERIC_DIAGNOSIS.format(diagnosis),
+                    analogy=''
+                ))
         
         return explained
     
-    def explain_medications(self, medications: List[Dict]) -> List[Dict]:
+    def explain_medications(self, medications: List[Medication],
+                            tables: Optional[ExplanationTables] = None) -> List[MedicationExplanation]:
         """Explain what each medication does (educational, not prescriptive)"""
         explained = []
+        medication_explanations = (tables or self.tables).medications
         
-        for med in medications:
-            med_name = med.get('name', '').lower()
-            med_dosage = med.get('dosage', 'See prescription')
+        for med in map(Medication.coerce, medications):
+            med_name = med.name.lower()
+            med_dosage = med.dosage
             
             # Look for explanation
-            explanation = self.medication_explanations.get(
-                med_name,
-                "This medication was prescribed by your doctor. Ask them or your pharmacist what it's for and how to take it properly."
-            )
+            explanation = medication_explanations.get(med_name, GENERIC_MEDICATION)
             
-            explained.append({
-                'medication': med.get('name', ''),
-                'dosage': med_dosage,
-                'what_it_does': explanation,
-                'reminder': 'Take exactly as prescribed. Call your doctor if you have questions or side effects.'
-            })
+            explained.append(MedicationExplanation(
+                medication=med.name,
+                dosage=med_dosage,
+                what_it_does=explanation,
+                reminder=GENERIC_REMINDER
+            ))
         
         return explained
     
-    def explain_abbreviations(self, abbreviations: List[str]) -> List[Dict]:
+    def explain_abbreviations(self, abbreviations: List[str],
+                              tables: Optional[ExplanationTables] = None) -> List[AbbreviationExplanation]:
         """Translate medical abbreviations"""
         explained = []
+        abbreviation_explanations = (tables or self.tables).abbreviations
         
         for abbrev in abbreviations:
-            meaning = self.abbreviation_explanations.get(
+            meaning = abbreviation_explanations.get(
                 abbrev.upper(),
                 f"{abbrev} is a medical abbreviation. Ask your doctor what this means."
             )
             
-            explained.append({
-                'abbreviation': abbrev,
-                'meaning': meaning
-            })
+            explained.append(AbbreviationExplanation(
+                abbreviation=abbrev,
+                meaning=meaning
+            ))
         
         return explained
     
-    def explain_test_results(self, test_results: List[Dict]) -> List[Dict]:
+    def explain_test_results(self, test_results: List[TestResult]) -> List[TestResultExplanation]:
         """Explain what test results mean"""
         explained = []
         
-        for test in test_results:
-            test_name = test.get('test', '')
-            value = test.get('value', '')
+        for test in map(TestResult.coerce, test_results):
+            test_name = test.test
+            value = test.value
             
             # Provide context for common tests
             if 'blood pressure' in test_name.lower():
-                explained.append({
-                    'test': test_name,
-                    'your_value': value,
-                    'what_it_means': self.interpret_blood_pressure(value),
-                    'normal_range': 'Normal is less than 120/80'
-                })
+                explained.append(TestResultExplanation(
+                    test=test_name,
+                    your_value=value,
+                    what_it_means=self.interpret_blood_pressure(value),
+                    normal_range='Normal is less than 120/80'
+                ))
             
             elif 'a1c' in test_name.lower():
-                explained.append({
-                    'test': test_name,
-                    'your_value': value,
-                    'what_it_means': self.interpret_a1c(value),
-                    'normal_range': 'Normal is below 5.7%. Diabetes is 6.5% or higher.'
-                })
+                explained.append(TestResultExplanation(
+                    test=test_name,
+                    your_value=value,
+                    what_it_means=self.interpret_a1c(value),
+                    normal_range='Normal is below 5.7%. Diabetes is 6.5% or higher.'
+                ))
             
             elif 'weight' in test_name.lower():
-                explained.append({
-                    'test': test_name,
-                    'your_value': value,
-                    'what_it_means': 'Your weight measurement. Track changes over time as your doctor advises.',
-                    'normal_range': 'Varies by height and build'
-                })
+                explained.append(TestResultExplanation(
+                    test=test_name,
+                    your_value=value,
+                    what_it_means='Your weight measurement. Track changes over time as your doctor advises.',
+                    normal_range='Varies by height and build'
+                ))
+            
+            elif test_name in LABS_BY_NAME:
+                lab = LABS_BY_NAME[test_name]
+                explained.append(TestResultExplanation(
+                    test=test_name,
+                    your_value=value,
+                    what_it_means=lab.explanation,
+                    normal_range=lab.normal_range
+                ))
             
             else:
-                explained.append({
-                    'test': test_name,
-                    'your_value': value,
-                    'what_it_means': 'Ask your doctor to explain what this test result means for you.',
-                    'normal_range': 'Varies'
-                })
+                explained.append(TestResultExplanation(
+                    test=test_name,
+                    your_value=value,
+                    what_it_means=GENERIC_TEST,
+                    normal_range='Varies'
+                ))
         
         return explained
     
     def interpret_blood_pressure(self, bp_value: str) -> str:
         """Provide context for blood pressure reading"""
-        try:
-            systolic = int(bp_value.split('/')[0])
-            
-            if systolic < 120:
-                return "Your blood pressure is in the normal range. Keep up the good work!"
-            elif systolic < 130:
-                return "Your blood pressure is slightly elevated. Lifestyle changes can help bring it down."
-            elif systolic < 140:
-                return "Your blood pressure is in the 'high' range (Stage 1). Your doctor may recommend medication and lifestyle changes."
-            else:
-                return "Your blood pressure is significantly elevated (Stage 2). Follow your doctor's treatment plan closely."
-        except:
-            return "Blood pressure measurement recorded. Discuss with your doctor."
+        systolic = parse_systolic(bp_value)
+        if systolic is None:
+            return BP_UNREADABLE_MESSAGE
+        
+        return BP_MESSAGES[bisect_right(BP_SYSTOLIC_THRESHOLDS, systolic)]
     
     def interpret_a1c(self, a1c_value: str) -> str:
         """Provide context for A1C test"""
-        try:
-            a1c_num = float(a1c_value.replace('%', ''))
-            
-            if a1c_num < 5.7:
-                return "Your blood sugar control is normal. Great job!"
-            elif a1c_num < 6.5:
-                return "You're in the 'prediabetes' range. Lifestyle changes can help prevent diabetes."
-            elif a1c_num < 7.0:
-                return "Your diabetes is fairly well controlled, but there's room for improvement."
-            elif a1c_num < 8.0:
-                return "Your diabetes control needs improvement. Work with your doctor to adjust your plan."
-            else:
-                return "Your blood sugar has been quite high. It's important to work closely with your doctor."
-        except:
-            return "A1C test result recorded. This shows your average blood sugar over the past 3 months."
+        a1c_num = parse_a1c(a1c_value)
+        if a1c_num is None:
+            return A1C_UNREADABLE_MESSAGE
+        
+        return A1C_MESSAGES[bisect_right(A1C_THRESHOLDS, a1c_num)]
     
     def get_disclaimer(self) -> str:
         """Important medical disclaimer"""
@@ -322,58 +468,7 @@ like chest pain, difficulty breathing, or severe symptoms, call 911 immediately.
     
     def format_for_display(self, explained_data: Dict) -> str:
         """Format explained data for human-readable output"""
-        output = []
-        output.append("=" * 60)
-        output.append("AGENT 2: PLAIN-LANGUAGE HEALTH EXPLANATION")
-        output.append("=" * 60)
-        output.append("")
-        
-        # Diagnoses
-        if explained_data['diagnoses_explained']:
-            output.append("🏥 YOUR DIAGNOSES EXPLAINED:")
-            output.append("")
-            for dx in explained_data['diagnoses_explained']:
-                output.append(f"📌 {dx['diagnosis']} (also called: {dx['simple_name']})")
-                output.append(f"   {dx['explanation']}")
-                if dx['analogy']:
-                    output.append(f"   💡 Think of it like: {dx['analogy']}")
-                output.append("")
-        
-        # Medications
-        if explained_data['medications_explained']:
-            output.append("💊 YOUR MEDICATIONS EXPLAINED:")
-            output.append("")
-            for med in explained_data['medications_explained']:
-                output.append(f"📌 {med['medication']} ({med['dosage']})")
-                output.append(f"   What it does: {med['what_it_does']}")
-                output.append(f"   ⚠️  {med['reminder']}")
-                output.append("")
-        
-        # Test Results
-        if explained_data['test_results_explained']:
-            output.append("🔬 YOUR TEST RESULTS EXPLAINED:")
-            output.append("")
-            for test in explained_data['test_results_explained']:
-                output.append(f"📌 {test['test']}: {test['your_value']}")
-                output.append(f"   {test['what_it_means']}")
-                output.append(f"   Normal range: {test['normal_range']}")
-                output.append("")
-        
-        # Abbreviations
-        if explained_data['abbreviations_explained']:
-            output.append("📖 MEDICAL TERMS TRANSLATED:")
-            for abbrev in explained_data['abbreviations_explained']:
-                output.append(f"   • {abbrev['abbreviation']} = {abbrev['meaning']}")
-            output.append("")
-        
-        # Disclaimer
-        output.append(explained_data['disclaimer'])
-        output.append("")
-        output.append("=" * 60)
-        output.append("Ready to send to Agent 3 (Lifestyle Coach)")
-        output.append("=" * 60)
-        
-        return "\n".join(output)
+        return DEFAULT_RENDERER.to_string(DEFAULT_RENDERER.render_explanation, explained_data)
 
 
 # Example usage and testing
@@ -405,4 +500,4 @@ if __name__ == "__main__":
     
     # Show JSON for Agent 3
     print("\n\nJSON FORMAT (sent to Agent 3):")
-    print(json.dumps(explained, indent=2))
+    print(json.dumps(explained, indent=2, default=json_default))
@@ -7,7 +7,11 @@ Course: ITAI 2376 - Boomer Health Summary Project
 """
 
 import json
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+from records import ActionPlan, ExtractionContext, Medication, json_default
+from renderer import DEFAULT_RENDERER
 
 class LifestyleCoach:
     """
@@ -17,13 +21,16 @@ class LifestyleCoach:
     - Daily habits to monitor
     - Questions to ask the doctor
     - Warning signs to watch for
+    
+    Its tables are read-only and it keeps no per-document state, so one
+    instance can be shared by many threads.
     """
     
     def __init__(self):
         """Initialize with condition-specific lifestyle recommendations"""
         
         # Lifestyle recommendations by diagnosis
-        self.lifestyle_recommendations = {
+        lifestyle_recommendations = {
             'hypertension': {
                 'diet': [
                     "Reduce sodium (salt) to less than 2,300mg per day",
@@ -309,9 +316,14 @@ class LifestyleCoach:
                 ]
             }
         }
+        # Read-only all the way down, since every thread shares these lists
+        self.lifestyle_recommendations = MappingProxyType({
+            diagnosis: MappingProxyType({kind: tuple(tips) for kind, tips in plan.items()})
+            for diagnosis, plan in lifestyle_recommendations.items()
+        })
         
         # Generic questions for doctor
-        self.general_doctor_questions = [
+        self.general_doctor_questions = (
             "What is my main diagnosis and what caused it?",
             "What are my treatment options?",
             "What should I do if my symptoms get worse?",
@@ -319,35 +331,54 @@ class LifestyleCoach:
             "Are there any side effects I should watch for with my medications?",
             "What lifestyle changes are most important for my condition?",
             "When should I call your office versus going to the ER?"
-        ]
+        )
     
-    def generate_action_plan(self, explained_data: Dict) -> Dict:
+    def generate_action_plan(self, explained_data: Dict, context: Optional[ExtractionContext] = None) -> ActionPlan:
         """
         Main method: Creates personalized action plan based on diagnoses
         
         Args:
             explained_data: Output from Agent 2
+            context: Shared ExtractionContext from Agent 1. Older callers that
+                     still nest 'original_extraction' in explained_data work too.
             
         Returns:
             Action plan with lifestyle tips, questions, warning signs
         """
         
-        # Get diagnoses from Agent 2's output
-        diagnoses = explained_data.get('original_extraction', {}).get('diagnoses', [])
-        medications = explained_data.get('original_extraction', {}).get('medications', [])
+        if context is None:
+            context = ExtractionContext.from_extraction(explained_data.get('original_extraction', {}))
         
-        action_plan = {
-            'diet_recommendations': self.compile_diet_tips(diagnoses),
-            'exercise_recommendations': self.compile_exercise_tips(diagnoses),
-            'daily_habits': self.compile_daily_habits(diagnoses),
-            'warning_signs': self.compile_warning_signs(diagnoses),
-            'questions_for_doctor': self.generate_doctor_questions(diagnoses, medications),
-            'medication_reminders': self.generate_medication_reminders(medications),
-            'encouragement': self.get_encouragement_message()
-        }
+        diagnoses = context.diagnoses
+        medications = context.medications
+        
+        action_plan = ActionPlan(
+            diet_recommendations=self.compile_diet_tips(diagnoses),
+            exercise_recommendations=self.compile_exercise_tips(diagnoses),
+            daily_habits=self.compile_daily_habits(diagnoses),
+            warning_signs=self.compile_warning_signs(diagnoses),
+            questions_for_doctor=self.generate_doctor_questions(diagnoses, medications),
+            medication_reminders=self.generate_medication_reminders(medications),
+            encouragement=self.get_encouragement_message()
+        )
         
         return action_plan
     
+    def generate_basic_plan(self, context: ExtractionContext) -> ActionPlan:
+        """
+        Minimal action plan when the request's time budget has run out:
+        warning signs, general questions and medication reminders only
+        """
+        return ActionPlan(
+            diet_recommendations=[],
+            exercise_recommendations=[],
+            daily_habits=[],
+            warning_signs=self.compile_warning_signs(context.diagnoses),
+            questions_for_doctor=list(self.general_doctor_questions),
+            medication_reminders=self.generate_medication_reminders(context.medications),
+            encouragement=self.get_encouragement_message()
+        )
+    
     def compile_diet_tips(self, diagnoses: List[str]) -> List[str]:
         """Compile relevant diet recommendations"""
         all_tips = []
@@ -425,7 +456,7 @@ class LifestyleCoach:
         
         return general_emergencies + unique_signs[:6]
     
-    def generate_doctor_questions(self, diagnoses: List[str], medications: List[Dict]) -> List[str]:
+    def generate_doctor_questions(self, diagnoses: List[str], medications: List[Medication]) -> List[str]:
         """Generate personalized questions to ask the doctor"""
         questions = []
         
@@ -452,7 +483,7 @@ class LifestyleCoach:
         
         return questions[:10]  # Limit to top 10
     
-    def generate_medication_reminders(self, medications: List[Dict]) -> List[str]:
+    def generate_medication_reminders(self, medications: List[Medication]) -> List[str]:
         """Generate medication reminders and tips"""
         if not medications:
             return []
@@ -480,69 +511,21 @@ Managing chronic conditions is a marathon, not a sprint. Be patient with yoursel
 celebrate small victories. Your healthcare team is here to support you.
         """.strip()
     
-    def format_for_display(self, action_plan: Dict) -> str:
+    def format_for_display(self, action_plan: ActionPlan) -> str:
         """Format action plan for human-readable output"""
-        output = []
-        output.append("=" * 60)
-        output.append("AGENT 3: YOUR PERSONALIZED ACTION PLAN")
-        output.append("=" * 60)
-        output.append("")
-        
-        # Diet
-        if action_plan['diet_recommendations']:
-            output.append("🥗 DIET & NUTRITION TIPS:")
-            for i, tip in enumerate(action_plan['diet_recommendations'], 1):
-                output.append(f"   {i}. {tip}")
-            output.append("")
-        
-        # Exercise
-        if action_plan['exercise_recommendations']:
-            output.append("🏃 EXERCISE & ACTIVITY:")
-            for i, tip in enumerate(action_plan['exercise_recommendations'], 1):
-                output.append(f"   {i}. {tip}")
-            output.append("")
-        
-        # Daily habits
-        if action_plan['daily_habits']:
-            output.append("📅 DAILY HABITS TO TRACK:")
-            for i, habit in enumerate(action_plan['daily_habits'], 1):
-                output.append(f"   {i}. {habit}")
-            output.append("")
-        
-        # Medication reminders
-        if action_plan['medication_reminders']:
-            output.append("💊 MEDICATION REMINDERS:")
-            for i, reminder in enumerate(action_plan['medication_reminders'], 1):
-                output.append(f"   {i}. {reminder}")
-            output.append("")
-        
-        # Warning signs
-        if action_plan['warning_signs']:
-            output.append("⚠️  WARNING SIGNS - WHEN TO GET HELP:")
-            for sign in action_plan['warning_signs']:
-                output.append(f"   • {sign}")
-            output.append("")
-        
-        # Questions for doctor
-        if action_plan['questions_for_doctor']:
-            output.append("QUESTIONS TO ASK YOUR DOCTOR:")
-            for i, question in enumerate(action_plan['questions_for_doctor'], 1):
-                output.append(f"   {i}. {question}")
-            output.append("")
-        
-        # Encouragement
-        output.append("💙 " + action_plan['encouragement'])
-        output.append("")
-        output.append("=" * 60)
-        output.append("Ready for final assembly by Agent 4 (Report Builder)")
-        output.append("=" * 60)
-        
-        return "\n".join(output)
+        return DEFAULT_RENDERER.to_string(DEFAULT_RENDERER.render_action_plan, action_plan)
 
 
 # Example usage and testing
 if __name__ == "__main__":
-    # Simulate Agent 2's output
+    # Simulate Agent 1's shared context and Agent 2's output
+    sample_context = ExtractionContext.from_extraction({
+        'diagnoses': ['Congestive Heart Failure', 'Hypertension', 'Type 2 Diabetes'],
+        'medications': [
+            {'name': 'Furosemide', 'dosage': '40mg'},
+            {'name': 'Lisinopril', 'dosage': '20mg'}
+        ]
+    })
     sample_agent2_output = {
         'diagnoses_explained': [
             {
@@ -555,14 +538,7 @@ if __name__ == "__main__":
                 'simple_name': 'High Blood Pressure',
                 'explanation': 'Your blood pressure is higher than it should be...'
             }
-        ],
-        'original_extraction': {
-            'diagnoses': ['Congestive Heart Failure', 'Hypertension', 'Type 2 Diabetes'],
-            'medications': [
-                {'name': 'Furosemide', 'dosage': '40mg'},
-                {'name': 'Lisinopril', 'dosage': '20mg'}
-            ]
-        }
+        ]
     }
     
     # Create lifestyle coach
@@ -570,11 +546,11 @@ if __name__ == "__main__":
     
     # Generate action plan
     print("Testing Agent 3: Lifestyle & Action Coach\n")
-    action_plan = coach.generate_action_plan(sample_agent2_output)
+    action_plan = coach.generate_action_plan(sample_agent2_output, sample_context)
     
     # Display formatted output
     print(coach.format_for_display(action_plan))
     
     # Show JSON for Agent 4
     print("\n\nJSON FORMAT (sent to Agent 4):")
-    print(json.dumps(action_plan, indent=2))
+    print(json.dumps(action_plan, indent=2, default=json_default))
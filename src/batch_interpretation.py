@@ -0,0 +1,123 @@
+"""
+Batch Interpretation
+Classifies whole columns of blood pressure and A1C readings at once (numpy)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+from typing import Callable, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from agent2_educator import (
+    A1C_MESSAGES,
+    A1C_THRESHOLDS,
+    A1C_UNREADABLE_MESSAGE,
+    BP_MESSAGES,
+    BP_SYSTOLIC_THRESHOLDS,
+    BP_UNREADABLE_MESSAGE,
+    parse_a1c,
+    parse_systolic,
+)
+
+
+# Code given to readings that cannot be parsed
+UNREADABLE = -1
+
+# Message lookup arrays. The unreadable message sits at the end, so code -1
+# indexes it directly and no per-row branching is needed.
+_BP_LOOKUP = np.array(BP_MESSAGES + (BP_UNREADABLE_MESSAGE,), dtype=object)
+_A1C_LOOKUP = np.array(A1C_MESSAGES + (A1C_UNREADABLE_MESSAGE,), dtype=object)
+
+
+def classify(numbers, thresholds) -> np.ndarray:
+    """
+    Band codes for an array of numbers (e.g. export's bp_systolic column)
+
+    Returns:
+        int8 array: the number of thresholds each value meets or exceeds,
+        or UNREADABLE (-1) where the value is missing
+    """
+    numbers = np.asarray(numbers, dtype=float)
+    codes = np.searchsorted(np.asarray(thresholds, dtype=float), numbers, side='right').astype(np.int8)
+    codes[np.isnan(numbers)] = UNREADABLE
+    return codes
+
+
+def classify_readings(values: Iterable[str], parse: Callable, thresholds) -> np.ndarray:
+    """
+    Band codes for a batch of raw reading strings
+
+    Readings repeat heavily across a batch ("120/80", "7.1%"), so each
+    distinct string is parsed once with the same parser the per-reading
+    methods use, classified as an array, and broadcast back to every row.
+    """
+    row_codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    parsed = [parse(value) for value in uniques]
+    readable = np.array([number is not None for number in parsed], dtype=bool)
+    numbers = np.array([number if number is not None else 0 for number in parsed], dtype=float)
+
+    unique_codes = np.searchsorted(np.asarray(thresholds, dtype=float), numbers, side='right').astype(np.int8)
+    unique_codes[~readable] = UNREADABLE
+    return unique_codes[row_codes]
+
+
+def classify_blood_pressure(values: Iterable[str]) -> np.ndarray:
+    """Band codes (0-3, or -1) for a batch of blood pressure strings"""
+    return classify_readings(values, parse_systolic, BP_SYSTOLIC_THRESHOLDS)
+
+
+def classify_a1c(values: Iterable[str]) -> np.ndarray:
+    """Band codes (0-4, or -1) for a batch of A1C strings"""
+    return classify_readings(values, parse_a1c, A1C_THRESHOLDS)
+
+
+def interpret_blood_pressure_batch(values: Iterable[str]) -> List[str]:
+    """Same messages as HealthExplainer.interpret_blood_pressure, for a whole batch"""
+    return _BP_LOOKUP[classify_blood_pressure(values)].tolist()
+
+
+def interpret_a1c_batch(values: Iterable[str]) -> List[str]:
+    """Same messages as HealthExplainer.interpret_a1c, for a whole batch"""
+    return _A1C_LOOKUP[classify_a1c(values)].tolist()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import time
+
+    from agent2_educator import HealthExplainer
+
+    explainer = HealthExplainer()
+
+    bp_samples = ["118/76", "120/80", "129/85 mmHg", "130/85", "139/90", "140/90", "182/121",
+                  " 135 /88", "high", "", "/80", "12a/80", None]
+    a1c_samples = ["5.6%", "5.7%", "6.4%", "6.5", "6.9%", "7.0%", "7.9%", "8.0%", "9.1 %", "n/a", "", "nan"]
+
+    print("Checking batch results against the per-reading methods...")
+    assert interpret_blood_pressure_batch(bp_samples) == [explainer.interpret_blood_pressure(v) for v in bp_samples]
+    assert interpret_a1c_batch(a1c_samples) == [explainer.interpret_a1c(v) for v in a1c_samples]
+    print("✅ Batch and per-reading interpretations match")
+
+    rng = np.random.default_rng(0)
+    count = 1_000_000
+    bp_values = [f"{s}/{d}" for s, d in zip(rng.integers(95, 200, count), rng.integers(55, 120, count))]
+    a1c_values = [f"{v:.1f}%" for v in rng.uniform(4.5, 11.0, count)]
+
+    for label, batch, scalar, values in (
+        ("Blood pressure", interpret_blood_pressure_batch, explainer.interpret_blood_pressure, bp_values),
+        ("A1C", interpret_a1c_batch, explainer.interpret_a1c, a1c_values),
+    ):
+        start = time.perf_counter()
+        batch_result = batch(values)
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scalar_result = [scalar(v) for v in values]
+        scalar_time = time.perf_counter() - start
+
+        assert batch_result == scalar_result
+        print(f"📊 {label}: {count:,} readings - batch {batch_time:.2f}s, "
+              f"one at a time {scalar_time:.2f}s ({scalar_time / batch_time:.1f}x)")
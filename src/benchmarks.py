@@ -0,0 +1,312 @@
+"""
+Benchmarks - performance and memory checks for the pipeline
+Run directly: python benchmarks.py
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import gc
+import math
+import random
+import statistics
+import string
+import threading
+import time
+import timeit
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from agent1_extractor import MedicalExtractor
+from agent2_educator import HealthExplainer
+from agent3_organizer import LifestyleCoach
+from records import ExtractionContext, Medication
+
+
+SAMPLE_DOCUMENT = """
+DISCHARGE SUMMARY
+Patient: Mary Johnson | Age: 72 | Date: November 25, 2025
+
+DISCHARGE DIAGNOSES:
+1. Congestive Heart Failure (CHF), acute exacerbation
+2. Hypertension, uncontrolled
+3. Type 2 Diabetes Mellitus
+
+VITAL SIGNS AT DISCHARGE:
+Blood Pressure: 142/88 mmHg
+Weight: 198 lbs (up 12 lbs from baseline)
+A1C: 8.2%
+
+MEDICATIONS PRESCRIBED:
+1. Furosemide 40mg - Take one tablet by mouth once daily in the morning
+2. Lisinopril 20mg - Take one tablet by mouth once daily
+3. Metformin 1000mg - Take one tablet by mouth twice daily with meals
+
+DISCHARGE INSTRUCTIONS:
+1. Weigh yourself every morning before breakfast and after using bathroom
+2. Call Dr. Smith if weight increases by 3 pounds in one day or 5 pounds in one week
+3. Limit sodium intake to 2000mg per day
+4. Monitor blood pressure at home daily
+
+FOLLOW-UP APPOINTMENTS:
+- Cardiology: Dr. Sarah Smith - December 2, 2025 (1 week)
+- Primary Care: Dr. James Brown - December 9, 2025 (2 weeks)
+"""
+
+
+def make_documents(count: int) -> List[str]:
+    """Distinct copies of the sample document (distinct strings, like a real batch)"""
+    return [SAMPLE_DOCUMENT.replace("Mary Johnson", f"Patient {i:06d}") + f"\nVisit note {i}: rest and drink water.\n"
+            for i in range(count)]
+
+
+def retained_bytes_per_document(process_one: Callable[[str], Dict], documents: List[str]) -> float:
+    """
+    Average bytes still allocated per document after processing a batch
+    and keeping only what process_one returns
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    retained = [process_one(document) for document in documents]
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    grown = sum(stat.size_diff for stat in after.compare_to(baseline, 'filename'))
+    del retained
+    return grown / len(documents)
+
+
+def benchmark_stage_contract(count: int = 500) -> Dict[str, float]:
+    """
+    Compare per-document retained bytes for the old and new inter-agent contract
+
+    before: Agent 2's output nests the full Agent 1 dict ('original_extraction',
+            including raw_text_preview, instructions and follow-ups), so holding
+            the stage outputs keeps the whole extraction alive
+    after:  stages share one ExtractionContext with only the fields they read
+    """
+    extractor = MedicalExtractor()
+    explainer = HealthExplainer()
+    coach = LifestyleCoach()
+    documents = make_documents(count)
+
+    def before(document):
+        extracted = extractor.extract_all(document, "free_text")
+        explained = explainer.explain_all(extracted)
+        explained['original_extraction'] = extracted
+        action_plan = coach.generate_action_plan(explained)
+        return explained, action_plan
+
+    def after(document):
+        context = ExtractionContext.from_extraction(extractor.extract_all(document, "free_text"))
+        explained = explainer.explain_all(context)
+        action_plan = coach.generate_action_plan(explained, context)
+        return context, explained, action_plan
+
+    return {
+        'before': retained_bytes_per_document(before, documents),
+        'after': retained_bytes_per_document(after, documents),
+    }
+
+
+def benchmark_record_size(count: int = 100_000) -> Dict[str, float]:
+    """
+    Per-object memory and field access time: {'name', 'dosage'} dict vs Medication record
+    """
+    def allocated(build):
+        gc.collect()
+        tracemalloc.start()
+        objects = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+        return size / count
+
+    names = [f"Drug{i}" for i in range(count)]
+    dict_bytes = allocated(lambda: [{'name': name, 'dosage': '10mg'} for name in names])
+    record_bytes = allocated(lambda: [Medication(name, '10mg') for name in names])
+
+    as_dict = {'name': 'Lisinopril', 'dosage': '10mg'}
+    as_record = Medication('Lisinopril', '10mg')
+    dict_access = min(timeit.repeat(lambda: as_dict['name'], number=200_000, repeat=5)) / 200_000
+    record_access = min(timeit.repeat(lambda: as_record.name, number=200_000, repeat=5)) / 200_000
+
+    return {
+        'dict_bytes': dict_bytes,
+        'record_bytes': record_bytes,
+        'dict_access_ns': dict_access * 1e9,
+        'record_access_ns': record_access * 1e9,
+    }
+
+
+# ----------------------------------------------------------------------
+# Adversarial inputs - documents built to hit Agent 1's worst cases
+# ----------------------------------------------------------------------
+
+ADVERSARIAL_SIZES = (25_000, 50_000, 100_000, 200_000)   # Characters, up to the default input cap
+MAX_GROWTH_EXPONENT = 1.25                               # runtime ~ size ** exponent; 1.0 is linear
+
+ADVERSARIAL_MEDICATIONS = ('Metformin', 'Lisinopril', 'Atorvastatin', 'Amlodipine', 'Metoprolol',
+                           'Furosemide', 'Levothyroxine', 'Warfarin', 'Gabapentin', 'Losartan')
+
+
+def _fill(make_unit: Callable[[int], str], size: int) -> str:
+    """Concatenate make_unit(0), make_unit(1), ... until the text is size characters long"""
+    parts = []
+    length = 0
+    while length < size:
+        unit = make_unit(len(parts))
+        parts.append(unit)
+        length += len(unit)
+    return ''.join(parts)[:size]
+
+
+def adversarial_corpus(size: int) -> Dict[str, str]:
+    """
+    Documents of `size` characters, each aimed at one worst case:
+
+    word_mg_tokens    thousands of distinct "Word 10 mg" candidates, no punctuation
+    repeated_word_mg  the same "Take 10 mg" over and over
+    many_medications  a medication list far longer than any real one
+    ocr_noise         garbled drug names that all need fuzzy lookups
+    no_punctuation    instruction words with no sentence breaks at all
+    long_line         the sample discharge flattened onto one enormous line
+    many_sections     hundreds of section headers
+    """
+    rng = random.Random(size)
+
+    def word(_):
+        return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10))).title()
+
+    def garble(name):
+        chars = list(name)
+        position = rng.randrange(1, len(chars))
+        chars[position] = {'o': '0', 'l': '1', 'i': 'l', 's': '5'}.get(chars[position], chars[position])
+        return ''.join(chars)
+
+    prose = ('take', 'your', 'medicine', 'and', 'call', 'if', 'monitor', 'the', 'weight', 'return',
+             'walk', 'daily', 'follow', 'up', 'with', 'doctor', 'in', '2', 'weeks', 'limit', 'salt')
+    flattened = ' '.join(SAMPLE_DOCUMENT.split()) + ' '
+
+    return {
+        'word_mg_tokens': _fill(lambda i: f"{word(i)} {rng.randint(1, 999)} mg ", size),
+        'repeated_word_mg': _fill(lambda i: "Take 10 mg ", size),
+        'many_medications': _fill(lambda i: f"{i + 1}. {ADVERSARIAL_MEDICATIONS[i % 10]} {10 * (i % 50 + 1)}mg - "
+                                            f"take one tablet by mouth daily\n", size),
+        'ocr_noise': _fill(lambda i: f"{garble(ADVERSARIAL_MEDICATIONS[i % 10])} {word(i).lower()} ", size),
+        'no_punctuation': _fill(lambda i: rng.choice(prose) + ' ', size),
+        'long_line': _fill(lambda i: flattened, size),
+        'many_sections': _fill(lambda i: f"MEDICATIONS:\nLisinopril {i % 40 + 1}mg daily\n"
+                                         f"DIAGNOSES:\nHypertension\nNOTES {i}:\nRest and drink water\n", size),
+    }
+
+
+def check_linear_scaling(sizes=ADVERSARIAL_SIZES, repeat: int = 3) -> Dict[str, Dict]:
+    """
+    Time Agent 1 on every adversarial document at each size and fit
+    runtime ~ size ** exponent (least squares on log-log). Documents are
+    extracted as OCR text, so the fuzzy drug-name lookups run too.
+
+    Returns:
+        {case: {'seconds': [...], 'exponent': float, 'linear': bool}}
+    """
+    extractor = MedicalExtractor()
+    corpora = [adversarial_corpus(size) for size in sizes]
+    results = {}
+    for case in corpora[0]:
+        seconds = [min(timeit.repeat(lambda: extractor.extract_all(corpus[case], "photo_ocr"),
+                                     number=1, repeat=repeat))
+                   for corpus in corpora]
+        exponent = statistics.linear_regression([math.log(size) for size in sizes],
+                                                [math.log(value) for value in seconds]).slope
+        results[case] = {'seconds': seconds, 'exponent': exponent, 'linear': exponent <= MAX_GROWTH_EXPONENT}
+    return results
+
+
+def load_test_service(clients: int = 16,
+                      requests_per_client: int = 10,
+                      workers: int = 2,
+                      queue_size: int = 4,
+                      document_repeats: int = 20) -> Dict[str, float]:
+    """
+    Hammer a local SummaryService over HTTP (localhost only)
+
+    Starts the service on a free port, has `clients` threads POST
+    documents back to back, and counts 200s and 503 rejections.
+    """
+    from http.server import ThreadingHTTPServer
+
+    from service import SummaryService, make_handler
+
+    service = SummaryService(workers=workers, queue_size=queue_size)
+    service.start()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/summarize/text"
+    # Distinct documents, so the service cannot coalesce identical requests
+    documents = make_documents(clients * requests_per_client)
+
+    def client(number):
+        statuses = []
+        for i in range(requests_per_client):
+            body = (documents[number * requests_per_client + i] * document_repeats).encode('utf-8')
+            request = urllib.request.Request(url, data=body, headers={'Content-Type': 'text/plain'})
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    statuses.append(response.status)
+            except urllib.error.HTTPError as exc:
+                statuses.append(exc.code)
+        return statuses
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            statuses = [status for batch in pool.map(client, range(clients)) for status in batch]
+    finally:
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+    ok = statuses.count(200)
+    return {
+        'requests': len(statuses),
+        'ok': ok,
+        'rejected': statuses.count(503),
+        'seconds': elapsed,
+        'ok_per_second': ok / elapsed,
+    }
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    print("Memory: retained bytes per document (stage outputs kept in memory)")
+    result = benchmark_stage_contract()
+    saved = result['before'] - result['after']
+    print(f"   before (nested original_extraction): {result['before']:>8.0f} bytes")
+    print(f"   after  (shared ExtractionContext):   {result['after']:>8.0f} bytes")
+    print(f"   saved per document:                  {saved:>8.0f} bytes ({saved / result['before']:.0%})")
+
+    print("\nRecords: Medication as dict vs slotted record")
+    result = benchmark_record_size()
+    print(f"   dict:   {result['dict_bytes']:>6.0f} bytes/object, {result['dict_access_ns']:.0f} ns per field read")
+    print(f"   record: {result['record_bytes']:>6.0f} bytes/object, {result['record_access_ns']:.0f} ns per field read")
+
+    print(f"\nScaling: Agent 1 on adversarial documents ({ADVERSARIAL_SIZES[0]:,} to {ADVERSARIAL_SIZES[-1]:,} characters)")
+    for case, result in check_linear_scaling().items():
+        print(f"   {'✅' if result['linear'] else '❌'} {case:<17} exponent {result['exponent']:.2f}  "
+              f"({result['seconds'][0] * 1e3:.0f} ms -> {result['seconds'][-1] * 1e3:.0f} ms)")
+
+    print("\nService: local load test (2 workers, queue of 4, 16 clients)")
+    result = load_test_service()
+    print(f"   {result['requests']} requests in {result['seconds']:.1f}s: "
+          f"{result['ok']} ok ({result['ok_per_second']:.1f}/s), {result['rejected']} rejected with 503")
@@ -0,0 +1,164 @@
+"""
+Request Coalescing - identical documents in flight at the same time are
+processed once, and every caller gets that one result (single-flight)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import asyncio
+import hashlib
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+
+def document_key(*parts: Union[str, bytes, None]) -> str:
+    """
+    Stable key for a request: SHA-256 over its parts (document text or
+    bytes, input method, patient name, ...). None and '' hash differently.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            digest.update(b'\x00N')
+        else:
+            data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+            digest.update(b'\x00S' + len(data).to_bytes(8, 'big') + data)
+    return digest.hexdigest()
+
+
+class _Call:
+    """One in-progress computation that other threads can wait on"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Threaded single-flight: the first caller for a key runs fn(); callers
+    that arrive with the same key while it runs wait and share its result
+    (or its exception). Nothing is cached once the call finishes.
+
+    The shared result is the same object for every caller, so treat it as
+    read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() for this key, or wait for the run already in progress"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio single-flight for one event loop: concurrent awaits of the same
+    key share one task. A caller that is cancelled stops waiting but does
+    not cancel the shared work for the others.
+
+    It is not thread-safe and its tasks belong to one loop, so it binds to
+    the loop that first uses it; use one instance per loop (see
+    BoomerHealthPipeline.process_document_async).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[weakref.ref] = None
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() (a coroutine or future) for this key, or join the one already in progress
+
+        Raises:
+            RuntimeError: called from a different event loop than the first call
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = weakref.ref(loop)
+        elif self._loop() is not loop:
+            raise RuntimeError("AsyncSingleFlight is bound to another event loop; use one per loop")
+
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Keys currently being computed"""
+        return len(self._calls)
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    def slow_summary():
+        time.sleep(0.2)
+        return {'summary': 'done'}
+
+    flights = SingleFlight()
+    key = document_key("Hypertension. Lisinopril 10mg daily.", "free_text", None)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flights.do(key, slow_summary), range(8)))
+    print(f"🧵 Threads: 8 callers, {flights.executed} computation, {flights.coalesced} coalesced, "
+          f"same object: {all(result is results[0] for result in results)}")
+
+    async def main():
+        async_flights = AsyncSingleFlight()
+
+        async def slow_async_summary():
+            await asyncio.sleep(0.2)
+            return {'summary': 'done'}
+
+        results = await asyncio.gather(*(async_flights.do(key, slow_async_summary) for _ in range(8)))
+        print(f"⚡ asyncio: 8 callers, {async_flights.executed} computation, {async_flights.coalesced} coalesced, "
+              f"same object: {all(result is results[0] for result in results)}")
+
+    asyncio.run(main())
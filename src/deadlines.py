@@ -0,0 +1,180 @@
+"""
+Deadlines - time budgets and input-size caps for one request
+A huge pasted portal export gets a shorter, clearly marked summary instead of holding a worker
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import re
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+
+# Stage deadlines as cumulative fractions of the request budget. Time a
+# stage does not use carries over to the next one.
+STAGE_SHARES = (
+    ('extract', 0.6),   # Agent 1
+    ('explain', 0.8),   # Agent 2
+    ('plan', 1.0),      # Agent 3 and assembly
+)
+
+TRUNCATE = 'truncate'   # Keep the start of the document and mark the summary incomplete
+REJECT = 'reject'       # Refuse the document (InputTooLarge)
+
+
+class InputTooLarge(ValueError):
+    """The document exceeds the input limits and the policy is REJECT"""
+
+
+class InputLimits(NamedTuple):
+    """
+    How much of a document the pipeline will read
+
+    Limits are opt-in: BoomerHealthPipeline applies DEFAULT_LIMITS only when
+    it has a time budget (or is given limits), and SummaryService always
+    passes them, since it is the one that receives pasted portal exports.
+    """
+    max_chars: int = 200_000        # A long discharge packet is ~30,000 characters
+    max_line_chars: int = 2_000     # Longer lines are wrapped so line-based patterns stay cheap
+    policy: str = TRUNCATE
+
+
+DEFAULT_LIMITS = InputLimits()
+
+# A line Agent 1 and triage would read as a section heading ("Medications: ..."),
+# so a wrapped piece must not start like one
+HEADING_SHAPE = re.compile(r"[ \t]*(?:\d+[.)][ \t]*)?[A-Za-z][A-Za-z0-9 /&,()'+-]{1,60}?[ \t]*:")
+
+# Where a wrapped line is cut: after a sentence if possible (so phrases such
+# as "chest pain" stay on one line), otherwise at any space
+SENTENCE_BREAK = re.compile(r"[.;!?][ \t]+")
+WORD_BREAK = re.compile(r"[ \t]+")
+
+
+def _wrap_cut(line: str, start: int, width: int) -> int:
+    """Where the piece of line starting at start ends (see _wrap_line)"""
+    low, high = start + width // 2, start + width
+    for breaks in (SENTENCE_BREAK, WORD_BREAK):
+        for match in reversed(list(breaks.finditer(line, low, high + 1))):
+            if not HEADING_SHAPE.match(line, match.end()):
+                return match.end()
+    # No usable space: cut hard, or just before the colon if that would start a heading
+    heading = HEADING_SHAPE.match(line, high)
+    return heading.end() - 1 if heading else high
+
+
+def _wrap_line(line: str, width: int) -> List[str]:
+    """
+    Split one over-long line into pieces of about width characters
+
+    Pieces end after a sentence or at a space in the second half of the
+    width, and never start with something shaped like a section heading.
+    A line without usable spaces is cut hard (a piece may then run up to
+    60 characters over, to cut in front of a heading's colon instead).
+    """
+    pieces = []
+    start = 0
+    while len(line) - start > width:
+        cut = _wrap_cut(line, start, width)
+        pieces.append(line[start:cut].rstrip(' \t'))
+        start = cut
+    pieces.append(line[start:])
+    return pieces
+
+
+def apply_input_limits(text: str, limits: Optional[InputLimits] = DEFAULT_LIMITS) -> Tuple[str, List[str]]:
+    """
+    Cap a document's size before extraction
+
+    Args:
+        text: Raw document text
+        limits: Size caps and what to do when they are exceeded (None = no caps)
+
+    Returns:
+        (text to process, notes for the patient about anything left out)
+
+    Raises:
+        InputTooLarge: the document is too long and limits.policy is REJECT
+    """
+    notes = []
+    if limits is None:
+        return text, notes
+
+    if len(text) > limits.max_chars:
+        if limits.policy == REJECT:
+            raise InputTooLarge(f"Document is {len(text):,} characters; the limit is {limits.max_chars:,}")
+        cut = text.rfind('\n', 0, limits.max_chars)
+        if cut < limits.max_chars // 2:
+            cut = limits.max_chars
+        notes.append(f"Only the first {cut:,} of {len(text):,} characters of your document were read.")
+        text = text[:cut]
+
+    if limits.max_line_chars and any(len(line) > limits.max_line_chars for line in text.split('\n')):
+        text = '\n'.join(piece for line in text.split('\n')
+                         for piece in _wrap_line(line, limits.max_line_chars))
+
+    return text, notes
+
+
+class Deadline:
+    """
+    Wall-clock budget for one request, with a deadline per stage.
+
+    Stages check it between units of work and skip or simplify what is
+    left once their deadline passes; nothing is interrupted mid-step.
+    Agent 1 checks between fields and between fuzzy drug-name lookups,
+    its only per-field work that grows with more than the text length.
+    """
+
+    def __init__(self, seconds: float, shares=STAGE_SHARES, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            seconds: Total budget for the request
+            shares: (stage, cumulative fraction of the budget) pairs
+            clock: Monotonic clock (replaceable for demos)
+        """
+        self.seconds = seconds
+        self.clock = clock
+        self.start = clock()
+        self.stage_ends = {stage: self.start + seconds * share for stage, share in shares}
+
+    def elapsed(self) -> float:
+        return self.clock() - self.start
+
+    def remaining(self, stage: Optional[str] = None) -> float:
+        """Seconds left before the stage's deadline (or the whole budget)"""
+        end = self.stage_ends[stage] if stage else self.start + self.seconds
+        return end - self.clock()
+
+    def expired(self, stage: Optional[str] = None) -> bool:
+        """True once the stage's deadline (or the whole budget) has passed"""
+        return self.remaining(stage) <= 0
+
+
+def expired(deadline: Optional[Deadline], stage: Optional[str] = None) -> bool:
+    """Deadline.expired that treats None as no deadline"""
+    return deadline is not None and deadline.expired(stage)
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    document = "Diagnoses: Hypertension\n" + "x" * 12_000 + "\nMedications: Lisinopril 10mg daily\n" + "note " * 60_000
+
+    text, notes = apply_input_limits(document, InputLimits(max_chars=100_000, max_line_chars=2_000))
+    print(f"📏 {len(document):,} characters -> {len(text):,} "
+          f"(longest line {max(map(len, text.split(chr(10)))):,})")
+    for note in notes:
+        print(f"   ✂️  {note}")
+
+    try:
+        apply_input_limits(document, InputLimits(max_chars=100_000, policy=REJECT))
+    except InputTooLarge as exc:
+        print(f"   🚫 {exc}")
+
+    now = [0.0]
+    deadline = Deadline(10.0, clock=lambda: now[0])
+    for now[0] in (2.0, 7.0, 9.0, 11.0):
+        print(f"⏱️  t={now[0]:>4}s  " + "  ".join(
+            f"{stage}: {'expired' if deadline.expired(stage) else f'{deadline.remaining(stage):.0f}s left'}"
+            for stage, _ in STAGE_SHARES))
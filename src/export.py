@@ -0,0 +1,200 @@
+"""
+Columnar Export
+Turns a batch of pipeline summaries into pandas tables for analysts
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import importlib.util
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Tables produced by summaries_to_frames()
+TABLES = ('documents', 'diagnoses', 'medications', 'test_results')
+
+# Numeric columns pulled out of test results (first reading per document)
+VITAL_COLUMNS = ('bp_systolic', 'bp_diastolic', 'a1c', 'weight_lbs')
+
+
+def summaries_to_frames(summaries: Iterable, document_ids: Optional[Iterable] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Build columnar tables from a batch of summaries
+
+    Args:
+        summaries: HealthSummary records or summary dicts loaded from disk
+        document_ids: Optional ids, one per summary (defaults to 0, 1, 2, ...)
+
+    Returns:
+        {'documents': one row per summary,
+         'diagnoses' / 'medications' / 'test_results': one row per item,
+         each keyed by document_id}
+    """
+    ids = iter(document_ids) if document_ids is not None else None
+
+    # Columns are accumulated as plain lists and converted once at the end
+    documents = {key: [] for key in ('document_id', 'patient_name', 'generated_date',
+                                     'input_method', 'extraction_quality')}
+    diagnoses = {key: [] for key in ('document_id', 'diagnosis', 'simple_name')}
+    medications = {key: [] for key in ('document_id', 'medication', 'dosage')}
+    tests = {key: [] for key in ('document_id', 'test', 'value')}
+
+    for position, summary in enumerate(summaries):
+        document_id = next(ids) if ids is not None else position
+        metadata = summary['metadata']
+
+        documents['document_id'].append(document_id)
+        documents['patient_name'].append(summary['patient_name'])
+        documents['generated_date'].append(summary['generated_date'])
+        documents['input_method'].append(metadata['input_method'])
+        documents['extraction_quality'].append(metadata['extraction_quality'])
+
+        for dx in summary['section_1_diagnoses']['diagnoses']:
+            diagnoses['document_id'].append(document_id)
+            diagnoses['diagnosis'].append(dx['diagnosis'])
+            diagnoses['simple_name'].append(dx['simple_name'])
+
+        for med in summary['section_2_medications']['medications']:
+            medications['document_id'].append(document_id)
+            medications['medication'].append(med['medication'])
+            medications['dosage'].append(med['dosage'])
+
+        for test in summary['section_1_diagnoses']['test_results']:
+            tests['document_id'].append(document_id)
+            tests['test'].append(test['test'])
+            tests['value'].append(test['your_value'])
+
+    documents = pd.DataFrame(documents)
+    diagnoses = pd.DataFrame(diagnoses)
+    medications = pd.DataFrame(medications)
+    tests = pd.DataFrame(tests)
+
+    # Repeated names compress to small integer codes
+    for frame, columns in ((documents, ('input_method', 'extraction_quality')),
+                           (diagnoses, ('diagnosis', 'simple_name')),
+                           (medications, ('medication',)),
+                           (tests, ('test',))):
+        for column in columns:
+            frame[column] = frame[column].astype('category')
+
+    # Parsed numbers, vectorized over the whole batch
+    medications['dose_mg'] = pd.to_numeric(
+        medications['dosage'].astype(str).str.extract(r'(\d+(?:\.\d+)?)\s*mg', expand=False), errors='coerce'
+    )
+    tests = add_numeric_columns(tests)
+
+    # First reading of each vital per document, joined onto the document table
+    firsts = tests.groupby('document_id', sort=False)[list(VITAL_COLUMNS)].first()
+    documents = documents.join(firsts, on='document_id')
+
+    documents['n_diagnoses'] = _count_by_document(documents, diagnoses)
+    documents['n_medications'] = _count_by_document(documents, medications)
+    documents['n_test_results'] = _count_by_document(documents, tests)
+
+    return {
+        'documents': documents,
+        'diagnoses': diagnoses,
+        'medications': medications,
+        'test_results': tests,
+    }
+
+
+def add_numeric_columns(tests: pd.DataFrame) -> pd.DataFrame:
+    """Parse BP systolic/diastolic, A1C and weight from the raw value strings"""
+    test_names = tests['test'].astype(str).str.lower()
+    values = tests['value'].astype(str)
+
+    is_bp = test_names.str.contains('blood pressure', regex=False).to_numpy()
+    is_a1c = test_names.str.contains('a1c', regex=False).to_numpy()
+    is_weight = test_names.str.contains('weight', regex=False).to_numpy()
+
+    bp = values.str.extract(r'(\d{2,3})\s*/\s*(\d{2,3})').astype(float)
+    number = pd.to_numeric(values.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce').to_numpy()
+
+    tests = tests.copy()
+    tests['bp_systolic'] = np.where(is_bp, bp[0].to_numpy(), np.nan)
+    tests['bp_diastolic'] = np.where(is_bp, bp[1].to_numpy(), np.nan)
+    tests['a1c'] = np.where(is_a1c, number, np.nan)
+    tests['weight_lbs'] = np.where(is_weight, number, np.nan)
+    return tests
+
+
+def _count_by_document(documents: pd.DataFrame, items: pd.DataFrame) -> np.ndarray:
+    """Number of item rows for each document, aligned with the document table"""
+    counts = items['document_id'].value_counts()
+    return documents['document_id'].map(counts).fillna(0).astype('int64').to_numpy()
+
+
+def available_format(preferred: str = 'parquet') -> str:
+    """Best columnar format this environment can write"""
+    has_arrow = importlib.util.find_spec('pyarrow') is not None
+    has_fastparquet = importlib.util.find_spec('fastparquet') is not None
+
+    if preferred == 'parquet' and (has_arrow or has_fastparquet):
+        return 'parquet'
+    if preferred in ('parquet', 'feather') and has_arrow:
+        return 'feather'
+    return 'csv'
+
+
+def write_frames(frames: Dict[str, pd.DataFrame], directory: str, fmt: str = 'parquet') -> List[str]:
+    """
+    Write each table to the directory
+
+    Args:
+        frames: Output of summaries_to_frames()
+        directory: Destination folder (created if missing)
+        fmt: 'parquet', 'feather' or 'csv'. Falls back to the next format
+             when the needed library (pyarrow / fastparquet) is missing.
+
+    Returns:
+        Paths written
+    """
+    os.makedirs(directory, exist_ok=True)
+    chosen = available_format(fmt)
+    if chosen != fmt:
+        print(f"⚠️  {fmt} support not installed - writing {chosen} instead")
+
+    paths = []
+    for name, frame in frames.items():
+        path = os.path.join(directory, f"{name}.{chosen}")
+        if chosen == 'parquet':
+            frame.to_parquet(path, index=False)
+        elif chosen == 'feather':
+            frame.reset_index(drop=True).to_feather(path)
+        else:
+            frame.to_csv(path, index=False)
+        paths.append(path)
+
+    return paths
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import tempfile
+
+    from pipeline import BoomerHealthPipeline
+
+    documents = [
+        "Hypertension. Lisinopril 20mg daily. BP: 150/95. Weight: 201 lbs.",
+        "Type 2 Diabetes and high cholesterol. Metformin 500mg twice daily. Atorvastatin 40mg. A1C: 7.9%",
+        "CHF. Furosemide 40mg every morning. Weight: 188 lbs. BP: 128/82.",
+    ]
+
+    with contextlib.redirect_stdout(io.StringIO()), BoomerHealthPipeline() as pipeline:
+        summaries = [pipeline.process_document(text) for text in documents]
+
+    frames = summaries_to_frames(summaries)
+    for name in TABLES:
+        print(f"\n{name.upper()}")
+        print(frames[name].to_string(index=False))
+
+    output_dir = tempfile.mkdtemp(prefix='health_tables_')
+    for path in write_frames(frames, output_dir):
+        print(f"💾 {path}")
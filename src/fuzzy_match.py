@@ -0,0 +1,235 @@
+"""
+Fuzzy Matching - finds drug names mangled by OCR ("Lisinoprll", "Metf0rmin")
+SymSpell-style deletion index, so lookups stay fast with a 20,000-name lexicon
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Union
+
+
+# Characters OCR commonly confuses with letters (applied before matching)
+OCR_CONFUSABLES = str.maketrans({
+    '0': 'o',
+    '1': 'l',
+    '5': 's',
+    '8': 'b',
+    '|': 'l',
+    '!': 'l',
+    '$': 's',
+    '@': 'a',
+})
+
+
+# Letter shapes OCR mixes up with each other ("Lisinoprll", "Metforrnin")
+OCR_LETTER_SHAPES = (('rn', 'm'), ('cl', 'd'), ('vv', 'w'), ('i', 'l'))
+
+
+def normalize_ocr(word: str) -> str:
+    """Lower-case a word and map OCR look-alike characters back to letters"""
+    return word.lower().translate(OCR_CONFUSABLES)
+
+
+def has_ocr_confusables(word: str) -> bool:
+    """True if a word contains a digit or symbol OCR puts in place of a letter"""
+    return any(char in OCR_CONFUSABLES for char in map(ord, word))
+
+
+def ocr_shape(word: str) -> str:
+    """
+    A word with every OCR look-alike folded together, so two words that
+    only differ by OCR misreads ("Lisinoprll", "Lisinopril") are equal
+    """
+    shape = normalize_ocr(word)
+    for letters, folded in OCR_LETTER_SHAPES:
+        shape = shape.replace(letters, folded)
+    return shape
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance (optimal string alignment: insert, delete,
+    substitute, swap two neighbours), or limit + 1 as soon as it is known
+    to be larger than limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class FuzzyMatch(NamedTuple):
+    """Result of a lexicon lookup"""
+    name: str           # Canonical name as written in the lexicon
+    confidence: float   # 1.0 = exact (after OCR clean-up), lower = more edits
+    distance: int       # Edits between the cleaned-up word and the name
+
+
+class FuzzyLexicon:
+    """
+    Approximate lookup of words in a fixed list of names.
+
+    Every name is indexed under each string made by deleting up to
+    max_distance characters from its first prefix_length characters. A
+    query generates its own deletions and only names sharing one are
+    compared with the full edit distance, so a lookup touches a few dozen
+    dict entries instead of the whole lexicon.
+
+    Short words allow fewer edits (see allowed_distance), since with 20k
+    names almost any 4-letter word is within one edit of something.
+    """
+
+    def __init__(self, names: Iterable[str], max_distance: int = 2, prefix_length: int = 7):
+        """
+        Args:
+            names: Canonical names (duplicates, ignoring case, are dropped)
+            max_distance: Most edits ever accepted
+            prefix_length: Characters of each name used for the deletion index
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.names: List[str] = []
+        self._keys: List[str] = []
+        self._exact: Dict[str, int] = {}
+        # variant -> term id, or a list of ids when several names share it
+        # (most variants belong to one name, and a bare int is much smaller)
+        self._deletes: Dict[str, Union[int, List[int]]] = {}
+
+        for name in names:
+            key = normalize_ocr(name.strip())
+            if not key or key in self._exact:
+                continue
+            term_id = len(self.names)
+            self.names.append(name.strip())
+            self._keys.append(key)
+            self._exact[key] = term_id
+            for variant in self._variants(key[:prefix_length]):
+                entry = self._deletes.get(variant)
+                if entry is None:
+                    self._deletes[variant] = term_id
+                elif isinstance(entry, int):
+                    self._deletes[variant] = [entry, term_id]
+                else:
+                    entry.append(term_id)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _variants(self, prefix: str) -> Set[str]:
+        """The prefix and every string made by deleting up to max_distance characters"""
+        variants = {prefix}
+        frontier = {prefix}
+        for _ in range(self.max_distance):
+            frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1
+                        for i in range(len(word))}
+            variants |= frontier
+        return variants
+
+    def allowed_distance(self, length: int) -> int:
+        """Edits accepted for a word of this length"""
+        if length <= 4:
+            return 0
+        if length <= 7:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, word: str, min_confidence: float = 0.0) -> Optional[FuzzyMatch]:
+        """
+        Closest lexicon name to a word, or None if nothing is close enough
+
+        Ties go to the name whose length is closest, then to the earlier name.
+        """
+        query = normalize_ocr(word)
+        term_id = self._exact.get(query)
+        if term_id is not None:
+            return FuzzyMatch(self.names[term_id], 1.0, 0)
+
+        limit = self.allowed_distance(len(query))
+        if limit == 0:
+            return None
+
+        best = None
+        seen = set()
+        for variant in self._variants(query[:self.prefix_length]):
+            entry = self._deletes.get(variant)
+            if entry is None:
+                continue
+            for candidate in (entry,) if isinstance(entry, int) else entry:
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                key = self._keys[candidate]
+                distance = edit_distance(query, key, limit)
+                if distance > limit:
+                    continue
+                rank = (distance, abs(len(key) - len(query)), candidate)
+                if best is None or rank < best:
+                    best = rank
+
+        if best is None:
+            return None
+        distance, _, candidate = best
+        confidence = 1.0 - distance / max(len(query), len(self._keys[candidate]))
+        if confidence < min_confidence:
+            return None
+        return FuzzyMatch(self.names[candidate], round(confidence, 3), distance)
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+    import tracemalloc
+
+    drugs = ['Metformin', 'Lisinopril', 'Atorvastatin', 'Amlodipine', 'Metoprolol', 'Furosemide',
+             'Levothyroxine', 'Hydrochlorothiazide', 'Warfarin', 'Gabapentin']
+    lexicon = FuzzyLexicon(drugs)
+    for noisy in ['Lisinoprll', 'Metf0rmin', 'Atorvastatn', 'Furosemlde', 'Hydrochlorothiazid', 'Walking', 'Lasix']:
+        print(f"   {noisy:<20} -> {lexicon.lookup(noisy)}")
+
+    # Scale check: 20k synthetic names plus the real ones
+    rng = random.Random(0)
+    synthetic = {''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 14))).title()
+                 for _ in range(20_000)}
+    start = time.perf_counter()
+    big = FuzzyLexicon(drugs + sorted(synthetic))
+    build_seconds = time.perf_counter() - start
+    tracemalloc.start()
+    measured = FuzzyLexicon(drugs + sorted(synthetic))
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+
+    queries = ['Lisinoprll', 'Metf0rmin', 'Atorvastatn', 'Furosemlde', 'Walking', 'Breakfast'] * 500
+    start = time.perf_counter()
+    for query in queries:
+        big.lookup(query)
+    per_lookup = (time.perf_counter() - start) / len(queries)
+
+    keys = [normalize_ocr(name) for name in big.names]
+    start = time.perf_counter()
+    for query in queries[:60]:
+        min(keys, key=lambda key: edit_distance(normalize_ocr(query), key, 2))
+    brute_force = (time.perf_counter() - start) / 60
+
+    print(f"\n📚 {len(big):,} names indexed in {build_seconds:.1f}s ({index_bytes / 1e6:.0f} MB)")
+    print(f"⚡ {per_lookup * 1e6:.0f} µs per lookup (brute force over every name: {brute_force * 1e3:.0f} ms)")
+    print(f"   Lisinoprll -> {big.lookup('Lisinoprll')}")
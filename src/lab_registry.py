@@ -0,0 +1,261 @@
+"""
+Lab Registry - vitals and lab tests Agent 1 knows how to read
+Every definition is compiled into one combined scanner at import time
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from records import TestResult
+
+
+class LabDefinition(NamedTuple):
+    """
+    One vital sign or lab test
+
+    aliases and value are regex fragments: aliases are the names the test
+    goes by on paperwork, value is the grammar of the reading itself.
+    The reading is shown as display.format(value=..., unit=...), where unit
+    is units[<unit written in the text>] or the first entry of units.
+    """
+    key: str
+    name: str
+    aliases: str
+    value: str
+    units: Tuple[Tuple[str, str], ...] = ()
+    unit_pattern: str = ''
+    display: str = '{value}'
+    normal_range: str = 'Varies'
+    explanation: str = 'Ask your doctor to explain what this test result means for you.'
+
+
+# Order matters: results are reported in this order, and the first three
+# keep the names Agent 2 already interprets (blood pressure, A1C, weight)
+LAB_DEFINITIONS: Tuple[LabDefinition, ...] = (
+    LabDefinition(
+        key='bp', name='Blood Pressure',
+        aliases=r'BP|blood pressure',
+        value=r'\d{2,3}/\d{2,3}',
+        normal_range='Normal is less than 120/80',
+    ),
+    LabDefinition(
+        key='a1c', name='A1C (Diabetes)',
+        aliases=r'A1C|HbA1c',
+        value=r'\d+\.?\d*',
+        unit_pattern=r'\s*%?',
+        display='{value}%',
+        normal_range='Normal is below 5.7%. Diabetes is 6.5% or higher.',
+    ),
+    LabDefinition(
+        key='weight', name='Weight',
+        aliases=r'weight|wt',
+        value=r'\d+',
+        unit_pattern=r'\s*(?:lbs?|pounds?)',
+        display='{value} lbs',
+        normal_range='Varies by height and build',
+    ),
+    LabDefinition(
+        key='hr', name='Heart Rate',
+        aliases=r'heart rate|pulse(?! ox)|\bHR\b',
+        value=r'\d{2,3}',
+        unit_pattern=r'(?:\s*(?:bpm|beats per minute|/min))?',
+        display='{value} bpm',
+        normal_range='Normal resting heart rate is 60-100 beats per minute',
+        explanation='How many times your heart beats each minute.',
+    ),
+    LabDefinition(
+        key='rr', name='Breathing Rate',
+        aliases=r'respiratory rate|resp(?:iration)?s?\b|\bRR\b',
+        value=r'\d{1,2}',
+        unit_pattern=r'(?:\s*(?:breaths per minute|breaths/min|/min))?',
+        display='{value} breaths/min',
+        normal_range='Normal is 12-20 breaths per minute',
+        explanation='How many breaths you take each minute.',
+    ),
+    LabDefinition(
+        key='spo2', name='Oxygen Level (SpO2)',
+        aliases=r'SpO2|\bO2 sat(?:uration)?|oxygen saturation|pulse ox(?:imetry)?',
+        value=r'\d{2,3}',
+        unit_pattern=r'\s*%?',
+        display='{value}%',
+        normal_range='Normal is 95-100%',
+        explanation='How much oxygen your blood is carrying.',
+    ),
+    LabDefinition(
+        key='temp', name='Temperature',
+        aliases=r'temperature|\btemp\b',
+        value=r'\d{2,3}(?:\.\d)?',
+        units=(('f', '°F'), ('c', '°C')),
+        unit_pattern=r'(?:\s*°?\s*(?P<unit>[FC])\b)?',
+        display='{value}{unit}',
+        normal_range='Normal is about 97-99°F (36.1-37.2°C)',
+        explanation='Your body temperature. A high reading can be a sign of infection.',
+    ),
+    LabDefinition(
+        key='glucose', name='Blood Sugar (Glucose)',
+        aliases=r'(?:blood |fasting )?glucose|blood sugar|\bFBG\b|\bBG\b',
+        value=r'\d{2,3}',
+        unit_pattern=r'(?:\s*mg/dL)?',
+        display='{value} mg/dL',
+        normal_range='Normal fasting level is 70-99 mg/dL',
+        explanation='The amount of sugar in your blood when it was tested.',
+    ),
+    LabDefinition(
+        key='creatinine', name='Creatinine (Kidney)',
+        aliases=r'creatinine|\bCr\b',
+        value=r'\d{1,2}(?:\.\d+)?',
+        unit_pattern=r'(?:\s*mg/dL)?',
+        display='{value} mg/dL',
+        normal_range='Normal is about 0.6-1.3 mg/dL',
+        explanation='A waste product your kidneys filter out. Higher numbers can mean the kidneys are working less well.',
+    ),
+    LabDefinition(
+        key='egfr', name='eGFR (Kidney Function)',
+        aliases=r'\beGFR\b|\bGFR\b',
+        value=r'>?\s*\d{1,3}',
+        unit_pattern=r'(?:\s*mL/min(?:/1\.73\s*m2|/1\.73m²)?)?',
+        display='{value}',
+        normal_range='Normal is 60 or higher',
+        explanation='An estimate of how well your kidneys filter your blood. Lower numbers mean less kidney function.',
+    ),
+    LabDefinition(
+        key='inr', name='INR (Blood Clotting)',
+        aliases=r'\bINR\b',
+        value=r'\d(?:\.\d+)?',
+        normal_range='Usually 2.0-3.0 if you take warfarin; about 1.0 otherwise',
+        explanation='How long your blood takes to clot. Doctors check it when you take blood thinners like warfarin.',
+    ),
+    LabDefinition(
+        key='potassium', name='Potassium',
+        aliases=r'potassium|\bK\+',
+        value=r'\d(?:\.\d+)?',
+        unit_pattern=r'(?:\s*(?:mEq/L|mmol/L))?',
+        display='{value} mEq/L',
+        normal_range='Normal is 3.5-5.0 mEq/L',
+        explanation='A mineral your heart and muscles need. Some water pills raise or lower it.',
+    ),
+    LabDefinition(
+        key='ldl', name='LDL Cholesterol',
+        aliases=r'\bLDL\b(?: cholesterol)?',
+        value=r'\d{2,3}',
+        unit_pattern=r'(?:\s*mg/dL)?',
+        display='{value} mg/dL',
+        normal_range='Under 100 mg/dL is best for most people',
+        explanation='The "bad" cholesterol that can build up in your arteries.',
+    ),
+    LabDefinition(
+        key='hemoglobin', name='Hemoglobin',
+        aliases=r'hemoglobin|haemoglobin|\bHgb\b|\bHb\b',
+        value=r'\d{1,2}(?:\.\d+)?',
+        unit_pattern=r'(?:\s*g/dL)?',
+        display='{value} g/dL',
+        normal_range='Normal is about 12-17 g/dL',
+        explanation='The part of your blood that carries oxygen. Low numbers mean anemia.',
+    ),
+)
+
+LABS_BY_NAME: Dict[str, LabDefinition] = {lab.name: lab for lab in LAB_DEFINITIONS}
+
+
+def split_alternatives(fragment: str) -> List[str]:
+    """Split a regex fragment on its top-level '|' (not inside groups)"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(fragment):
+        if char == '\\' or (i and fragment[i - 1] == '\\'):
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            parts.append(fragment[start:i])
+            start = i + 1
+    parts.append(fragment[start:])
+    return parts
+
+
+def leading_letters(fragment: str) -> Set[str]:
+    """
+    Lower-case letters an alias fragment can start with. Understands the
+    shapes used in LAB_DEFINITIONS: literals, \\b, (?:...) and (?:...)?
+    """
+    letters = set()
+    for alternative in split_alternatives(fragment):
+        while alternative.startswith('\\b'):
+            alternative = alternative[2:]
+        if alternative.startswith('(?:'):
+            depth, end = 0, 0
+            for end, char in enumerate(alternative):
+                depth += (char == '(') - (char == ')')
+                if depth == 0:
+                    break
+            letters |= leading_letters(alternative[3:end])
+            if alternative[end + 1:end + 2] in ('?', '*'):
+                letters |= leading_letters(alternative[end + 2:])
+        elif alternative:
+            letters.add(alternative[0].lower())
+    return letters
+
+
+def compile_scanner(definitions: Tuple[LabDefinition, ...]) -> 're.Pattern':
+    """
+    Combine every definition into one alternation, one branch per test:
+    \\b(?=[initials])(?:(?P<key>(?:aliases)[:\\s]+(?P<v_key>value)unit_pattern)|...)
+
+    The branch group closes last, so match.lastgroup names the test that
+    matched without trying the others again. Branches are only tried at
+    the start of a word beginning with a letter some alias starts with,
+    so a document costs about the same however many tests are registered.
+    """
+    branches = []
+    initials = set()
+    for lab in definitions:
+        unit = lab.unit_pattern.replace('(?P<unit>', f'(?P<u_{lab.key}>')
+        branches.append(rf'(?P<{lab.key}>(?:{lab.aliases})[:\s]+(?P<v_{lab.key}>{lab.value}){unit})')
+        initials |= leading_letters(lab.aliases)
+    prefix = r'\b(?=[' + ''.join(sorted(initials)) + '])'
+    return re.compile(prefix + '(?:' + '|'.join(branches) + ')', re.IGNORECASE)
+
+
+LAB_SCANNER = compile_scanner(LAB_DEFINITIONS)
+
+# Branch group name -> (position in LAB_DEFINITIONS, definition, unit lookup)
+_BRANCHES = {lab.key: (i, lab, dict(lab.units)) for i, lab in enumerate(LAB_DEFINITIONS)}
+
+
+def scan_lab_results(text: str) -> List[TestResult]:
+    """
+    Every vital/lab reading in the text, found in a single pass
+
+    Results are grouped in LAB_DEFINITIONS order (readings of the same test
+    stay in the order they appear in the document).
+    """
+    found = []
+    for match in LAB_SCANNER.finditer(text):
+        order, lab, units = _BRANCHES[match.lastgroup]
+        value = ' '.join(match.group(f'v_{lab.key}').split())
+        unit = lab.units[0][1] if lab.units else ''
+        if units:
+            unit = units.get((match.group(f'u_{lab.key}') or '').lower(), unit)
+        found.append((order, TestResult(lab.name, lab.display.format(value=value, unit=unit))))
+
+    found.sort(key=lambda item: item[0])
+    return [result for _, result in found]
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    sample = """
+    VITAL SIGNS: BP: 142/88 | HR: 96 bpm | RR 18 | SpO2: 93% | Temp: 100.4 F
+    Weight: 198 lbs (up 12 lbs from baseline)
+    LABS: A1C: 8.2%, Glucose: 212 mg/dL, Creatinine: 1.4, eGFR: 52, INR: 2.6,
+    Potassium: 3.3 mEq/L, LDL: 131, Hgb: 11.2
+    Limit sodium intake to 2000mg per day.
+    """
+
+    print(f"Registry: {len(LAB_DEFINITIONS)} tests, one compiled scanner\n")
+    for result in scan_lab_results(sample):
+        print(f"   • {result.test}: {result.value}")
@@ -0,0 +1,256 @@
+"""
+OCR Ingestion - turns photos of discharge papers into text for Agent 1
+Runs local Tesseract across a process pool, one page per worker
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import hashlib
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from summary_storage import write_atomic
+
+# Optional: Pillow + pytesseract (and the tesseract binary) for photo upload
+try:
+    import pytesseract
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:
+    pytesseract = Image = ImageOps = UnidentifiedImageError = None
+
+OCR_AVAILABLE = pytesseract is not None
+
+
+# Preprocessing settings (part of the cache key - bump CACHE_VERSION if changed)
+MAX_SIDE = 2400                      # Phone photos are downscaled to this many pixels
+DESKEW_SAMPLE_SIDE = 600             # Skew is estimated on a small copy
+DESKEW_ANGLES = tuple(a / 2 for a in range(-10, 11))   # -5 to +5 degrees
+MIN_DESKEW_ANGLE = 0.5               # Smaller tilts are left alone
+CACHE_VERSION = 1
+
+ImageInput = Union[str, bytes, BinaryIO]
+
+
+class OCRError(Exception):
+    """An image could not be read - ask the user to re-upload or use text entry"""
+
+
+def require_ocr():
+    """Raise OCRError if Pillow / pytesseract are not installed"""
+    if not OCR_AVAILABLE:
+        raise OCRError("Photo upload needs Pillow and pytesseract "
+                       "(pip install pillow pytesseract, plus the tesseract program)")
+
+
+def read_image_bytes(image: ImageInput) -> bytes:
+    """Raw bytes of an image given as a path, bytes or an open file"""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    if isinstance(image, str):
+        with open(image, 'rb') as f:
+            return f.read()
+    return image.read()
+
+
+def image_hash(data: bytes, lang: str, config: str) -> str:
+    """Cache key: the image content plus everything that changes the OCR output"""
+    digest = hashlib.sha256(data)
+    digest.update(f"|{lang}|{config}|v{CACHE_VERSION}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def estimate_skew(gray: 'Image.Image') -> float:
+    """
+    Angle (degrees) that best straightens the text lines
+
+    Text rows are darkest when lines are horizontal, so the angle whose
+    row-ink profile has the highest variance wins. Runs on a small copy.
+    """
+    sample = gray.copy()
+    sample.thumbnail((DESKEW_SAMPLE_SIDE, DESKEW_SAMPLE_SIDE))
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in DESKEW_ANGLES:
+        rotated = sample.rotate(angle, resample=Image.Resampling.BILINEAR, fillcolor=255)
+        row_ink = (np.asarray(rotated) < 128).sum(axis=1)
+        score = float(row_ink.var())
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def preprocess(image: 'Image.Image') -> 'Image.Image':
+    """Cheap cleanup before OCR: honor EXIF rotation, grayscale, downscale, deskew"""
+    image = ImageOps.exif_transpose(image)
+    gray = image.convert('L')
+
+    if max(gray.size) > MAX_SIDE:
+        gray.thumbnail((MAX_SIDE, MAX_SIDE), Image.Resampling.LANCZOS)
+
+    angle = estimate_skew(gray)
+    if abs(angle) >= MIN_DESKEW_ANGLE:
+        gray = gray.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+    return gray
+
+
+def ocr_page(data: bytes, lang: str = 'eng', config: str = '--psm 3') -> str:
+    """
+    OCR one page image (runs inside a worker process)
+
+    Raises:
+        OCRError: the bytes are not an image (or one too large to decode
+                  safely), tesseract is missing, or tesseract failed on it
+    """
+    require_ocr()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            page = preprocess(image)
+    except Image.DecompressionBombError:
+        raise OCRError("The image is too large to read - please upload a smaller photo") from None
+    except (UnidentifiedImageError, OSError) as exc:
+        raise OCRError(f"Could not open image: {exc}") from None
+
+    try:
+        return pytesseract.image_to_string(page, lang=lang, config=config)
+    except pytesseract.TesseractNotFoundError:
+        raise OCRError("The tesseract program is not installed or not on PATH") from None
+    except pytesseract.TesseractError as exc:
+        raise OCRError(f"Tesseract could not read the image: {exc.message}") from None
+
+
+class OCRIngestor:
+    """
+    Reads page images with Tesseract in a pool of worker processes.
+
+    Pages are yielded as soon as each one finishes, so Agent 1 can start on
+    page 1 while later pages are still being read. Results are cached by
+    image hash (in memory, and on disk when cache_dir is given), so a
+    re-uploaded photo is never OCR'd twice.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 lang: str = 'eng',
+                 config: str = '--psm 3'):
+        """
+        Args:
+            max_workers: Worker processes (default: one per CPU)
+            cache_dir: Folder for cached page text (memory only if None)
+            lang: Tesseract language
+            config: Extra tesseract options
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.lang = lang
+        self.config = config
+        self._cache: Dict[str, str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def cached_text(self, key: str) -> Optional[str]:
+        """Cached OCR text for an image hash, or None"""
+        if key in self._cache:
+            return self._cache[key]
+        if self.cache_dir and os.path.exists(self._cache_path(key)):
+            with open(self._cache_path(key), 'r', encoding='utf-8') as f:
+                self._cache[key] = f.read()
+            return self._cache[key]
+        return None
+
+    def store_text(self, key: str, text: str):
+        """Remember OCR text for an image hash"""
+        self._cache[key] = text
+        if self.cache_dir:
+            write_atomic(self._cache_path(key), text.encode('utf-8'))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def iter_pages(self, images: Iterable[ImageInput]) -> Iterator[Tuple[int, str]]:
+        """
+        OCR every image, yielding (page_index, text) as pages finish
+
+        Cached pages come out first; the rest arrive in completion order,
+        not page order.
+
+        Raises:
+            OCRError: a page could not be read (names the page)
+        """
+        require_ocr()
+        cached = []
+        pending = {}
+        for index, image in enumerate(images):
+            data = read_image_bytes(image)
+            key = image_hash(data, self.lang, self.config)
+            text = self.cached_text(key)
+            if text is not None:
+                cached.append((index, text))
+            else:
+                future = self._get_pool().submit(ocr_page, data, self.lang, self.config)
+                pending[future] = (index, key)
+
+        try:
+            yield from cached
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, key = pending.pop(future)
+                    try:
+                        text = future.result()
+                    except OCRError as exc:
+                        raise OCRError(f"Page {index + 1}: {exc}") from None
+                    self.store_text(key, text)
+                    yield index, text
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def read_text(self, images: Iterable[ImageInput]) -> str:
+        """OCR every image and return the text in page order"""
+        pages = dict(self.iter_pages(images))
+        return "\n".join(pages[index] for index in sorted(pages))
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import sys
+
+    if not OCR_AVAILABLE:
+        print("⚠️  Pillow / pytesseract not installed - photo upload is unavailable")
+        sys.exit(0)
+
+    paths: List[str] = sys.argv[1:]
+    if not paths:
+        print("Usage: python ocr_ingest.py page1.jpg [page2.jpg ...]")
+        sys.exit(0)
+
+    with OCRIngestor(cache_dir=os.path.join('..', 'data', 'processed', 'ocr_cache')) as ocr:
+        for index, text in ocr.iter_pages(paths):
+            print(f"📄 Page {index + 1} ({paths[index]}): {len(text)} characters")
+            print(text[:300])
@@ -0,0 +1,492 @@
+"""
+Patient Store - each patient's visits in a local SQLite file
+Keeps a merged current view and reports what changed since the last visit,
+updated incrementally as each visit is recorded
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from coalesce import document_key
+from records import ExtractionContext, Medication, PatientView, TestResult, TrendAlert, VisitDelta
+
+# Item kinds stored per visit
+DIAGNOSIS = 'diagnosis'
+MEDICATION = 'medication'
+TEST = 'test'
+
+# Dosage Agent 1 uses when none was found - never reported as a dose change
+UNKNOWN_DOSAGE = "See prescription"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (
+    visit_id      INTEGER PRIMARY KEY,
+    patient_id    TEXT NOT NULL,
+    visit_date    TEXT NOT NULL,              -- YYYY-MM-DD
+    recorded_at   TEXT NOT NULL,
+    document_hash TEXT NOT NULL DEFAULT '',
+    has_medications INTEGER NOT NULL,         -- 1 if the document listed any medications
+    UNIQUE (patient_id, visit_date, document_hash)
+);
+CREATE INDEX IF NOT EXISTS visits_by_patient ON visits (patient_id, visit_date, visit_id);
+
+CREATE TABLE IF NOT EXISTS visit_items (
+    visit_id  INTEGER NOT NULL REFERENCES visits (visit_id) ON DELETE CASCADE,
+    kind      TEXT NOT NULL,                  -- 'diagnosis', 'medication' or 'test'
+    item_key  TEXT NOT NULL,                  -- lower-cased name
+    name      TEXT NOT NULL,
+    value     TEXT NOT NULL DEFAULT '',       -- dosage or test value
+    PRIMARY KEY (visit_id, kind, item_key)
+);
+
+-- Merged view, updated as visits are recorded (never rebuilt from history)
+CREATE TABLE IF NOT EXISTS current_items (
+    patient_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    item_key   TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    value      TEXT NOT NULL DEFAULT '',
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL,
+    PRIMARY KEY (patient_id, kind, item_key)
+);
+
+-- Which visit the current medication list comes from
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id        TEXT PRIMARY KEY,
+    medications_as_of TEXT NOT NULL DEFAULT ''
+);
+
+-- Every test reading over time (from visits and home logs), for trends.py
+CREATE TABLE IF NOT EXISTS readings (
+    patient_id   TEXT NOT NULL,
+    item_key     TEXT NOT NULL,
+    reading_date TEXT NOT NULL,
+    value        TEXT NOT NULL,
+    source       TEXT NOT NULL,               -- 'visit' or 'home'
+    PRIMARY KEY (patient_id, item_key, reading_date, source)
+);
+CREATE INDEX IF NOT EXISTS readings_by_test ON readings (item_key, patient_id, reading_date);
+
+-- Trend alerts waiting to be shown on the patient's next summary
+CREATE TABLE IF NOT EXISTS alerts (
+    patient_id   TEXT NOT NULL,
+    rule         TEXT NOT NULL,
+    reading_date TEXT NOT NULL,
+    series       TEXT NOT NULL,
+    severity     TEXT NOT NULL,
+    message      TEXT NOT NULL,
+    value        REAL NOT NULL,
+    delivered    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (patient_id, rule, reading_date)
+);
+"""
+
+VisitDate = Union[str, date, datetime, None]
+
+
+def normalize_date(visit_date: VisitDate) -> str:
+    """
+    YYYY-MM-DD for a date, datetime or ISO string (today if None)
+
+    Raises:
+        ValueError: not a valid date
+    """
+    if visit_date is None:
+        return date.today().isoformat()
+    if isinstance(visit_date, datetime):
+        return visit_date.date().isoformat()
+    if isinstance(visit_date, date):
+        return visit_date.isoformat()
+    return date.fromisoformat(str(visit_date).strip()[:10]).isoformat()
+
+
+def visit_items(extracted: Union[ExtractionContext, Dict]) -> List[Tuple[str, str, str, str]]:
+    """(kind, key, name, value) rows for the diagnoses, medications and tests of one extraction"""
+    if not isinstance(extracted, ExtractionContext):
+        extracted = ExtractionContext.from_extraction(extracted)
+
+    rows = {}
+    for diagnosis in extracted.diagnoses:
+        rows.setdefault((DIAGNOSIS, diagnosis.lower()), diagnosis)
+    for med in extracted.medications:
+        rows.setdefault((MEDICATION, med.name.lower()), (med.name, med.dosage))
+    for test in extracted.test_results:
+        # Several readings of one test: keep the last one in the document
+        rows[(TEST, test.test.lower())] = (test.test, test.value)
+
+    return [
+        (kind, key, value, '') if kind == DIAGNOSIS else (kind, key, value[0], value[1])
+        for (kind, key), value in rows.items()
+    ]
+
+
+class PatientStore:
+    """
+    Visits per patient, indexed by patient identifier and visit date.
+
+    Recording a visit stores its items, updates the patient's current view
+    in place and returns a VisitDelta against the previous visit. The delta
+    is computed from the current view and the previous visit's rows, so
+    the cost does not grow with the length of the history.
+
+    Current view:
+      - diagnoses accumulate (a fracture visit does not drop hypertension)
+      - medications are the list from the most recent visit that had one,
+        so a lab-only visit does not "stop" everything
+      - each test keeps its most recent value
+
+    Visits may be recorded out of order; an older visit fills in history
+    without replacing newer medications or test values. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        Args:
+            path: SQLite file (created if missing), or ':memory:'
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if path != ':memory:':
+            self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def record_visit(self,
+                     patient_id: str,
+                     extracted: Union[ExtractionContext, Dict],
+                     visit_date: VisitDate = None,
+                     document_hash: str = '') -> VisitDelta:
+        """
+        Store one visit's diagnoses, medications and test results
+
+        Recording the same document for the same patient and date again
+        stores nothing new and returns the same delta.
+
+        Args:
+            patient_id: Patient identifier (any stable string)
+            extracted: Agent 1's extraction (dict or ExtractionContext)
+            visit_date: Date of the visit (default: today)
+            document_hash: Identifies the source document, for de-duplication
+                           (default: a hash of the extracted items)
+
+        Returns:
+            VisitDelta against the patient's previous visit
+
+        Raises:
+            ValueError: empty patient_id or invalid date
+        """
+        patient_id = (patient_id or '').strip()
+        if not patient_id:
+            raise ValueError("patient_id is required")
+        visit_date = normalize_date(visit_date)
+        items = visit_items(extracted)
+        document_hash = document_hash or document_key(*(part for item in items for part in item))
+        has_medications = any(kind == MEDICATION for kind, *_ in items)
+
+        with self._lock, self._db:
+            db = self._db
+            existing = db.execute(
+                "SELECT visit_id FROM visits WHERE patient_id = ? AND visit_date = ? AND document_hash = ?",
+                (patient_id, visit_date, document_hash)).fetchone()
+            if existing:
+                return self._delta(patient_id, visit_date, existing[0], items, has_medications)
+
+            visit_id = db.execute(
+                "INSERT INTO visits (patient_id, visit_date, recorded_at, document_hash, has_medications) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (patient_id, visit_date, datetime.now().isoformat(timespec='seconds'),
+                 document_hash, int(has_medications))).lastrowid
+            db.executemany(
+                "INSERT INTO visit_items (visit_id, kind, item_key, name, value) VALUES (?, ?, ?, ?, ?)",
+                [(visit_id, *item) for item in items])
+            db.executemany(
+                "INSERT OR REPLACE INTO readings (patient_id, item_key, reading_date, value, source) "
+                "VALUES (?, ?, ?, ?, 'visit')",
+                [(patient_id, key, visit_date, value) for kind, key, _, value in items if kind == TEST])
+
+            # The delta needs the current view as it was before this visit
+            delta = self._delta(patient_id, visit_date, visit_id, items, has_medications)
+            self._update_current(patient_id, visit_date, items, has_medications)
+        return delta
+
+    def _previous_visit(self, patient_id: str, visit_date: str, visit_id: int,
+                        with_medications: bool = False) -> Optional[Tuple[int, str]]:
+        """(visit_id, date) of the latest visit before this one, by date then recording order"""
+        return self._db.execute(
+            "SELECT visit_id, visit_date FROM visits WHERE patient_id = ? "
+            "AND (visit_date < ? OR (visit_date = ? AND visit_id < ?)) "
+            + ("AND has_medications = 1 " if with_medications else "")
+            + "ORDER BY visit_date DESC, visit_id DESC LIMIT 1",
+            (patient_id, visit_date, visit_date, visit_id)).fetchone()
+
+    def _items_of(self, visit_id: int, kind: str) -> Dict[str, Tuple[str, str]]:
+        return {key: (name, value) for key, name, value in self._db.execute(
+            "SELECT item_key, name, value FROM visit_items WHERE visit_id = ? AND kind = ?", (visit_id, kind))}
+
+    def _delta(self, patient_id: str, visit_date: str, visit_id: int,
+               items: List[Tuple[str, str, str, str]], has_medications: bool) -> VisitDelta:
+        previous = self._previous_visit(patient_id, visit_date, visit_id)
+        if previous is None:
+            return VisitDelta(patient_id, visit_date)
+
+        delta = VisitDelta(patient_id, visit_date, previous_visit_date=previous[1])
+        current = {kind: {} for kind in (DIAGNOSIS, MEDICATION, TEST)}
+        for kind, key, name, value in items:
+            current[kind][key] = (name, value)
+
+        # Medications: against the last visit that listed any
+        if has_medications:
+            medication_visit = self._previous_visit(patient_id, visit_date, visit_id, with_medications=True)
+            before = self._items_of(medication_visit[0], MEDICATION) if medication_visit else {}
+            for key, (name, dosage) in current[MEDICATION].items():
+                if key not in before:
+                    delta.new_medications.append(Medication(name, dosage))
+                elif UNKNOWN_DOSAGE not in (dosage, before[key][1]) and dosage != before[key][1]:
+                    delta.changed_dosages.append({'name': name, 'previous': before[key][1], 'current': dosage})
+            delta.stopped_medications = [Medication(name, dosage) for key, (name, dosage) in before.items()
+                                         if key not in current[MEDICATION]]
+
+        # Diagnoses: new if never recorded on an earlier visit
+        if current[DIAGNOSIS]:
+            seen = dict(self._db.execute(
+                "SELECT item_key, first_seen FROM current_items WHERE patient_id = ? AND kind = ?",
+                (patient_id, DIAGNOSIS)).fetchall())
+            for key, (name, _) in current[DIAGNOSIS].items():
+                first_seen = seen.get(key)
+                if first_seen is None:
+                    delta.new_diagnoses.append(name)
+                elif first_seen >= visit_date and not self._diagnosed_before(patient_id, key, visit_date, visit_id):
+                    # Only seen on this date or later (same-day or out-of-order visit)
+                    delta.new_diagnoses.append(name)
+
+        # Tests: against the latest earlier reading of the same test
+        if current[TEST]:
+            latest = {key: (value, last_seen) for key, value, last_seen in self._db.execute(
+                "SELECT item_key, value, last_seen FROM current_items WHERE patient_id = ? AND kind = ?",
+                (patient_id, TEST))}
+            for key, (name, value) in current[TEST].items():
+                reading = latest.get(key)
+                if reading is None:
+                    continue
+                previous_value = reading[0] if reading[1] < visit_date else self._reading_before(
+                    patient_id, key, visit_date, visit_id)
+                if previous_value is not None and previous_value != value:
+                    delta.changed_tests.append({'test': name, 'previous': previous_value, 'current': value})
+        return delta
+
+    def _reading_before(self, patient_id: str, key: str, visit_date: str, visit_id: int) -> Optional[str]:
+        """Slow path for out-of-order and same-day visits: the test's value on the latest earlier visit"""
+        row = self._db.execute(
+            "SELECT value FROM visits JOIN visit_items USING (visit_id) WHERE patient_id = ? "
+            "AND kind = ? AND item_key = ? AND (visit_date < ? OR (visit_date = ? AND visit_id < ?)) "
+            "ORDER BY visit_date DESC, visit_id DESC LIMIT 1",
+            (patient_id, TEST, key, visit_date, visit_date, visit_id)).fetchone()
+        return row[0] if row else None
+
+    def _diagnosed_before(self, patient_id: str, key: str, visit_date: str, visit_id: int) -> bool:
+        """Slow path for out-of-order and same-day visits: was this diagnosis on an earlier visit?"""
+        return self._db.execute(
+            "SELECT 1 FROM visits JOIN visit_items USING (visit_id) WHERE patient_id = ? "
+            "AND kind = ? AND item_key = ? AND (visit_date < ? OR (visit_date = ? AND visit_id < ?)) LIMIT 1",
+            (patient_id, DIAGNOSIS, key, visit_date, visit_date, visit_id)).fetchone() is not None
+
+    def _update_current(self, patient_id: str, visit_date: str,
+                        items: List[Tuple[str, str, str, str]], has_medications: bool):
+        """Fold one visit into the patient's current view"""
+        db = self._db
+        db.execute("INSERT OR IGNORE INTO patients (patient_id) VALUES (?)", (patient_id,))
+
+        rows = [(patient_id, kind, key, name, value, visit_date, visit_date)
+                for kind, key, name, value in items if kind != MEDICATION]
+        # Diagnoses and tests: widen first/last seen; the newest visit's name and value win
+        db.executemany(
+            "INSERT INTO current_items (patient_id, kind, item_key, name, value, first_seen, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (patient_id, kind, item_key) DO UPDATE SET "
+            "  name = CASE WHEN excluded.last_seen >= last_seen THEN excluded.name ELSE name END, "
+            "  value = CASE WHEN excluded.last_seen >= last_seen THEN excluded.value ELSE value END, "
+            "  first_seen = MIN(first_seen, excluded.first_seen), "
+            "  last_seen = MAX(last_seen, excluded.last_seen)",
+            rows)
+
+        if not has_medications:
+            return
+        medications = [(patient_id, MEDICATION, key, name, value, visit_date, visit_date)
+                       for kind, key, name, value in items if kind == MEDICATION]
+        (as_of,) = db.execute("SELECT medications_as_of FROM patients WHERE patient_id = ?",
+                              (patient_id,)).fetchone()
+        if visit_date >= as_of:
+            # Newest medication list: it replaces the current one
+            keys = [row[2] for row in medications]
+            db.execute(
+                f"DELETE FROM current_items WHERE patient_id = ? AND kind = ? "
+                f"AND item_key NOT IN ({','.join('?' * len(keys))})",
+                (patient_id, MEDICATION, *keys))
+            db.executemany(
+                "INSERT INTO current_items (patient_id, kind, item_key, name, value, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (patient_id, kind, item_key) DO UPDATE SET "
+                "  name = excluded.name, value = excluded.value, last_seen = excluded.last_seen",
+                medications)
+            db.execute("UPDATE patients SET medications_as_of = ? WHERE patient_id = ?", (visit_date, patient_id))
+        else:
+            # Older list: only tells us since when current medications were taken
+            db.executemany(
+                "UPDATE current_items SET first_seen = MIN(first_seen, ?) "
+                "WHERE patient_id = ? AND kind = ? AND item_key = ?",
+                [(visit_date, patient_id, MEDICATION, row[2]) for row in medications])
+
+    def record_reading(self, patient_id: str, test: str, value: str, reading_date: VisitDate = None):
+        """
+        Store a reading taken outside a visit (e.g. a daily weight from home)
+        
+        It feeds trend detection only; the current view and visit deltas
+        come from visits. A second home reading of the same test on the same
+        day replaces the first.
+        """
+        patient_id = (patient_id or '').strip()
+        if not patient_id:
+            raise ValueError("patient_id is required")
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO readings (patient_id, item_key, reading_date, value, source) "
+                "VALUES (?, ?, ?, ?, 'home')",
+                (patient_id, test.strip().lower(), normalize_date(reading_date), str(value)))
+
+    def series(self, item_keys: Iterable[str],
+               patient_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        (patient_id, item_key, reading_date, value) rows for some tests,
+        ordered by test, patient and date - the input to trends.TrendEngine
+        """
+        item_keys = list(item_keys)
+        query = (f"SELECT patient_id, item_key, reading_date, value FROM readings "
+                 f"WHERE item_key IN ({','.join('?' * len(item_keys))})")
+        params = list(item_keys)
+        if patient_ids is not None:
+            patient_ids = list(patient_ids)
+            query += f" AND patient_id IN ({','.join('?' * len(patient_ids))})"
+            params += patient_ids
+        with self._lock:
+            return self._db.execute(query + " ORDER BY item_key, patient_id, reading_date, source DESC",
+                                    params).fetchall()
+
+    def queue_alerts(self, alerts: Iterable[TrendAlert]) -> int:
+        """Save alerts for the patients' next summaries; returns how many were new"""
+        rows = [(alert.patient_id, alert.rule, alert.reading_date, alert.series,
+                 alert.severity, alert.message, alert.value) for alert in alerts]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO alerts (patient_id, rule, reading_date, series, severity, message, value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            return self._db.total_changes - before
+
+    def take_alerts(self, patient_id: str) -> List[TrendAlert]:
+        """Undelivered alerts for a patient (marked delivered), urgent first"""
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT rule, series, severity, message, value, reading_date FROM alerts "
+                "WHERE patient_id = ? AND delivered = 0 "
+                "ORDER BY severity = 'urgent' DESC, reading_date, rule", (patient_id,)).fetchall()
+            self._db.execute("UPDATE alerts SET delivered = 1 WHERE patient_id = ? AND delivered = 0",
+                             (patient_id,))
+        return [TrendAlert(patient_id, rule, series, severity, message, value, reading_date)
+                for rule, series, severity, message, value, reading_date in rows]
+
+    def current_view(self, patient_id: str) -> Optional[PatientView]:
+        """The patient's merged record, or None if no visits are stored"""
+        with self._lock:
+            summary = self._db.execute(
+                "SELECT COUNT(*), MAX(visit_date) FROM visits WHERE patient_id = ?", (patient_id,)).fetchone()
+            if not summary[0]:
+                return None
+            rows = self._db.execute(
+                "SELECT kind, name, value FROM current_items WHERE patient_id = ? "
+                "ORDER BY first_seen, rowid", (patient_id,)).fetchall()
+
+        return PatientView(
+            patient_id=patient_id,
+            as_of=summary[1],
+            visit_count=summary[0],
+            diagnoses=[name for kind, name, _ in rows if kind == DIAGNOSIS],
+            medications=[Medication(name, value) for kind, name, value in rows if kind == MEDICATION],
+            test_results=[TestResult(name, value) for kind, name, value in rows if kind == TEST],
+        )
+
+    def visit_dates(self, patient_id: str) -> List[str]:
+        """Dates of the patient's stored visits, oldest first"""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT visit_date FROM visits WHERE patient_id = ? ORDER BY visit_date, visit_id", (patient_id,))]
+
+    def patients(self) -> Iterable[str]:
+        """Identifiers of every stored patient"""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT patient_id FROM visits ORDER BY 1")]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import time
+
+    from agent1_extractor import MedicalExtractor
+
+    extractor = MedicalExtractor()
+    visits = [
+        ('2026-01-10', "Diagnoses: Hypertension\nMedications: Lisinopril 10mg daily, Aspirin 81mg\nBP: 150/95"),
+        ('2026-04-02', "Diagnoses: Hypertension, Type 2 Diabetes\n"
+                       "Medications: Lisinopril 20mg daily, Metformin 500mg twice daily, Aspirin 81mg\n"
+                       "BP: 138/88\nA1C: 7.4%"),
+        ('2026-05-15', "Lab visit. A1C: 6.9%"),
+        ('2026-08-20', "Diagnoses: Hypertension, Type 2 Diabetes\n"
+                       "Medications: Lisinopril 20mg daily, Metformin 500mg twice daily\nBP: 128/80"),
+    ]
+
+    with PatientStore() as store:
+        for visit_date, document in visits:
+            delta = store.record_visit('patient-001', extractor.extract_all(document), visit_date)
+            print(f"🩺 Visit {visit_date} (previous: {delta.previous_visit_date or 'none'})")
+            for med in delta.new_medications:
+                print(f"   ➕ New medication: {med.name} {med.dosage}")
+            for med in delta.stopped_medications:
+                print(f"   ➖ Stopped: {med.name}")
+            for change in delta.changed_dosages:
+                print(f"   🔁 {change['name']}: {change['previous']} → {change['current']}")
+            for diagnosis in delta.new_diagnoses:
+                print(f"   📋 New diagnosis: {diagnosis}")
+            for change in delta.changed_tests:
+                print(f"   📊 {change['test']}: {change['previous']} → {change['current']}")
+
+        view = store.current_view('patient-001')
+        print(f"\n📁 Current view as of {view.as_of} ({view.visit_count} visits)")
+        print(f"   Diagnoses:   {view.diagnoses}")
+        print(f"   Medications: {[(med.name, med.dosage) for med in view.medications]}")
+        print(f"   Tests:       {[(test.test, test.value) for test in view.test_results]}")
+
+        # Recording cost stays flat as history grows
+        extracted = extractor.extract_all(visits[1][1])
+        for size in (100, 2000):
+            start = time.perf_counter()
+            for day in range(size):
+                store.record_visit(f'load-{size}', extracted, date.fromordinal(730000 + day))
+            print(f"⚡ {size:>5} visits: {(time.perf_counter() - start) / size * 1000:.2f} ms per visit")
@@ -0,0 +1,207 @@
+"""
+PDF Ingestion - reads patient-portal PDFs page by page for Agent 1
+Uses the PDF's text layer, falling back to OCR for scanned (image-only) pages
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from ocr_ingest import OCR_AVAILABLE, OCRError, ocr_page
+
+# Optional: pypdf for PDF upload
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+PDF_AVAILABLE = PdfReader is not None
+
+# Pages with less text than this are treated as scanned images
+MIN_TEXT_CHARS = 20
+
+# How each page's text was obtained
+PAGE_TEXT = 'text'
+PAGE_OCR = 'ocr'
+PAGE_EMPTY = 'empty'
+
+PDFInput = Union[str, bytes]
+
+
+class PDFError(Exception):
+    """A PDF could not be read - ask the user to upload it again or type the information in"""
+
+
+def require_pdf():
+    """Raise PDFError if pypdf is not installed"""
+    if not PDF_AVAILABLE:
+        raise PDFError("PDF upload needs pypdf (pip install pypdf)")
+
+
+# Each worker process keeps the last PDF it opened, so the file is parsed
+# once per worker instead of once per page
+_worker_reader: Dict[str, 'PdfReader'] = {}
+
+
+def _open_reader(path: str) -> 'PdfReader':
+    reader = _worker_reader.get(path)
+    if reader is None:
+        _worker_reader.clear()
+        reader = _worker_reader[path] = PdfReader(path)
+    return reader
+
+
+def read_page(path: str, index: int, min_text_chars: int = MIN_TEXT_CHARS) -> Tuple[int, str, str]:
+    """
+    Text of one page (runs inside a worker process)
+
+    Returns:
+        (page_index, text, how) where how is PAGE_TEXT, PAGE_OCR or PAGE_EMPTY
+        
+    Raises:
+        PDFError: the page could not be read (names the page). A malformed
+                  page can make pypdf raise almost anything (KeyError,
+                  TypeError, AttributeError, ...), so every error becomes one.
+    """
+    try:
+        return _read_page(path, index, min_text_chars)
+    except Exception as exc:
+        raise PDFError(f"Page {index + 1}: could not read the page ({type(exc).__name__}: {exc})") from None
+
+
+def _read_page(path: str, index: int, min_text_chars: int) -> Tuple[int, str, str]:
+    page = _open_reader(path).pages[index]
+    text = page.extract_text() or ''
+    if len(text.strip()) >= min_text_chars:
+        return index, text, PAGE_TEXT
+
+    # Scanned page: OCR the images embedded in it
+    if not OCR_AVAILABLE:
+        return index, text, PAGE_EMPTY
+    ocr_text = []
+    for image in page.images:
+        try:
+            ocr_text.append(ocr_page(image.data))
+        except OCRError:
+            continue
+    ocr_text = "\n".join(part for part in ocr_text if part.strip())
+    if ocr_text:
+        return index, ocr_text, PAGE_OCR
+    return index, text, PAGE_EMPTY
+
+
+class PDFIngestor:
+    """
+    Streams the pages of a PDF through a pool of worker processes.
+
+    At most `window` pages are in flight at once, so an 80-page discharge
+    packet uses about as much memory as a short one, and the first pages
+    come back while later ones are still being decoded.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 window: Optional[int] = None,
+                 min_text_chars: int = MIN_TEXT_CHARS):
+        """
+        Args:
+            max_workers: Worker processes (default: one per CPU)
+            window: Pages in flight at once (default: twice the workers)
+            min_text_chars: Pages with less text are OCR'd instead
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.window = window or 2 * self.max_workers
+        self.min_text_chars = min_text_chars
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def page_count(self, path: str) -> int:
+        """Number of pages in a PDF file"""
+        require_pdf()
+        try:
+            return len(PdfReader(path).pages)
+        except Exception as exc:
+            # Broken files make pypdf raise more than its PdfReadError (KeyError, TypeError, ...)
+            raise PDFError(f"Could not open PDF: {exc}") from None
+
+    def iter_pages(self, pdf: PDFInput) -> Iterator[Tuple[int, str, str]]:
+        """
+        Read every page, yielding (page_index, text, how) as pages finish
+
+        Pages are submitted in order, so early pages tend to come back
+        first, but results arrive in completion order.
+
+        Raises:
+            PDFError: the file is not a readable PDF, or one of its pages is not (names the page)
+        """
+        require_pdf()
+        temp_path = None
+        if isinstance(pdf, (bytes, bytearray)):
+            fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf)
+            pdf = temp_path
+
+        pending = {}
+        try:
+            total = self.page_count(pdf)
+            next_page = 0
+            while next_page < total or pending:
+                # Keep the window full
+                while next_page < total and len(pending) < self.window:
+                    future = self._get_pool().submit(read_page, pdf, next_page, self.min_text_chars)
+                    pending[future] = next_page
+                    next_page += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if temp_path:
+                os.remove(temp_path)
+
+    def read_text(self, pdf: PDFInput) -> str:
+        """Text of the whole PDF in page order"""
+        pages = {index: text for index, text, _ in self.iter_pages(pdf)}
+        return "\n".join(pages[index] for index in sorted(pages))
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import sys
+
+    if not PDF_AVAILABLE:
+        print("⚠️  pypdf not installed - PDF upload is unavailable")
+        sys.exit(0)
+
+    paths: List[str] = sys.argv[1:]
+    if not paths:
+        print("Usage: python pdf_ingest.py after_visit_summary.pdf")
+        sys.exit(0)
+
+    with PDFIngestor() as reader:
+        for index, text, how in reader.iter_pages(paths[0]):
+            print(f"📄 Page {index + 1}: {len(text)} characters ({how})")
@@ -6,30 +6,112 @@ Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
 Course: ITAI 2376 - Boomer Health Summary Project
 """
 
-import json
-from typing import Dict, Optional
+import asyncio
+import sys
+import threading
+import uuid
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, TextIO, Tuple, Union
 from datetime import datetime
 
 # Import our agents
 from agent1_extractor import MedicalExtractor
-from agent2_educator import HealthExplainer
+from agent2_educator import ExplanationTables, HealthExplainer
 from agent3_organizer import LifestyleCoach
+from coalesce import AsyncSingleFlight, SingleFlight, document_key
+from deadlines import DEFAULT_LIMITS, Deadline, InputLimits, apply_input_limits, expired
+from ocr_ingest import OCRError, OCRIngestor
+from patient_store import PatientStore, VisitDate
+from pdf_ingest import PDFError, PDFIngestor
+from records import ActionPlan, EmergencyAlert, ExtractionContext, HealthSummary, Medication, TestResult
+from renderer import DEFAULT_RENDERER
+from summary_storage import save_summary
+from trends import TrendEngine
+from triage import emergency_banner, form_text, triage
+from vocabulary import EMPTY_VOCABULARY, Lexicon, Vocabulary
+
+
+class VocabularySnapshot(NamedTuple):
+    """
+    One vocabulary compiled for Agents 1 and 2. The pipeline swaps it as a
+    whole, so a document never mixes Agent 1's new terms with Agent 2's old
+    explanations.
+    """
+    vocabulary: Vocabulary
+    lexicon: Lexicon                # Agent 1's matchers
+    tables: ExplanationTables       # Agent 2's explanations
 
 
 class BoomerHealthPipeline:
     """
     Main pipeline that orchestrates all three agents to transform
     medical documents into patient-friendly health summaries
+    
+    One instance can be shared by many threads: the agents keep no
+    per-document state, vocabulary reloads swap one read-only snapshot
+    that each document reads once, and the history is only touched under
+    a lock.
     """
     
-    def __init__(self):
-        """Initialize all three agents"""
+    # Summaries kept for feedback; the oldest are dropped beyond this
+    MAX_HISTORY = 1000
+    
+    # Threads that finish summaries in the background for triage_and_summarize()
+    BACKGROUND_WORKERS = 2
+
+    # Which parts of the summary depend on each Agent 1 field.
+    # Used by update_summary() so a guided-form edit only re-runs what changed.
+    FIELD_DEPENDENCIES = {
+        'diagnoses': ('diagnoses_explained', 'lifestyle_tips', 'questions'),
+        'medications': ('medications_explained', 'medication_reminders', 'questions'),
+        'test_results': ('test_results_explained',),
+        'flagged_terms': ('abbreviations_explained',),
+    }
+
+    # How Agent 1 fields are named when a deadline made Stage 1 skip them
+    FIELD_LABELS = {
+        'medications': 'medications',
+        'diagnoses': 'diagnoses',
+        'test_results': 'test results',
+        'followups': 'follow-up appointments',
+        'instructions': 'instructions',
+        'symptoms': 'symptoms',
+        'flagged_terms': 'medical abbreviations',
+    }
+
+    # Why a summary is incomplete when a deadline made a stage fall back, and
+    # which FIELD_DEPENDENCIES outputs that fallback left simplified
+    STAGE_FALLBACKS = {
+        'explain': ("Detailed explanations were skipped to finish in time.",
+                    ('diagnoses_explained', 'medications_explained', 'test_results_explained',
+                     'abbreviations_explained')),
+        'plan': ("Diet, exercise and daily habit tips were skipped to finish in time.", ('lifestyle_tips',)),
+    }
+
+    def __init__(self,
+                 vocabulary: Optional[Vocabulary] = None,
+                 patient_store: Optional[PatientStore] = None,
+                 budget_seconds: Optional[float] = None,
+                 input_limits: Optional[InputLimits] = None):
+        """
+        Initialize all three agents
+        
+        Args:
+            vocabulary: Extra terms and explanations loaded from data files (see vocabulary.py)
+            patient_store: Visit history used by process_visit (see patient_store.py)
+            budget_seconds: Time allowed per document; when it runs out the
+                            remaining stages are simplified and the summary is
+                            marked incomplete (None = no limit)
+            input_limits: Size caps for document text (see deadlines.py);
+                          None = DEFAULT_LIMITS with a budget, no caps without one
+        """
         print("🚀 Initializing Boomer Health Summary System...")
         
-        self.agent1 = MedicalExtractor()
+        self.agent1 = MedicalExtractor(vocabulary)
         print("   ✅ Agent 1 (Medical Extractor) ready")
         
-        self.agent2 = HealthExplainer()
+        self.agent2 = HealthExplainer(vocabulary)
         print("   ✅ Agent 2 (Health Explainer) ready")
         
         self.agent3 = LifestyleCoach()
@@ -37,25 +119,178 @@ class BoomerHealthPipeline:
         
         print("✨ System ready to process medical documents!\n")
         
-        # Track processing history for feedback loop (RL component)
-        self.processing_history = []
+        self.vocabulary_snapshot = VocabularySnapshot(vocabulary or EMPTY_VOCABULARY,
+                                                      self.agent1.lexicon, self.agent2.tables)
+        
+        self.patient_store = patient_store
+        self.trend_engine = TrendEngine()
+        self.budget_seconds = budget_seconds
+        self.input_limits = input_limits or (DEFAULT_LIMITS if budget_seconds else None)
+        
+        # Track processing history for feedback loop (RL component), keyed by summary id
+        self.processing_history = {}
+        self._history_lock = threading.Lock()
+        
+        # Identical documents submitted at the same time are processed once
+        self.inflight = SingleFlight()
+        self._async_inflight = weakref.WeakKeyDictionary()     # event loop -> AsyncSingleFlight
+        self._async_inflight_lock = threading.Lock()
+        
+        # Threads start on first use, so pipelines that never call triage_and_summarize() have none
+        self.background = ThreadPoolExecutor(max_workers=self.BACKGROUND_WORKERS, thread_name_prefix='summary')
+    
+    def use_vocabulary(self, vocabulary: Vocabulary):
+        """
+        Switch Agents 1 and 2 to a newly loaded vocabulary (hot reload)
+        
+        Documents already being processed finish with the vocabulary they
+        started with; nothing is paused. Both agents' tables are built first
+        and published in one assignment of vocabulary_snapshot.
+        """
+        snapshot = VocabularySnapshot(vocabulary, self.agent1.build_lexicon(vocabulary),
+                                      self.agent2.build_tables(vocabulary))
+        self.vocabulary_snapshot = snapshot
+        # For callers that use an agent on its own
+        self.agent1.use_vocabulary(vocabulary, snapshot.lexicon)
+        self.agent2.use_vocabulary(vocabulary, snapshot.tables)
+    
+    def new_deadline(self) -> Optional[Deadline]:
+        """Deadline for a request starting now (None when there is no budget)"""
+        return Deadline(self.budget_seconds) if self.budget_seconds else None
+    
+    def close(self):
+        """Wait for background summaries to finish and stop their threads"""
+        self.background.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def process_document(self, 
                         document_text: str, 
                         input_method: str = "free_text",
-                        patient_name: Optional[str] = None) -> Dict:
+                        patient_name: Optional[str] = None) -> HealthSummary:
         """
         Main pipeline: Process a medical document through all three agents
         
         Args:
             document_text: Raw text from discharge paper, prescription, or user input
-            input_method: "photo_ocr", "free_text", or "guided_form"
+            input_method: "photo_ocr", "pdf", "free_text", or "guided_form"
             patient_name: Optional patient name for personalization
             
         Returns:
-            Complete health summary with all agent outputs
+            Complete health summary with all agent outputs. Concurrent calls
+            with the same document, input method and patient share one run
+            and receive the same summary object. If the document was cut to
+            the input limits or the time budget ran out, metadata['incomplete']
+            is True and metadata['incomplete_reasons'] says what was left out.
+            If the triage scan found emergency signs, metadata['emergency'] is
+            an EmergencyAlert and the summary opens with a "Call 911" banner.
+            
+        Raises:
+            InputTooLarge: the document exceeds the input limits and their policy is REJECT
+        """
+        key = document_key(document_text, input_method, patient_name)
+        return self.inflight.do(key, lambda: self._process_document(document_text, input_method, patient_name))
+    
+    async def process_document_async(self,
+                                     document_text: str,
+                                     input_method: str = "free_text",
+                                     patient_name: Optional[str] = None) -> HealthSummary:
+        """
+        asyncio version of process_document: the work runs in the loop's
+        default executor, and identical documents awaited at the same time
+        on the same event loop are processed once (each loop has its own
+        AsyncSingleFlight; a waiting caller holds no executor thread)
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_inflight_lock:
+            flight = self._async_inflight.get(loop)
+            if flight is None:
+                flight = self._async_inflight[loop] = AsyncSingleFlight()
+        key = document_key(document_text, input_method, patient_name)
+        return await flight.do(key, lambda: loop.run_in_executor(
+            None, self._process_document, document_text, input_method, patient_name))
+    
+    def triage_and_summarize(self,
+                             document_text: str,
+                             input_method: str = "free_text",
+                             patient_name: Optional[str] = None,
+                             on_emergency: Optional[Callable[[EmergencyAlert], None]] = None
+                             ) -> Tuple[Optional[EmergencyAlert], Future]:
+        """
+        Emergency fast path: scan for emergency signs now, summarize later
+        
+        The triage scan takes microseconds, so a "Call 911" banner can be
+        shown before Agent 1 even starts; the full summary is made on a
+        background thread from the same capped text and alert, without
+        scanning or announcing again (asyncio callers can await
+        process_document_async after calling triage() themselves).
+        
+        Args:
+            document_text: Raw text from discharge paper, prescription, or user input
+            input_method: "photo_ocr", "pdf", "free_text", or "guided_form"
+            patient_name: Optional patient name for personalization
+            on_emergency: Called with the alert as soon as the scan finds one,
+                          before the background summary starts competing for
+                          the interpreter
+            
+        Returns:
+            (EmergencyAlert or None, Future resolving to the process_document summary)
+            
+        Raises:
+            InputTooLarge: the document exceeds the input limits and their policy is REJECT
+        """
+        text, notes = apply_input_limits(document_text, self.input_limits)
+        emergency = triage(text)
+        if emergency and on_emergency:
+            on_emergency(emergency)
+        key = document_key(document_text, input_method, patient_name)
+        summary = self.background.submit(self.inflight.do, key, lambda: self._process_document(
+            text, input_method, patient_name, screened=(notes, emergency)))
+        return emergency, summary
+    
+    def _triage(self, document_text: str) -> Optional[EmergencyAlert]:
+        """Run the triage scan before Agent 1 and announce anything it finds"""
+        emergency = triage(document_text)
+        if emergency:
+            print(emergency_banner(emergency), end='')
+        return emergency
+    
+    def _process_document(self,
+                          document_text: str,
+                          input_method: str,
+                          patient_name: Optional[str],
+                          screened: Optional[Tuple[List[str], Optional[EmergencyAlert]]] = None) -> HealthSummary:
+        """
+        Run one document through all three agents (no coalescing)
+        
+        screened is (input limit notes, triage alert) when the caller has
+        already capped document_text and scanned it (triage_and_summarize)
         """
         
+        deadline = self.new_deadline()
+        # One vocabulary for the whole document, even if use_vocabulary() swaps it meanwhile
+        snapshot = self.vocabulary_snapshot
+        if screened is None:
+            document_text, notes = apply_input_limits(document_text, self.input_limits)
+            emergency = self._triage(document_text)
+        else:
+            notes, emergency = screened
+        extracted_data = self._extract_document(document_text, input_method, patient_name, deadline,
+                                                snapshot.lexicon)
+        return self.summarize_extraction(extracted_data, patient_name, deadline, notes, emergency,
+                                         snapshot.tables)
+    
+    def _extract_document(self,
+                          document_text: str,
+                          input_method: str,
+                          patient_name: Optional[str],
+                          deadline: Optional[Deadline] = None,
+                          lexicon: Optional[Lexicon] = None) -> Dict:
+        """Stage 1 for a text document"""
         print("="*70)
         print(f"📄 PROCESSING MEDICAL DOCUMENT")
         print(f"   Input Method: {input_method}")
@@ -66,22 +301,311 @@ class BoomerHealthPipeline:
         
         # STAGE 1: Extract medical information
         print("🔍 STAGE 1: Extracting medical information...")
-        extracted_data = self.agent1.extract_all(document_text, input_method)
+        extracted_data = self.agent1.extract_all(document_text, input_method, deadline, lexicon)
+        print(f"   ✅ Found {len(extracted_data['diagnoses'])} diagnoses")
+        print(f"   ✅ Found {len(extracted_data['medications'])} medications")
+        print(f"   ✅ Extraction quality: {extracted_data['extraction_quality'].upper()}")
+        print()
+        
+        return extracted_data
+    
+    def process_visit(self,
+                      document_text: str,
+                      patient_id: str,
+                      visit_date: VisitDate = None,
+                      input_method: str = "free_text",
+                      patient_name: Optional[str] = None) -> HealthSummary:
+        """
+        Process one visit's document and record it in the patient's history
+        
+        The summary's metadata gains 'changes_since_last_visit' (a
+        VisitDelta: new and stopped medications, dose changes, new
+        diagnoses, changed test results) and 'trend_alerts' (TrendAlerts
+        from the patient's stored BP, A1C and weight readings, including
+        any queued by an earlier batch run), both shown at the top of the
+        summary.
+        
+        Args:
+            document_text: Raw text of the visit's document
+            patient_id: Stable patient identifier for the patient store
+            visit_date: Date of the visit (default: today)
+            input_method: "photo_ocr", "pdf", "free_text", or "guided_form"
+            patient_name: Optional patient name for personalization
+            
+        Raises:
+            ValueError: no patient_store was given, or the date is invalid
+            InputTooLarge: the document exceeds the input limits and their policy is REJECT
+        """
+        if self.patient_store is None:
+            raise ValueError("process_visit needs a BoomerHealthPipeline(patient_store=...)")
+        
+        deadline = self.new_deadline()
+        snapshot = self.vocabulary_snapshot
+        key = document_key(document_text, input_method)
+        document_text, notes = apply_input_limits(document_text, self.input_limits)
+        emergency = self._triage(document_text)
+        extracted_data = self._extract_document(document_text, input_method, patient_name, deadline,
+                                                snapshot.lexicon)
+        delta = self.patient_store.record_visit(patient_id, extracted_data, visit_date, key)
+        print(f"🗂️  Visit {delta.visit_date} recorded for {patient_id}"
+              + (f" (last visit: {delta.previous_visit_date})" if delta.previous_visit_date else " (first visit)"))
+        print()
+        
+        self.trend_engine.evaluate_store(self.patient_store, [patient_id])
+        alerts = self.patient_store.take_alerts(patient_id)
+        if alerts:
+            print(f"🔔 {len(alerts)} trend alert(s) for this summary")
+            print()
+        
+        summary = self.summarize_extraction(extracted_data, patient_name, deadline, notes, emergency,
+                                            snapshot.tables)
+        summary.metadata['changes_since_last_visit'] = delta
+        summary.metadata['trend_alerts'] = alerts
+        return summary
+    
+    def process_structured(self,
+                           diagnoses: Optional[List[str]] = None,
+                           medications: Optional[List[Dict[str, str]]] = None,
+                           instructions: Optional[List[str]] = None,
+                           followups: Optional[List[str]] = None,
+                           test_results: Optional[List[Dict[str, str]]] = None,
+                           patient_name: Optional[str] = None) -> HealthSummary:
+        """
+        Guided-form pipeline: structured fields go straight to Agent 2
+        without being flattened to text and re-scanned by Agent 1's regexes
+        (only the triage scan reads the diagnoses and readings as text)
+        
+        Args:
+            diagnoses: Diagnosis names from the form
+            medications: Dicts with 'name' and 'dosage' keys
+            instructions: Instruction lines from the form
+            followups: Follow-up lines from the form
+            test_results: Dicts with 'test' and 'value' keys
+            patient_name: Optional patient name for personalization
+            
+        Returns:
+            Complete health summary with all agent outputs
+        """
+        
+        deadline = self.new_deadline()
+        snapshot = self.vocabulary_snapshot
+        
+        print("="*70)
+        print(f"📄 PROCESSING GUIDED FORM")
+        print(f"   Patient: {patient_name or 'Anonymous'}")
+        print(f"   Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("="*70)
+        print()
+        
+        # STAGE 1: Validate form fields against the lexicons
+        print("🔍 STAGE 1: Validating form fields...")
+        extracted_data = self.agent1.extract_structured(
+            diagnoses=diagnoses,
+            medications=medications,
+            instructions=instructions,
+            followups=followups,
+            test_results=test_results,
+            lexicon=snapshot.lexicon
+        )
+        print(f"   ✅ Accepted {len(extracted_data['diagnoses'])} diagnoses")
+        print(f"   ✅ Accepted {len(extracted_data['medications'])} medications")
+        if extracted_data['unrecognized_terms']:
+            print(f"   ⚠️  Not in our lexicon: {', '.join(extracted_data['unrecognized_terms'])}")
+        print()
+        
+        # The form's readings and diagnoses get the same emergency scan as a typed document
+        emergency = self._triage(form_text(extracted_data['diagnoses'], extracted_data['test_results']))
+        
+        return self.summarize_extraction(extracted_data, patient_name, deadline, emergency=emergency,
+                                         tables=snapshot.tables)
+    
+    def process_images(self,
+                       images: List,
+                       patient_name: Optional[str] = None,
+                       ocr: Optional[OCRIngestor] = None) -> HealthSummary:
+        """
+        Photo-upload pipeline: OCR each page image, then run the agents
+        
+        Agent 1 reads each page as soon as its OCR finishes, while the
+        worker processes keep reading the remaining pages.
+        
+        Args:
+            images: Page images (file paths, bytes or open files), in page order
+            patient_name: Optional patient name for personalization
+            ocr: OCRIngestor to reuse (keeps its worker pool and cache warm);
+                 a temporary one is used if None
+            
+        Returns:
+            Complete health summary with all agent outputs
+            
+        Raises:
+            OCRError: a page could not be read, or no text was found
+        """
+        
+        deadline = self.new_deadline()
+        snapshot = self.vocabulary_snapshot
+        
+        print("="*70)
+        print(f"📄 PROCESSING PHOTO UPLOAD ({len(images)} page(s))")
+        print(f"   Patient: {patient_name or 'Anonymous'}")
+        print(f"   Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("="*70)
+        print()
+        
+        # STAGE 1: OCR pages in parallel, extracting each page as it arrives
+        print("🔍 STAGE 1: Reading photos and extracting medical information...")
+        reader = ocr or OCRIngestor()
+        try:
+            extracted_data, notes, emergency = self.extract_pages(reader.iter_pages(images), "photo_ocr", deadline,
+                                                                  snapshot.lexicon)
+        finally:
+            if ocr is None:
+                reader.close()
+        
+        if extracted_data is None:
+            raise OCRError("No text found in the photos - please retake them or type the information in")
+        
+        print(f"   ✅ Found {len(extracted_data['diagnoses'])} diagnoses")
+        print(f"   ✅ Found {len(extracted_data['medications'])} medications")
+        print(f"   ✅ Extraction quality: {extracted_data['extraction_quality'].upper()}")
+        print()
+        
+        return self.summarize_extraction(extracted_data, patient_name, deadline, notes, emergency,
+                                         snapshot.tables)
+    
+    def process_pdf(self,
+                    pdf: Union[str, bytes],
+                    patient_name: Optional[str] = None,
+                    pdf_reader: Optional[PDFIngestor] = None) -> HealthSummary:
+        """
+        PDF pipeline: read each page's text layer (OCR for scanned pages),
+        then run the agents
+        
+        Args:
+            pdf: Path to the PDF, or its bytes
+            patient_name: Optional patient name for personalization
+            pdf_reader: PDFIngestor to reuse (keeps its worker pool warm);
+                        a temporary one is used if None
+            
+        Returns:
+            Complete health summary with all agent outputs
+            
+        Raises:
+            PDFError: the PDF could not be read, or no text was found
+        """
+        
+        deadline = self.new_deadline()
+        snapshot = self.vocabulary_snapshot
+        
+        print("="*70)
+        print(f"📄 PROCESSING PDF")
+        print(f"   Patient: {patient_name or 'Anonymous'}")
+        print(f"   Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("="*70)
+        print()
+        
+        # STAGE 1: Decode pages in parallel, extracting each page as it arrives
+        print("🔍 STAGE 1: Reading PDF pages and extracting medical information...")
+        reader = pdf_reader or PDFIngestor()
+        try:
+            pages = ((index, text) for index, text, _ in reader.iter_pages(pdf))
+            extracted_data, notes, emergency = self.extract_pages(pages, "pdf", deadline, snapshot.lexicon)
+        finally:
+            if pdf_reader is None:
+                reader.close()
+        
+        if extracted_data is None:
+            raise PDFError("No text found in the PDF - please type the information in instead")
+        
         print(f"   ✅ Found {len(extracted_data['diagnoses'])} diagnoses")
         print(f"   ✅ Found {len(extracted_data['medications'])} medications")
         print(f"   ✅ Extraction quality: {extracted_data['extraction_quality'].upper()}")
         print()
         
+        return self.summarize_extraction(extracted_data, patient_name, deadline, notes, emergency,
+                                         snapshot.tables)
+    
+    def extract_pages(self,
+                      pages: Iterable[Tuple[int, str]],
+                      input_method: str,
+                      deadline: Optional[Deadline] = None,
+                      lexicon: Optional[Lexicon] = None
+                      ) -> Tuple[Optional[Dict], List[str], Optional[EmergencyAlert]]:
+        """
+        Run the triage scan and Agent 1 on each page as it arrives and merge the results
+        
+        Args:
+            pages: (page_index, text) pairs in any order
+            input_method: "photo_ocr" or "pdf"
+            deadline: Request deadline shared by every page
+            lexicon: Agent 1's lexicon for every page (defaults to its current one)
+            
+        Returns:
+            (merged extraction in page order or None if no page had text,
+             notes about pages cut to the input limits,
+             EmergencyAlert from the first page that had emergency signs, or None)
+        """
+        extractions = {}
+        notes = []
+        emergency = None
+        for index, text in pages:
+            if text.strip():
+                text, page_notes = apply_input_limits(text, self.input_limits)
+                notes.extend(f"Page {index + 1}: {note}" for note in page_notes)
+                emergency = emergency or self._triage(text)
+                extractions[index] = self.agent1.extract_all(text, input_method, deadline, lexicon)
+            print(f"   ✅ Page {index + 1} read ({len(text.strip())} characters)")
+        
+        if not extractions:
+            return None, notes, emergency
+        merged = self.agent1.merge_extractions([extractions[index] for index in sorted(extractions)], input_method)
+        return merged, notes, emergency
+    
+    def summarize_extraction(self,
+                             extracted_data: Dict,
+                             patient_name: Optional[str] = None,
+                             deadline: Optional[Deadline] = None,
+                             notes: Iterable[str] = (),
+                             emergency: Optional[EmergencyAlert] = None,
+                             tables: Optional[ExplanationTables] = None) -> HealthSummary:
+        """
+        Run Agents 2 and 3 on Agent 1's output and assemble the final summary
+        (stages 2-4, shared by every input method)
+        
+        A stage whose deadline has already passed gets its quick fallback
+        (generic explanations, a basic action plan) and the summary is
+        marked incomplete; notes are earlier reasons (e.g. truncation).
+        emergency is the triage scan's alert, if it found one. tables are
+        Agent 2's explanations from the snapshot Agent 1 used (default: the
+        current snapshot).
+        """
+        
+        # Agents 2-4 share one read-only view of the extraction instead of
+        # passing nested copies along (the raw text is not kept alive)
+        context = ExtractionContext.from_extraction(extracted_data)
+        tables = tables or self.vocabulary_snapshot.tables
+        simplified = []
+        
         # STAGE 2: Explain in plain language
-        print("💡 STAGE 2: Translating medical terms to plain language...")
-        explained_data = self.agent2.explain_all(extracted_data)
+        if expired(deadline, 'explain'):
+            print("⏳ STAGE 2: Time budget used up - listing terms without detailed explanations")
+            explained_data = self.agent2.explain_generic(context)
+            simplified.extend(self.STAGE_FALLBACKS['explain'][1])
+        else:
+            print("💡 STAGE 2: Translating medical terms to plain language...")
+            explained_data = self.agent2.explain_all(context, tables)
         print(f"   ✅ Explained {len(explained_data['diagnoses_explained'])} diagnoses")
         print(f"   ✅ Explained {len(explained_data['medications_explained'])} medications")
         print()
         
         # STAGE 3: Generate action plan
-        print("📋 STAGE 3: Creating personalized action plan...")
-        action_plan = self.agent3.generate_action_plan(explained_data)
+        if expired(deadline, 'plan'):
+            print("⏳ STAGE 3: Time budget used up - basic action plan only")
+            action_plan = self.agent3.generate_basic_plan(context)
+            simplified.extend(self.STAGE_FALLBACKS['plan'][1])
+        else:
+            print("📋 STAGE 3: Creating personalized action plan...")
+            action_plan = self.agent3.generate_action_plan(explained_data, context)
         print(f"   ✅ Generated {len(action_plan['diet_recommendations'])} diet tips")
         print(f"   ✅ Generated {len(action_plan['exercise_recommendations'])} exercise tips")
         print(f"   ✅ Generated {len(action_plan['questions_for_doctor'])} questions for doctor")
@@ -90,53 +614,65 @@ class BoomerHealthPipeline:
         # STAGE 4: Assemble final summary
         print("📦 STAGE 4: Assembling final health summary...")
         final_summary = self.assemble_final_summary(
-            extracted_data,
+            context,
             explained_data,
             action_plan,
-            patient_name
+            patient_name,
+            notes,
+            emergency,
+            skipped_fields=extracted_data.get('skipped_fields') or (),
+            simplified_sections=simplified
         )
+        if final_summary['metadata']['incomplete']:
+            print(f"   ⚠️  Summary is incomplete ({len(final_summary['metadata']['incomplete_reasons'])} reason(s))")
         print("   ✅ Health summary complete!")
         print()
         
-        # Store in history for RL feedback
-        self.processing_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'input_method': input_method,
-            'extraction_quality': extracted_data['extraction_quality'],
-            'summary': final_summary
-        })
-        
+        self._record_summary(final_summary)
         return final_summary
     
     def assemble_final_summary(self,
-                              extracted_data: Dict,
+                              context: ExtractionContext,
                               explained_data: Dict,
-                              action_plan: Dict,
-                              patient_name: Optional[str] = None) -> Dict:
+                              action_plan: ActionPlan,
+                              patient_name: Optional[str] = None,
+                              notes: Iterable[str] = (),
+                              emergency: Optional[EmergencyAlert] = None,
+                              skipped_fields: Iterable[str] = (),
+                              simplified_sections: Iterable[str] = ()) -> HealthSummary:
         """
         Assemble all agent outputs into one comprehensive summary
+        
+        notes (e.g. truncation), skipped_fields (Agent 1 fields a deadline
+        cut) and simplified_sections (outputs a stage fallback produced) are
+        kept in the metadata, so update_summary can tell which reasons for
+        an incomplete summary still hold after an edit.
         """
+        notes = list(notes)
+        skipped_fields = list(skipped_fields)
+        simplified_sections = list(simplified_sections)
+        incomplete_reasons = self.incomplete_reasons(notes, skipped_fields, simplified_sections)
         
-        summary = {
-            'patient_name': patient_name or "Patient",
-            'generated_date': datetime.now().strftime('%B %d, %Y'),
-            'generated_time': datetime.now().strftime('%I:%M %p'),
+        summary = HealthSummary(
+            patient_name=patient_name or "Patient",
+            generated_date=datetime.now().strftime('%B %d, %Y'),
+            generated_time=datetime.now().strftime('%I:%M %p'),
             
             # Section 1: What the Doctor Found
-            'section_1_diagnoses': {
+            section_1_diagnoses={
                 'title': 'What Your Doctor Found',
                 'diagnoses': explained_data['diagnoses_explained'],
                 'test_results': explained_data['test_results_explained']
             },
             
             # Section 2: Your Medications
-            'section_2_medications': {
+            section_2_medications={
                 'title': 'Your Medications Explained',
                 'medications': explained_data['medications_explained']
             },
             
             # Section 3: What You Should Do
-            'section_3_action_plan': {
+            section_3_action_plan={
                 'title': 'Your Action Plan',
                 'diet': action_plan['diet_recommendations'],
                 'exercise': action_plan['exercise_recommendations'],
@@ -145,203 +681,282 @@ class BoomerHealthPipeline:
             },
             
             # Section 4: When to Get Help
-            'section_4_warning_signs': {
+            section_4_warning_signs={
                 'title': 'Warning Signs - When to Get Help',
                 'warning_signs': action_plan['warning_signs']
             },
             
             # Section 5: Questions for Your Doctor
-            'section_5_questions': {
+            section_5_questions={
                 'title': 'Questions to Ask Your Doctor',
                 'questions': action_plan['questions_for_doctor']
             },
             
             # Section 6: Medical Terms Glossary
-            'section_6_glossary': {
+            section_6_glossary={
                 'title': 'Medical Terms Explained',
                 'abbreviations': explained_data['abbreviations_explained']
             },
             
             # Metadata
-            'metadata': {
-                'input_method': extracted_data['input_method'],
-                'extraction_quality': extracted_data['extraction_quality'],
+            metadata={
+                'summary_id': uuid.uuid4().hex,
+                'input_method': context.input_method,
+                'extraction_quality': context.extraction_quality,
+                'unrecognized_terms': list(context.unrecognized_terms),
+                'incomplete': bool(incomplete_reasons),
+                'incomplete_reasons': incomplete_reasons,
+                'input_notes': notes,
+                'skipped_fields': skipped_fields,
+                'simplified_sections': simplified_sections,
+                'emergency': emergency,
                 'agent_versions': 'v1.0'
             },
             
-            'disclaimer': explained_data['disclaimer']
-        }
+            disclaimer=explained_data['disclaimer']
+        )
         
         return summary
-    
+
+    def incomplete_reasons(self, notes: Iterable[str], skipped_fields: Iterable[str],
+                           simplified_sections: Iterable[str]) -> List[str]:
+        """What a summary leaves out, in words for the patient (empty if it is complete)"""
+        reasons = list(notes)
+        skipped_fields = list(skipped_fields)
+        if skipped_fields:
+            reasons.append("These were not looked for in time: "
+                           + ", ".join(self.FIELD_LABELS.get(field, field) for field in skipped_fields) + ".")
+        simplified = set(simplified_sections)
+        for reason, sections in self.STAGE_FALLBACKS.values():
+            if simplified.intersection(sections):
+                reasons.append(reason)
+        return reasons
+
+    def summary_fields(self, summary: Dict) -> Dict:
+        """
+        Recover the Agent 1 fields a summary was built from
+        (diagnoses, medications, test results and flagged terms)
+        """
+        section1 = summary['section_1_diagnoses']
+
+        return {
+            'diagnoses': [dx['diagnosis'] for dx in section1['diagnoses']],
+            'medications': [
+                Medication(med['medication'], med['dosage'])
+                for med in summary['section_2_medications']['medications']
+            ],
+            'test_results': [
+                TestResult(test['test'], test['your_value'])
+                for test in section1['test_results']
+            ],
+            'flagged_terms': [
+                abbrev['abbreviation']
+                for abbrev in summary['section_6_glossary']['abbreviations']
+            ]
+        }
+
+    def update_summary(self, previous_summary: Dict, delta: Dict) -> Union[HealthSummary, Dict]:
+        """
+        Incrementally update a summary after a guided-form field changes
+
+        Args:
+            previous_summary: Summary from process_document (or an earlier update)
+            delta: Changed fields and their new full values, e.g.
+                   {'medications': [{'name': 'Lisinopril', 'dosage': '10mg'}]}
+
+        Returns:
+            New summary with its own summary_id (recorded in the history, so
+            feedback on it does not land on previous_summary). Sections the
+            delta does not affect are shared with previous_summary instead of
+            being regenerated; the metadata that depends on the changed
+            fields (unrecognized terms, incomplete reasons) is recomputed.
+        """
+        unknown = set(delta) - set(self.FIELD_DEPENDENCIES)
+        if unknown:
+            raise ValueError(f"Cannot update field(s): {', '.join(sorted(unknown))}")
+
+        fields = self.summary_fields(previous_summary)
+        fields.update(delta)
+
+        stale = set()
+        for field in delta:
+            stale.update(self.FIELD_DEPENDENCIES[field])
+
+        diagnoses = fields['diagnoses']
+        medications = fields['medications']
+        snapshot = self.vocabulary_snapshot
+
+        # Only changed sections are rebuilt - the rest keep pointing at the old objects
+        changes = {}
+        changes['generated_date'] = datetime.now().strftime('%B %d, %Y')
+        changes['generated_time'] = datetime.now().strftime('%I:%M %p')
+
+        # Section 1: diagnoses and test results
+        if stale & {'diagnoses_explained', 'test_results_explained'}:
+            section1 = dict(previous_summary['section_1_diagnoses'])
+            if 'diagnoses_explained' in stale:
+                section1['diagnoses'] = self.agent2.explain_diagnoses(diagnoses, snapshot.tables)
+            if 'test_results_explained' in stale:
+                section1['test_results'] = self.agent2.explain_test_results(fields['test_results'])
+            changes['section_1_diagnoses'] = section1
+
+        # Section 2: medications
+        if 'medications_explained' in stale:
+            section2 = dict(previous_summary['section_2_medications'])
+            section2['medications'] = self.agent2.explain_medications(medications, snapshot.tables)
+            changes['section_2_medications'] = section2
+
+        # Section 3: action plan
+        if stale & {'lifestyle_tips', 'medication_reminders'}:
+            section3 = dict(previous_summary['section_3_action_plan'])
+            if 'lifestyle_tips' in stale:
+                section3['diet'] = self.agent3.compile_diet_tips(diagnoses)
+                section3['exercise'] = self.agent3.compile_exercise_tips(diagnoses)
+                section3['daily_habits'] = self.agent3.compile_daily_habits(diagnoses)
+            if 'medication_reminders' in stale:
+                section3['medication_reminders'] = self.agent3.generate_medication_reminders(medications)
+            changes['section_3_action_plan'] = section3
+
+        # Section 4: warning signs
+        if 'lifestyle_tips' in stale:
+            section4 = dict(previous_summary['section_4_warning_signs'])
+            section4['warning_signs'] = self.agent3.compile_warning_signs(diagnoses)
+            changes['section_4_warning_signs'] = section4
+
+        # Section 5: questions for the doctor
+        if 'questions' in stale:
+            section5 = dict(previous_summary['section_5_questions'])
+            section5['questions'] = self.agent3.generate_doctor_questions(diagnoses, medications)
+            changes['section_5_questions'] = section5
+
+        # Section 6: glossary
+        if 'abbreviations_explained' in stale:
+            section6 = dict(previous_summary['section_6_glossary'])
+            section6['abbreviations'] = self.agent2.explain_abbreviations(fields['flagged_terms'], snapshot.tables)
+            changes['section_6_glossary'] = section6
+
+        # Metadata: a new id, and reasons for being incomplete that the edit resolved are dropped
+        metadata = dict(previous_summary['metadata'])
+        skipped_fields = [field for field in metadata.get('skipped_fields', ()) if field not in delta]
+        simplified = [section for section in metadata.get('simplified_sections', ()) if section not in stale]
+        incomplete_reasons = self.incomplete_reasons(metadata.get('input_notes', ()), skipped_fields, simplified)
+        if {'diagnoses', 'medications'} & set(delta):
+            metadata['unrecognized_terms'] = self.agent1.unrecognized_terms(
+                diagnoses, [Medication.coerce(med) for med in medications], snapshot.lexicon)
+        metadata.update(
+            summary_id=uuid.uuid4().hex,
+            updated_from=previous_summary['metadata'].get('summary_id'),
+            incomplete=bool(incomplete_reasons),
+            incomplete_reasons=incomplete_reasons,
+            skipped_fields=skipped_fields,
+            simplified_sections=simplified,
+        )
+        changes['metadata'] = metadata
+
+        if isinstance(previous_summary, HealthSummary):
+            summary = previous_summary.replace(**changes)
+        else:
+            summary = dict(previous_summary, **changes)
+        self._record_summary(summary)
+        return summary
+
     def format_summary_for_display(self, summary: Dict) -> str:
         """
         Format the complete summary for human-readable display
         (This is what gets shown to the patient)
         """
-        
-        output = []
-        
-        # Header
-        output.append("╔" + "═"*68 + "╗")
-        output.append("║" + " "*68 + "║")
-        output.append("║" + "        🏥 YOUR HEALTH SUMMARY - EASY TO UNDERSTAND        ".center(68) + "║")
-        output.append("║" + " "*68 + "║")
-        output.append("╚" + "═"*68 + "╝")
-        output.append("")
-        
-        output.append(f"Patient: {summary['patient_name']}")
-        output.append(f"Date: {summary['generated_date']} at {summary['generated_time']}")
-        output.append("")
-        output.append("─"*70)
-        
-        # SECTION 1: Diagnoses
-        section1 = summary['section_1_diagnoses']
-        output.append("")
-        output.append(f"📋 {section1['title'].upper()}")
-        output.append("─"*70)
-        
-        for dx in section1['diagnoses']:
-            output.append(f"\n✓ {dx['diagnosis']} (also called: {dx['simple_name']})")
-            output.append(f"  {dx['explanation']}")
-            if dx['analogy']:
-                output.append(f"  💡 Think of it like: {dx['analogy']}")
-        
-        if section1['test_results']:
-            output.append("\n📊 YOUR TEST RESULTS:")
-            for test in section1['test_results']:
-                output.append(f"  • {test['test']}: {test['your_value']}")
-                output.append(f"    {test['what_it_means']}")
-                output.append(f"    (Normal range: {test['normal_range']})")
-        
-        # SECTION 2: Medications
-        section2 = summary['section_2_medications']
-        output.append("\n")
-        output.append("─"*70)
-        output.append(f"💊 {section2['title'].upper()}")
-        output.append("─"*70)
-        
-        for med in section2['medications']:
-            output.append(f"\n✓ {med['medication']} ({med['dosage']})")
-            output.append(f"  What it does: {med['what_it_does']}")
-            output.append(f"  ⚠️  {med['reminder']}")
-        
-        # SECTION 3: Action Plan
-        section3 = summary['section_3_action_plan']
-        output.append("\n")
-        output.append("─"*70)
-        output.append(f"📝 {section3['title'].upper()}")
-        output.append("─"*70)
-        
-        if section3['diet']:
-            output.append("\n🥗 DIET & NUTRITION:")
-            for i, tip in enumerate(section3['diet'], 1):
-                output.append(f"  {i}. {tip}")
-        
-        if section3['exercise']:
-            output.append("\n🏃 EXERCISE & ACTIVITY:")
-            for i, tip in enumerate(section3['exercise'], 1):
-                output.append(f"  {i}. {tip}")
-        
-        if section3['daily_habits']:
-            output.append("\n📅 DAILY HABITS TO TRACK:")
-            for i, habit in enumerate(section3['daily_habits'], 1):
-                output.append(f"  {i}. {habit}")
-        
-        if section3['medication_reminders']:
-            output.append("\n💊 MEDICATION REMINDERS:")
-            for i, reminder in enumerate(section3['medication_reminders'], 1):
-                output.append(f"  {i}. {reminder}")
-        
-        # SECTION 4: Warning Signs
-        section4 = summary['section_4_warning_signs']
-        output.append("\n")
-        output.append("─"*70)
-        output.append(f"⚠️  {section4['title'].upper()}")
-        output.append("─"*70)
-        
-        for sign in section4['warning_signs']:
-            output.append(f"  • {sign}")
-        
-        # SECTION 5: Questions for Doctor
-        section5 = summary['section_5_questions']
-        output.append("\n")
-        output.append("─"*70)
-        output.append(f"❓ {section5['title'].upper()}")
-        output.append("─"*70)
-        
-        for i, question in enumerate(section5['questions'], 1):
-            output.append(f"  {i}. {question}")
-        
-        # SECTION 6: Glossary
-        if summary['section_6_glossary']['abbreviations']:
-            section6 = summary['section_6_glossary']
-            output.append("\n")
-            output.append("─"*70)
-            output.append(f"📖 {section6['title'].upper()}")
-            output.append("─"*70)
-            
-            for abbrev in section6['abbreviations']:
-                output.append(f"  • {abbrev['abbreviation']} = {abbrev['meaning']}")
-        
-        # Disclaimer
-        output.append("\n")
-        output.append("─"*70)
-        output.append(summary['disclaimer'])
-        output.append("─"*70)
-        
-        # Footer
-        output.append("\n")
-        output.append("Generated by Boomer Health Summary System")
-        output.append(f"Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb")
-        output.append("ITAI 2376 - AI Agents Final Project")
-        
-        return "\n".join(output)
+        return DEFAULT_RENDERER.to_string(DEFAULT_RENDERER.render_summary, summary)
     
-    def save_summary_to_file(self, summary: Dict, filename: str = None):
-        """Save summary to JSON file"""
-        if filename is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"health_summary_{timestamp}.json"
+    def write_summary(self, summary: Dict, stream: TextIO = sys.stdout):
+        """
+        Stream the patient-facing summary to a file, socket or other text stream
+        without building the whole document in memory
+        """
+        DEFAULT_RENDERER.render_summary(summary, stream)
+    
+    def save_summary_to_file(self, summary: Dict, filename: str = None, fmt: str = 'json'):
+        """
+        Save summary to file
         
-        with open(filename, 'w') as f:
-            json.dump(summary, f, indent=2)
+        Args:
+            summary: Final summary from process_document
+            filename: Optional path; defaults to a content-addressed name so
+                      two saves never overwrite each other
+            fmt: 'json' (pretty), 'compact', 'gzip' or 'binary'
+        """
+        filename = save_summary(summary, filename=filename, fmt=fmt)
         
         print(f"💾 Summary saved to: {filename}")
         return filename
     
-    def collect_feedback(self, summary_id: int, feedback: Dict):
+    def _record_summary(self, summary: Dict):
+        """Store a new summary in the history for RL feedback"""
+        metadata = summary['metadata']
+        self._record_history(metadata['summary_id'], {
+            'timestamp': datetime.now().isoformat(),
+            'input_method': metadata['input_method'],
+            'extraction_quality': metadata['extraction_quality'],
+            'summary': summary
+        })
+    
+    def _record_history(self, summary_id: str, entry: Dict):
+        """Add a history entry, dropping the oldest beyond MAX_HISTORY"""
+        with self._history_lock:
+            self.processing_history[summary_id] = entry
+            while len(self.processing_history) > self.MAX_HISTORY:
+                del self.processing_history[next(iter(self.processing_history))]
+    
+    def history(self) -> List[Dict]:
+        """Snapshot of the processing history, oldest first"""
+        with self._history_lock:
+            return list(self.processing_history.values())
+    
+    def clear_history(self):
+        """Forget all history entries (long-lived workers call this after each job)"""
+        with self._history_lock:
+            self.processing_history.clear()
+    
+    def collect_feedback(self, summary_id: str, feedback: Dict):
         """
         Collect user feedback for reinforcement learning
         
         Args:
-            summary_id: Index in processing_history
+            summary_id: The summary's metadata['summary_id']
             feedback: Dict with 'clarity', 'helpfulness', 'completeness' ratings
+        
+        Returns:
+            The reward, or None if the summary is not in the history
         """
-        if summary_id < len(self.processing_history):
-            self.processing_history[summary_id]['feedback'] = feedback
-            
-            # Simple reward calculation
-            reward = (
-                feedback.get('clarity', 0) * 0.4 +
-                feedback.get('helpfulness', 0) * 0.4 +
-                feedback.get('completeness', 0) * 0.2
-            )
-            
-            self.processing_history[summary_id]['reward'] = reward
-            
-            print(f"📊 Feedback recorded! Reward score: {reward:.2f}/5.0")
-            
-            # In a real system, this would update agent policies
-            # For this project, we just log it
-            return reward
-        else:
+        # Simple reward calculation
+        reward = (
+            feedback.get('clarity', 0) * 0.4 +
+            feedback.get('helpfulness', 0) * 0.4 +
+            feedback.get('completeness', 0) * 0.2
+        )
+        
+        with self._history_lock:
+            entry = self.processing_history.get(summary_id)
+            if entry is not None:
+                # Replace the entry rather than editing it, so history() snapshots never change
+                self.processing_history[summary_id] = dict(entry, feedback=feedback, reward=reward)
+        
+        if entry is None:
             print("❌ Invalid summary ID")
             return None
+        
+        print(f"📊 Feedback recorded! Reward score: {reward:.2f}/5.0")
+        
+        # In a real system, this would update agent policies
+        # For this project, we just log it
+        return reward
 
 
 # Example usage and testing
 if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+    
     # Create pipeline
     pipeline = BoomerHealthPipeline()
     
@@ -435,4 +1050,61 @@ if __name__ == "__main__":
         'helpfulness': 5,
         'completeness': 4
     }
-    pipeline.collect_feedback(0, feedback)
+    pipeline.collect_feedback(summary['metadata']['summary_id'], feedback)
+
+    # Guided form: structured fields skip Agent 1's free-text scan
+    print("\n" + "="*70)
+    print("DEMO: Processing a Guided Form")
+    print("="*70 + "\n")
+    form_summary = pipeline.process_structured(
+        diagnoses=['Hypertension', 'CHF'],
+        medications=[{'name': 'lisinopril', 'dosage': '10 mg'}],
+        instructions=['Check blood pressure every morning'],
+        followups=['See Dr. Brown in 2 weeks'],
+        test_results=[{'test': 'Blood Pressure', 'value': '150/95'}],
+        patient_name="Mary Johnson"
+    )
+    
+    # Guided-form edit: only the medication-dependent sections are rebuilt
+    print("\n" + "="*70)
+    print("GUIDED FORM: Adding a medication")
+    print("="*70)
+    medications = pipeline.summary_fields(summary)['medications']
+    medications.append(Medication('Atorvastatin', '40mg'))
+    updated = pipeline.update_summary(summary, {'medications': medications})
+    print(f"   ✅ Now explaining {len(updated['section_2_medications']['medications'])} medications")
+    print(f"   ✅ Lifestyle tips reused: {updated['section_3_action_plan']['diet'] is summary['section_3_action_plan']['diet']}")
+
+    # Deadlines: a 5 MB pasted portal export gets a marked partial summary instead of holding the worker
+    print("\n" + "="*70)
+    print("DEMO: Oversized Document with a 2-Second Budget")
+    print("="*70 + "\n")
+    portal_export = sample_document + "Portal export row reviewed, no change. " * 130_000
+    rushed = BoomerHealthPipeline(budget_seconds=2.0)
+    partial = rushed.process_document(portal_export, patient_name="Mary Johnson")
+    print(f"   ✅ Incomplete: {partial['metadata']['incomplete']}")
+    for reason in partial['metadata']['incomplete_reasons']:
+        print(f"      • {reason}")
+
+    # Triage: emergency signs get a "Call 911" banner before Agent 1 starts
+    print("\n" + "="*70)
+    print("DEMO: Emergency Triage Fast Path")
+    print("="*70 + "\n")
+    patient_message = ("My blood pressure this morning was 192/124 and I have a bad headache. "
+                       "I take lisinopril 20mg daily for hypertension.")
+    console = sys.stdout
+    
+    def show_banner(alert):
+        console.write(f"⚡ Banner ready in {(time.perf_counter() - started) * 1e6:.0f} µs:\n\n")
+        console.write(emergency_banner(alert))
+    
+    # The background run's own progress output is hidden; the banner goes straight to the console
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        emergency, pending = pipeline.triage_and_summarize(patient_message, patient_name="Mary Johnson",
+                                                           on_emergency=show_banner)
+        urgent_summary = pending.result()
+    print(f"   ✅ Full summary followed in {(time.perf_counter() - started) * 1e3:.0f} ms "
+          f"(metadata['emergency'].rule = {urgent_summary['metadata']['emergency'].rule})")
+    rushed.close()
+    pipeline.close()
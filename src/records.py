@@ -0,0 +1,325 @@
+"""
+Records - shared data passed between agents
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class ExtractionContext(NamedTuple):
+    """
+    Read-only view of Agent 1's output that later stages share.
+
+    Agents 2 and 3 and the final assembly all reference the same context
+    instead of nesting copies of the extraction dict, and it carries only
+    the fields those stages actually read (no raw text preview,
+    instructions or follow-up sentences).
+    """
+    input_method: str
+    extraction_quality: str
+    diagnoses: Tuple[str, ...]
+    medications: Tuple['Medication', ...]
+    test_results: Tuple['TestResult', ...]
+    flagged_terms: Tuple[str, ...]
+    unrecognized_terms: Tuple[str, ...]
+
+    @classmethod
+    def from_extraction(cls, extracted_data: Dict) -> 'ExtractionContext':
+        """Build the context from Agent 1's extraction dict"""
+        return cls(
+            input_method=extracted_data.get('input_method', 'unknown'),
+            extraction_quality=extracted_data.get('extraction_quality', 'low'),
+            diagnoses=tuple(extracted_data.get('diagnoses', ())),
+            medications=tuple(Medication.coerce(med) for med in extracted_data.get('medications', ())),
+            test_results=tuple(TestResult.coerce(test) for test in extracted_data.get('test_results', ())),
+            flagged_terms=tuple(extracted_data.get('flagged_terms', ())),
+            unrecognized_terms=tuple(extracted_data.get('unrecognized_terms', ()))
+        )
+
+
+class Record:
+    """
+    Base for the small slotted records that travel between agents.
+
+    Records have no per-instance __dict__ (far smaller than the dicts they
+    replace) and support read-only mapping access - record['name'],
+    record.get('name') - so code and templates written against the old
+    dict shapes keep working. Conversion to plain dicts only happens at
+    the serialization boundary, via to_dict() / json_default().
+
+    Records compare and hash by value, so Medication and the other flat
+    records work in sets and as dict keys. Records holding dicts or lists
+    (HealthSummary, ActionPlan) raise TypeError when hashed, like a tuple
+    holding a list would.
+    """
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        """Shallow dict of this record's fields (nested records stay records)"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def replace(self, **changes) -> 'Record':
+        """Copy of this record with some fields changed"""
+        values = self.to_dict()
+        values.update(changes)
+        return type(self)(**values)
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash((type(self), *(getattr(self, field) for field in self.__slots__)))
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Medication(Record):
+    """A medication found by Agent 1"""
+    __slots__ = ('name', 'dosage')
+
+    def __init__(self, name: str, dosage: str = "See prescription"):
+        self.name = name
+        self.dosage = dosage
+
+    @classmethod
+    def coerce(cls, med) -> 'Medication':
+        """Accept a Medication or an old-style {'name', 'dosage'} dict"""
+        if isinstance(med, cls):
+            return med
+        return cls(med.get('name', ''), med.get('dosage', "See prescription"))
+
+
+class TestResult(Record):
+    """A test result or vital sign found by Agent 1"""
+    __slots__ = ('test', 'value')
+
+    def __init__(self, test: str, value: str):
+        self.test = test
+        self.value = value
+
+    @classmethod
+    def coerce(cls, test) -> 'TestResult':
+        """Accept a TestResult or an old-style {'test', 'value'} dict"""
+        if isinstance(test, cls):
+            return test
+        return cls(test.get('test', ''), test.get('value', ''))
+
+
+class DiagnosisExplanation(Record):
+    """Agent 2's plain-language explanation of a diagnosis"""
+    __slots__ = ('diagnosis', 'simple_name', 'explanation', 'analogy')
+
+    def __init__(self, diagnosis: str, simple_name: str, explanation: str, analogy: str = ''):
+        self.diagnosis = diagnosis
+        self.simple_name = simple_name
+        self.explanation = explanation
+        self.analogy = analogy
+
+
+class MedicationExplanation(Record):
+    """Agent 2's explanation of what a medication does"""
+    __slots__ = ('medication', 'dosage', 'what_it_does', 'reminder')
+
+    def __init__(self, medication: str, dosage: str, what_it_does: str, reminder: str):
+        self.medication = medication
+        self.dosage = dosage
+        self.what_it_does = what_it_does
+        self.reminder = reminder
+
+
+class TestResultExplanation(Record):
+    """Agent 2's explanation of a test result"""
+    __slots__ = ('test', 'your_value', 'what_it_means', 'normal_range')
+
+    def __init__(self, test: str, your_value: str, what_it_means: str, normal_range: str):
+        self.test = test
+        self.your_value = your_value
+        self.what_it_means = what_it_means
+        self.normal_range = normal_range
+
+
+class AbbreviationExplanation(Record):
+    """Agent 2's translation of a medical abbreviation"""
+    __slots__ = ('abbreviation', 'meaning')
+
+    def __init__(self, abbreviation: str, meaning: str):
+        self.abbreviation = abbreviation
+        self.meaning = meaning
+
+
+class ActionPlan(Record):
+    """Agent 3's action plan"""
+    __slots__ = ('diet_recommendations', 'exercise_recommendations', 'daily_habits',
+                 'warning_signs', 'questions_for_doctor', 'medication_reminders', 'encouragement')
+
+    def __init__(self,
+                 diet_recommendations: List[str],
+                 exercise_recommendations: List[str],
+                 daily_habits: List[str],
+                 warning_signs: List[str],
+                 questions_for_doctor: List[str],
+                 medication_reminders: List[str],
+                 encouragement: str):
+        self.diet_recommendations = diet_recommendations
+        self.exercise_recommendations = exercise_recommendations
+        self.daily_habits = daily_habits
+        self.warning_signs = warning_signs
+        self.questions_for_doctor = questions_for_doctor
+        self.medication_reminders = medication_reminders
+        self.encouragement = encouragement
+
+
+class HealthSummary(Record):
+    """
+    The final patient summary. Field names match the JSON layout, so
+    summary['section_2_medications'] works on records and on summaries
+    loaded back from disk alike.
+    """
+    __slots__ = ('patient_name', 'generated_date', 'generated_time',
+                 'section_1_diagnoses', 'section_2_medications', 'section_3_action_plan',
+                 'section_4_warning_signs', 'section_5_questions', 'section_6_glossary',
+                 'metadata', 'disclaimer')
+
+    def __init__(self,
+                 patient_name: str,
+                 generated_date: str,
+                 generated_time: str,
+                 section_1_diagnoses: Dict,
+                 section_2_medications: Dict,
+                 section_3_action_plan: Dict,
+                 section_4_warning_signs: Dict,
+                 section_5_questions: Dict,
+                 section_6_glossary: Dict,
+                 metadata: Dict,
+                 disclaimer: str):
+        self.patient_name = patient_name
+        self.generated_date = generated_date
+        self.generated_time = generated_time
+        self.section_1_diagnoses = section_1_diagnoses
+        self.section_2_medications = section_2_medications
+        self.section_3_action_plan = section_3_action_plan
+        self.section_4_warning_signs = section_4_warning_signs
+        self.section_5_questions = section_5_questions
+        self.section_6_glossary = section_6_glossary
+        self.metadata = metadata
+        self.disclaimer = disclaimer
+
+
+class VisitDelta(Record):
+    """What changed between a patient's visit and the one before it (patient_store.py)"""
+    __slots__ = ('patient_id', 'visit_date', 'previous_visit_date', 'new_medications',
+                 'stopped_medications', 'changed_dosages', 'new_diagnoses', 'changed_tests')
+
+    def __init__(self,
+                 patient_id: str,
+                 visit_date: str,
+                 previous_visit_date: str = '',
+                 new_medications: List[Medication] = (),
+                 stopped_medications: List[Medication] = (),
+                 changed_dosages: List[Dict] = (),
+                 new_diagnoses: List[str] = (),
+                 changed_tests: List[Dict] = ()):
+        self.patient_id = patient_id
+        self.visit_date = visit_date
+        self.previous_visit_date = previous_visit_date   # '' for a first visit
+        self.new_medications = list(new_medications)
+        self.stopped_medications = list(stopped_medications)
+        self.changed_dosages = list(changed_dosages)     # {'name', 'previous', 'current'}
+        self.new_diagnoses = list(new_diagnoses)
+        self.changed_tests = list(changed_tests)         # {'test', 'previous', 'current'}
+
+    def has_changes(self) -> bool:
+        return any((self.new_medications, self.stopped_medications, self.changed_dosages,
+                    self.new_diagnoses, self.changed_tests))
+
+
+class PatientView(Record):
+    """A patient's merged current record across all stored visits (patient_store.py)"""
+    __slots__ = ('patient_id', 'as_of', 'visit_count', 'diagnoses', 'medications', 'test_results')
+
+    def __init__(self,
+                 patient_id: str,
+                 as_of: str,
+                 visit_count: int,
+                 diagnoses: List[str],
+                 medications: List[Medication],
+                 test_results: List[TestResult]):
+        self.patient_id = patient_id
+        self.as_of = as_of                  # Date of the latest visit
+        self.visit_count = visit_count
+        self.diagnoses = diagnoses          # Every diagnosis ever recorded
+        self.medications = medications      # From the latest visit that listed any
+        self.test_results = test_results    # Latest value of each test
+
+
+class TrendAlert(Record):
+    """A trend rule that fired on a patient's readings (trends.py)"""
+    __slots__ = ('patient_id', 'rule', 'series', 'severity', 'message', 'value', 'reading_date')
+
+    def __init__(self,
+                 patient_id: str,
+                 rule: str,
+                 series: str,
+                 severity: str,
+                 message: str,
+                 value: float,
+                 reading_date: str):
+        self.patient_id = patient_id
+        self.rule = rule
+        self.series = series                # 'weight', 'bp_systolic' or 'a1c'
+        self.severity = severity            # 'urgent' or 'discuss'
+        self.message = message              # Plain-language text for the summary
+        self.value = value                  # Reading that triggered the rule
+        self.reading_date = reading_date
+
+
+class EmergencyAlert(Record):
+    """Emergency signs found by the triage scan before Agent 1 runs (triage.py)"""
+    __slots__ = ('rule', 'message', 'evidence')
+
+    def __init__(self, rule: str, message: str, evidence: str):
+        self.rule = rule                    # 'chest_pain_breathing', 'stroke_signs', 'bp_crisis' or 'low_blood_sugar'
+        self.message = message              # Plain-language text for the banner
+        self.evidence = evidence            # The document text that triggered it
+
+
+def json_default(obj):
+    """
+    json.dumps(..., default=json_default) hook - converts records lazily
+    while the JSON is being written, one level at a time
+    """
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_plain(obj):
+    """Deep-convert records (and tuples) to plain dicts/lists"""
+    if isinstance(obj, Record):
+        return {field: to_plain(getattr(obj, field)) for field in obj.__slots__}
+    if isinstance(obj, dict):
+        return {key: to_plain(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_plain(item) for item in obj]
+    return obj
@@ -0,0 +1,317 @@
+"""
+Streaming Renderer
+Writes patient-friendly summaries straight to any text stream (file, socket, io.StringIO)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import io
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List, TextIO
+
+
+# ----------------------------------------------------------------------
+# Static blocks - built once at import time, reused for every document
+# ----------------------------------------------------------------------
+
+RULE = "─" * 70 + "\n"
+AGENT_RULE = "=" * 60 + "\n"
+
+SUMMARY_HEADER = (
+    "╔" + "═" * 68 + "╗\n"
+    "║" + " " * 68 + "║\n"
+    "║" + "        🏥 YOUR HEALTH SUMMARY - EASY TO UNDERSTAND        ".center(68) + "║\n"
+    "║" + " " * 68 + "║\n"
+    "╚" + "═" * 68 + "╝\n"
+    "\n"
+)
+
+SUMMARY_FOOTER = (
+    "\n\n"
+    "Generated by Boomer Health Summary System\n"
+    "Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb\n"
+    "ITAI 2376 - AI Agents Final Project"
+)
+
+EXPLANATION_HEADER = AGENT_RULE + "AGENT 2: PLAIN-LANGUAGE HEALTH EXPLANATION\n" + AGENT_RULE + "\n"
+EXPLANATION_FOOTER = "\n" + AGENT_RULE + "Ready to send to Agent 3 (Lifestyle Coach)\n" + AGENT_RULE.rstrip("\n")
+
+ACTION_PLAN_HEADER = AGENT_RULE + "AGENT 3: YOUR PERSONALIZED ACTION PLAN\n" + AGENT_RULE + "\n"
+ACTION_PLAN_FOOTER = "\n" + AGENT_RULE + "Ready for final assembly by Agent 4 (Report Builder)\n" + AGENT_RULE.rstrip("\n")
+
+# Per-item templates (filled with str.format_map)
+SUMMARY_DIAGNOSIS = "\n✓ {diagnosis} (also called: {simple_name})\n  {explanation}\n"
+SUMMARY_ANALOGY = "  💡 Think of it like: {analogy}\n"
+SUMMARY_TEST = "  • {test}: {your_value}\n    {what_it_means}\n    (Normal range: {normal_range})\n"
+SUMMARY_MEDICATION = "\n✓ {medication} ({dosage})\n  What it does: {what_it_does}\n  ⚠️  {reminder}\n"
+SUMMARY_ABBREVIATION = "  • {abbreviation} = {meaning}\n"
+
+CHANGES_HEADING = "\n🔄 WHAT CHANGED SINCE YOUR LAST VISIT ({previous_visit_date})\n"
+CHANGE_NEW_MEDICATION = "  • New medication: {name} ({dosage})\n"
+CHANGE_STOPPED_MEDICATION = "  • Stopped: {name}\n"
+CHANGE_DOSAGE = "  • Dose changed: {name} {previous} → {current}\n"
+CHANGE_DIAGNOSIS = "  • New diagnosis: {}\n"
+CHANGE_TEST = "  • {test}: {previous} → {current}\n"
+
+INCOMPLETE_HEADING = "\n⏳ THIS SUMMARY IS INCOMPLETE\n"
+INCOMPLETE_FOOTER = "  Please go over the full document with your doctor or pharmacist.\n"
+
+EMERGENCY_BANNER = (
+    "!" * 70 + "\n"
+    "🚨 CALL 911 NOW\n"
+    "  {message}\n"
+    "  Found in your document: \"{evidence}\"\n"
+    "  Do not wait to read the rest of this summary.\n"
+    + "!" * 70 + "\n\n"
+)
+
+ALERTS_HEADING = "\n📈 TRENDS IN YOUR READINGS\n"
+ALERT_ICONS = {'urgent': "🚨", 'discuss': "•"}
+
+EXPLAINED_DIAGNOSIS = "📌 {diagnosis} (also called: {simple_name})\n   {explanation}\n"
+EXPLAINED_ANALOGY = "   💡 Think of it like: {analogy}\n"
+EXPLAINED_MEDICATION = "📌 {medication} ({dosage})\n   What it does: {what_it_does}\n   ⚠️  {reminder}\n\n"
+EXPLAINED_TEST = "📌 {test}: {your_value}\n   {what_it_means}\n   Normal range: {normal_range}\n\n"
+EXPLAINED_ABBREVIATION = "   • {abbreviation} = {meaning}\n"
+
+
+@lru_cache(maxsize=64)
+def section_heading(icon: str, title: str) -> str:
+    """Ruled section heading used by the final summary (cached per title)"""
+    return "\n\n" + RULE + f"{icon} {title.upper()}\n" + RULE
+
+
+class SummaryRenderer:
+    """
+    Renders summaries and agent outputs directly to a text stream.
+
+    Produces exactly the same text as the format_for_display() methods,
+    but never builds the whole document in memory, so printing thousands
+    of summaries in a batch keeps memory flat.
+    """
+
+    def render_summary(self, summary: Dict, stream: TextIO) -> None:
+        """Write the complete patient-facing summary to a stream"""
+        write = stream.write
+
+        # Emergency signs found by the triage scan come before everything else
+        emergency = summary['metadata'].get('emergency')
+        if emergency:
+            self.render_emergency(emergency, stream)
+
+        write(SUMMARY_HEADER)
+        write(f"Patient: {summary['patient_name']}\n")
+        write(f"Date: {summary['generated_date']} at {summary['generated_time']}\n\n")
+        write(RULE)
+
+        # Partial summaries (document cut short or time budget used up)
+        if summary['metadata'].get('incomplete'):
+            write(INCOMPLETE_HEADING)
+            write(RULE)
+            for reason in summary['metadata']['incomplete_reasons']:
+                write(f"  • {reason}\n")
+            write(INCOMPLETE_FOOTER)
+
+        # Changes since the last visit (summaries from process_visit only)
+        changes = summary['metadata'].get('changes_since_last_visit')
+        if changes and any(changes[field] for field in ('new_medications', 'stopped_medications',
+                                                        'changed_dosages', 'new_diagnoses', 'changed_tests')):
+            write(CHANGES_HEADING.format_map(changes))
+            write(RULE)
+            for med in changes['new_medications']:
+                write(CHANGE_NEW_MEDICATION.format_map(med))
+            for med in changes['stopped_medications']:
+                write(CHANGE_STOPPED_MEDICATION.format_map(med))
+            for change in changes['changed_dosages']:
+                write(CHANGE_DOSAGE.format_map(change))
+            for diagnosis in changes['new_diagnoses']:
+                write(CHANGE_DIAGNOSIS.format(diagnosis))
+            for change in changes['changed_tests']:
+                write(CHANGE_TEST.format_map(change))
+
+        # Trend alerts from stored readings (summaries from process_visit only)
+        alerts = summary['metadata'].get('trend_alerts')
+        if alerts:
+            write(ALERTS_HEADING)
+            write(RULE)
+            for alert in alerts:
+                write(f"  {ALERT_ICONS.get(alert['severity'], '•')} {alert['message']}\n")
+
+        # SECTION 1: Diagnoses
+        section1 = summary['section_1_diagnoses']
+        write(f"\n📋 {section1['title'].upper()}\n")
+        write(RULE)
+        for dx in section1['diagnoses']:
+            write(SUMMARY_DIAGNOSIS.format_map(dx))
+            if dx['analogy']:
+                write(SUMMARY_ANALOGY.format_map(dx))
+        if section1['test_results']:
+            write("\n📊 YOUR TEST RESULTS:\n")
+            for test in section1['test_results']:
+                write(SUMMARY_TEST.format_map(test))
+
+        # SECTION 2: Medications
+        section2 = summary['section_2_medications']
+        write(section_heading("💊", section2['title']))
+        for med in section2['medications']:
+            write(SUMMARY_MEDICATION.format_map(med))
+
+        # SECTION 3: Action Plan
+        section3 = summary['section_3_action_plan']
+        write(section_heading("📝", section3['title']))
+        self._write_numbered(write, "\n🥗 DIET & NUTRITION:\n", section3['diet'], "  ")
+        self._write_numbered(write, "\n🏃 EXERCISE & ACTIVITY:\n", section3['exercise'], "  ")
+        self._write_numbered(write, "\n📅 DAILY HABITS TO TRACK:\n", section3['daily_habits'], "  ")
+        self._write_numbered(write, "\n💊 MEDICATION REMINDERS:\n", section3['medication_reminders'], "  ")
+
+        # SECTION 4: Warning Signs
+        section4 = summary['section_4_warning_signs']
+        write(section_heading("⚠️ ", section4['title']))
+        for sign in section4['warning_signs']:
+            write(f"  • {sign}\n")
+
+        # SECTION 5: Questions for Doctor
+        section5 = summary['section_5_questions']
+        write(section_heading("❓", section5['title']))
+        for i, question in enumerate(section5['questions'], 1):
+            write(f"  {i}. {question}\n")
+
+        # SECTION 6: Glossary
+        section6 = summary['section_6_glossary']
+        if section6['abbreviations']:
+            write(section_heading("📖", section6['title']))
+            for abbrev in section6['abbreviations']:
+                write(SUMMARY_ABBREVIATION.format_map(abbrev))
+
+        # Disclaimer and footer
+        write("\n\n")
+        write(RULE)
+        write(summary['disclaimer'])
+        write("\n")
+        write(RULE)
+        write(SUMMARY_FOOTER)
+
+    def render_emergency(self, alert: Dict, stream: TextIO) -> None:
+        """Write the "Call 911" banner for an EmergencyAlert"""
+        stream.write(EMERGENCY_BANNER.format_map(alert))
+
+    def render_explanation(self, explained_data: Dict, stream: TextIO) -> None:
+        """Write Agent 2's output (same text as HealthExplainer.format_for_display)"""
+        write = stream.write
+        write(EXPLANATION_HEADER)
+
+        if explained_data['diagnoses_explained']:
+            write("🏥 YOUR DIAGNOSES EXPLAINED:\n\n")
+            for dx in explained_data['diagnoses_explained']:
+                write(EXPLAINED_DIAGNOSIS.format_map(dx))
+                if dx['analogy']:
+                    write(EXPLAINED_ANALOGY.format_map(dx))
+                write("\n")
+
+        if explained_data['medications_explained']:
+            write("💊 YOUR MEDICATIONS EXPLAINED:\n\n")
+            for med in explained_data['medications_explained']:
+                write(EXPLAINED_MEDICATION.format_map(med))
+
+        if explained_data['test_results_explained']:
+            write("🔬 YOUR TEST RESULTS EXPLAINED:\n\n")
+            for test in explained_data['test_results_explained']:
+                write(EXPLAINED_TEST.format_map(test))
+
+        if explained_data['abbreviations_explained']:
+            write("📖 MEDICAL TERMS TRANSLATED:\n")
+            for abbrev in explained_data['abbreviations_explained']:
+                write(EXPLAINED_ABBREVIATION.format_map(abbrev))
+            write("\n")
+
+        write(explained_data['disclaimer'])
+        write("\n")
+        write(EXPLANATION_FOOTER)
+
+    def render_action_plan(self, action_plan: Dict, stream: TextIO) -> None:
+        """Write Agent 3's output (same text as LifestyleCoach.format_for_display)"""
+        write = stream.write
+        write(ACTION_PLAN_HEADER)
+
+        self._write_numbered(write, "🥗 DIET & NUTRITION TIPS:\n", action_plan['diet_recommendations'], "   ", "\n")
+        self._write_numbered(write, "🏃 EXERCISE & ACTIVITY:\n", action_plan['exercise_recommendations'], "   ", "\n")
+        self._write_numbered(write, "📅 DAILY HABITS TO TRACK:\n", action_plan['daily_habits'], "   ", "\n")
+        self._write_numbered(write, "💊 MEDICATION REMINDERS:\n", action_plan['medication_reminders'], "   ", "\n")
+
+        if action_plan['warning_signs']:
+            write("⚠️  WARNING SIGNS - WHEN TO GET HELP:\n")
+            for sign in action_plan['warning_signs']:
+                write(f"   • {sign}\n")
+            write("\n")
+
+        self._write_numbered(write, "QUESTIONS TO ASK YOUR DOCTOR:\n", action_plan['questions_for_doctor'], "   ", "\n")
+
+        write("💙 ")
+        write(action_plan['encouragement'])
+        write("\n")
+        write(ACTION_PLAN_FOOTER)
+
+    def render_many(self, summaries: Iterable[Dict], stream: TextIO, separator: str = "\n\n") -> int:
+        """
+        Render a batch of summaries one after another
+
+        Returns:
+            Number of summaries written
+        """
+        count = 0
+        for summary in summaries:
+            if count:
+                stream.write(separator)
+            self.render_summary(summary, stream)
+            count += 1
+        return count
+
+    def _write_numbered(self, write, heading: str, items: List[str], indent: str, trailer: str = "") -> None:
+        """Write a heading followed by a numbered list (nothing if the list is empty)"""
+        if not items:
+            return
+        write(heading)
+        for i, item in enumerate(items, 1):
+            write(f"{indent}{i}. {item}\n")
+        write(trailer)
+
+    def to_string(self, render_method, data: Dict) -> str:
+        """Render into a string (for callers that still want the whole text)"""
+        buffer = io.StringIO()
+        render_method(data, buffer)
+        return buffer.getvalue()
+
+
+# Shared instance - the renderer holds no per-document state
+DEFAULT_RENDERER = SummaryRenderer()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import contextlib
+    import tracemalloc
+
+    from pipeline import BoomerHealthPipeline
+
+    with contextlib.redirect_stdout(io.StringIO()), BoomerHealthPipeline() as pipeline:
+        summary = pipeline.process_document(
+            "Diagnosis: Hypertension. Lisinopril 10mg daily. BP: 150/95. Walk 20 minutes daily.",
+            input_method="free_text",
+            patient_name="Sample Patient"
+        )
+
+    # Render one summary to the console
+    DEFAULT_RENDERER.render_summary(summary, sys.stdout)
+    print("\n")
+
+    # Render a large batch to a null stream and check memory stays flat
+    with open(os.devnull, 'w') as devnull:
+        tracemalloc.start()
+        written = DEFAULT_RENDERER.render_many((summary for _ in range(5000)), devnull)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"Rendered {written} summaries, peak traced memory {peak / 1024:.1f} KB")
@@ -0,0 +1,577 @@
+"""
+Summary Service - local HTTP API around BoomerHealthPipeline
+Standard library only: run `python service.py` and POST documents to localhost
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+
+Endpoints:
+    GET  /health                  liveness + queue state (JSON)
+    GET  /metrics                 counters and latencies (Prometheus text format)
+    POST /summarize/text          JSON {"text", "patient_name"?, "input_method"?}
+                                  or a text/plain body
+    POST /summarize/structured    JSON {"diagnoses", "medications", "instructions",
+                                  "followups", "test_results", "patient_name"?}
+    POST /summarize/upload        raw image (image/*) or PDF (application/pdf) body,
+                                  patient name in ?patient_name=
+    POST /triage                  same body as /summarize/text; answers at once (no
+                                  worker or queue) with any emergency signs and the
+                                  "Call 911" banner, so clients can show it while the
+                                  summary is still being made
+    POST /admin/reload-vocabulary re-read --vocabulary-dir; workers switch over as
+                                  they finish their current request
+
+Add ?format=text to any /summarize call for the printable summary instead of JSON.
+"""
+
+import contextlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from agent1_extractor import check_structured_field
+from coalesce import SingleFlight, document_key
+from deadlines import DEFAULT_LIMITS, REJECT, TRUNCATE, InputLimits, InputTooLarge, apply_input_limits
+from ocr_ingest import OCRError, OCRIngestor
+from pdf_ingest import PDFError, PDFIngestor
+from records import json_default
+from triage import emergency_banner, triage
+from vocabulary import Vocabulary, VocabularyError, VocabularyStore
+from workers import WorkerCrashed, WorkerError, WorkerSupervisor, WorkerTimeout
+
+
+# Defaults (all can be overridden on the command line or in SummaryService)
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_QUEUE_SIZE = 32              # Requests allowed to wait beyond the busy workers
+DEFAULT_TIMEOUT = 60.0               # Seconds before a request gives up on its worker
+DEFAULT_BUDGET = 20.0                # Seconds before a summary is cut short (must stay below the timeout)
+MAX_BODY_BYTES = 20 * 1024 * 1024    # Uploads larger than this get 413
+RETRY_AFTER_SECONDS = 2
+DEFAULT_MAX_JOBS = 500               # Documents per worker before it is re-forked
+
+STRUCTURED_FIELDS = ('diagnoses', 'medications', 'instructions', 'followups', 'test_results')
+
+
+class QueueFull(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class BadRequest(Exception):
+    """The request body or parameters are invalid"""
+
+
+# ----------------------------------------------------------------------
+# Worker side - agents are built once in the parent and shared by every
+# forked worker (see workers.WorkerSupervisor)
+# ----------------------------------------------------------------------
+
+WARM_UP_DOCUMENT = "Hypertension. Lisinopril 10mg daily. BP: 150/95. A1C: 7.1%. Walk 20 minutes daily."
+
+
+class _Discard(io.TextIOBase):
+    """Text stream that drops everything (like os.devnull, without holding a file handle)"""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def build_worker_state(vocabulary: Optional[Vocabulary] = None,
+                       budget: Optional[float] = DEFAULT_BUDGET,
+                       input_limits: InputLimits = DEFAULT_LIMITS) -> Dict:
+    """
+    Build the pipeline in the parent before the workers are forked
+
+    One sample document is run through it so lazily built caches (regex
+    cache, section headings) exist before fork and are shared too.
+    """
+    from pipeline import BoomerHealthPipeline
+
+    # The pipeline prints progress for the console demos; the service stays quiet
+    devnull = _Discard()
+    with contextlib.redirect_stdout(devnull):
+        pipeline = BoomerHealthPipeline(vocabulary, budget_seconds=budget, input_limits=input_limits)
+        pipeline.format_summary_for_display(pipeline.process_document(WARM_UP_DOCUMENT))
+    pipeline.clear_history()
+
+    return {
+        'pipeline': pipeline,
+        'ocr': OCRIngestor(max_workers=1),
+        'pdf': PDFIngestor(max_workers=1),
+        'devnull': devnull,
+    }
+
+
+def close_worker_state(state: Dict) -> None:
+    """Shut down the pipeline's threads and the OCR and PDF pools a worker started (runs as the worker exits)"""
+    try:
+        state['ocr'].close()
+    finally:
+        try:
+            state['pdf'].close()
+        finally:
+            state['pipeline'].close()
+
+
+def run_job(state: Dict, job: Tuple[str, Dict, str]) -> Tuple[int, str, bytes]:
+    """
+    Process one request inside a worker
+
+    Args:
+        state: build_worker_state() result
+        job: (kind, payload, output format)
+
+    Returns:
+        (HTTP status, content type, body)
+    """
+    kind, payload, output = job
+    pipeline = state['pipeline']
+    patient_name = payload.get('patient_name')
+
+    try:
+        with contextlib.redirect_stdout(state['devnull']):
+            if kind == 'text':
+                summary = pipeline.process_document(payload['text'], payload.get('input_method', 'free_text'),
+                                                    patient_name)
+            elif kind == 'structured':
+                summary = pipeline.process_structured(patient_name=patient_name,
+                                                      **{field: payload.get(field) for field in STRUCTURED_FIELDS})
+            elif kind == 'image':
+                summary = pipeline.process_images([payload['data']], patient_name, ocr=state['ocr'])
+            elif kind == 'pdf':
+                summary = pipeline.process_pdf(payload['data'], patient_name, pdf_reader=state['pdf'])
+            else:
+                return 400, 'application/json', _error_body(f"Unknown job kind: {kind}")
+    except (OCRError, PDFError) as exc:
+        return 422, 'application/json', _error_body(str(exc))
+    except InputTooLarge as exc:
+        return 413, 'application/json', _error_body(str(exc))
+    finally:
+        # A long-lived worker must not keep every summary it ever made
+        pipeline.clear_history()
+
+    if output == 'text':
+        return 200, 'text/plain; charset=utf-8', pipeline.format_summary_for_display(summary).encode('utf-8')
+    return 200, 'application/json', json.dumps(summary, default=json_default).encode('utf-8')
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({'error': message}).encode('utf-8')
+
+
+# ----------------------------------------------------------------------
+# Server side
+# ----------------------------------------------------------------------
+
+class ServiceMetrics:
+    """Thread-safe request counters and latency totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.latency_sum: Dict[str, float] = {}
+        self.latency_count: Dict[str, int] = {}
+        self.rejected = 0
+
+    def observe(self, route: str, status: int, seconds: float):
+        with self._lock:
+            self.requests[(route, status)] = self.requests.get((route, status), 0) + 1
+            self.latency_sum[route] = self.latency_sum.get(route, 0.0) + seconds
+            self.latency_count[route] = self.latency_count.get(route, 0) + 1
+            if status == 503:
+                self.rejected += 1
+
+    def render(self, service: 'SummaryService') -> str:
+        """Prometheus text exposition"""
+        with self._lock:
+            lines = [
+                '# TYPE bhs_requests_total counter',
+                *(f'bhs_requests_total{{route="{route}",status="{status}"}} {count}'
+                  for (route, status), count in sorted(self.requests.items())),
+                '# TYPE bhs_request_seconds_sum counter',
+                *(f'bhs_request_seconds_sum{{route="{route}"}} {total:.6f}'
+                  for route, total in sorted(self.latency_sum.items())),
+                '# TYPE bhs_request_seconds_count counter',
+                *(f'bhs_request_seconds_count{{route="{route}"}} {count}'
+                  for route, count in sorted(self.latency_count.items())),
+                '# TYPE bhs_rejected_total counter',
+                f'bhs_rejected_total {self.rejected}',
+            ]
+        lines += [
+            '# TYPE bhs_in_flight gauge',
+            f'bhs_in_flight {service.in_flight()}',
+            '# TYPE bhs_capacity gauge',
+            f'bhs_capacity {service.capacity}',
+            '# TYPE bhs_workers gauge',
+            f'bhs_workers {service.workers}',
+            '# TYPE bhs_coalesced_total counter',
+            f'bhs_coalesced_total {service.flights.coalesced}',
+            '# TYPE bhs_worker_restarts_total counter',
+            f'bhs_worker_restarts_total {service.supervisor.restarts}',
+            '# TYPE bhs_uptime_seconds gauge',
+            f'bhs_uptime_seconds {time.time() - self.started:.1f}',
+        ]
+
+        # Unique (unshared) memory per process - what each worker really costs
+        memory = [row for row in service.supervisor.memory_report() if 'uss' in row]
+        if memory:
+            lines.append('# TYPE bhs_process_unique_kb gauge')
+            lines += [f'bhs_process_unique_kb{{role="{row["role"]}",pid="{row["pid"]}"}} {row["uss"]}'
+                      for row in memory]
+            lines.append('# TYPE bhs_process_rss_kb gauge')
+            lines += [f'bhs_process_rss_kb{{role="{row["role"]}",pid="{row["pid"]}"}} {row["rss"]}'
+                      for row in memory]
+        return "\n".join(lines) + "\n"
+
+
+class SummaryService:
+    """
+    Pre-forked pool of warm pipeline workers behind a bounded queue.
+
+    At most workers + queue_size requests are admitted at once; anything
+    beyond that is turned away immediately (503 + Retry-After) instead of
+    piling up in memory while clients time out.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_jobs: Optional[int] = DEFAULT_MAX_JOBS,
+                 vocabulary_dir: Optional[str] = None,
+                 budget: Optional[float] = DEFAULT_BUDGET,
+                 input_limits: InputLimits = DEFAULT_LIMITS):
+        """
+        Args:
+            workers: Worker processes (default: one per CPU)
+            queue_size: Requests allowed to wait for a free worker
+            timeout: Seconds a worker may spend on one request before 504
+            max_jobs: Documents per worker before it is replaced with a fresh fork
+            vocabulary_dir: Folder of extra vocabulary files (see vocabulary.py)
+            budget: Seconds after which a summary is finished early and marked
+                    incomplete (keep it below timeout so clients get a partial
+                    summary instead of a 504)
+            input_limits: Size caps for document text (see deadlines.py)
+
+        Raises:
+            VocabularyError: the vocabulary files are invalid
+            ValueError: budget is not below timeout
+        """
+        if budget is not None and budget >= timeout:
+            raise ValueError(f"budget ({budget}s) must be below timeout ({timeout}s)")
+        self.vocabulary = VocabularyStore(vocabulary_dir)
+        self.supervisor = WorkerSupervisor(
+            lambda: build_worker_state(self.vocabulary.current, budget, input_limits), run_job,
+            workers=workers, max_jobs=max_jobs, teardown=close_worker_state)
+        self.workers = self.supervisor.workers
+        self.capacity = self.workers + queue_size
+        self.timeout = timeout
+        self.input_limits = input_limits
+        self.metrics = ServiceMetrics()
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self.flights = SingleFlight()
+
+    def start(self):
+        """Build the agents once, then fork the workers"""
+        self.supervisor.start()
+        self._running = True
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def submit(self, kind: str, payload: Dict, output: str = 'json') -> Tuple[int, str, bytes]:
+        """
+        Run a job on a worker, or raise QueueFull without waiting
+
+        Identical requests that arrive while one is already running wait
+        for it instead of taking another slot and worker (the same upload
+        fanned out to several caregivers is processed once).
+
+        Raises:
+            QueueFull: capacity reached
+        """
+        if kind in ('image', 'pdf'):
+            content = payload['data']
+        else:
+            content = json.dumps(payload, sort_keys=True)
+        key = document_key(kind, output, content, payload.get('patient_name'))
+        return self.flights.do(key, lambda: self._run(kind, payload, output))
+
+    def _run(self, kind: str, payload: Dict, output: str) -> Tuple[int, str, bytes]:
+        """Admit the job (or raise QueueFull) and run it on a worker"""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self.supervisor.run((kind, payload, output), timeout=self.timeout)
+        except WorkerTimeout:
+            return 504, 'application/json', _error_body("Timed out processing the document")
+        except (WorkerCrashed, WorkerError) as exc:
+            return 500, 'application/json', _error_body(str(exc))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def triage(self, text: str) -> Dict:
+        """
+        Emergency triage for a document, run on the request thread
+
+        The scan takes microseconds, so it never waits for a worker and is
+        never turned away when the queue is full.
+
+        Raises:
+            InputTooLarge: the document exceeds the input limits and their policy is REJECT
+        """
+        text, _ = apply_input_limits(text, self.input_limits)
+        alert = triage(text)
+        if alert is None:
+            return {'emergency': False}
+        return dict(alert.to_dict(), emergency=True, banner=emergency_banner(alert))
+
+    def reload_vocabulary(self) -> Dict:
+        """
+        Re-read the vocabulary folder and roll the workers over to it
+
+        The new vocabulary is loaded and compiled in the parent while the
+        workers keep serving; each worker is then replaced as it comes free.
+
+        Raises:
+            VocabularyError: the new files are invalid (the old vocabulary stays)
+        """
+        changed = self.vocabulary.reload()
+        if changed:
+            self.supervisor.reload()
+        return {'changed': changed, **self._vocabulary_info()}
+
+    def _vocabulary_info(self) -> Dict:
+        vocabulary = self.vocabulary.current
+        return {'vocabulary_terms': len(vocabulary), 'vocabulary_fingerprint': vocabulary.fingerprint[:12]}
+
+    def health(self) -> Dict:
+        return {
+            'status': 'ok' if self._running else 'starting',
+            'workers': self.workers,
+            'in_flight': self.in_flight(),
+            'capacity': self.capacity,
+            'worker_restarts': self.supervisor.restarts,
+            **self._vocabulary_info(),
+        }
+
+    def close(self):
+        if self._running:
+            self._running = False
+            self.supervisor.close()
+
+
+def parse_request(route: str, content_type: str, body: bytes, query: Dict) -> Tuple[str, Dict]:
+    """
+    Turn a POST into (job kind, payload)
+
+    Raises:
+        BadRequest: unknown route or malformed body
+    """
+    patient_name = query.get('patient_name', [None])[0]
+    media_type = content_type.split(';')[0].strip().lower()
+
+    if route == '/summarize/upload':
+        if media_type == 'application/pdf':
+            return 'pdf', {'data': body, 'patient_name': patient_name}
+        if media_type.startswith('image/'):
+            return 'image', {'data': body, 'patient_name': patient_name}
+        raise BadRequest("Upload an image (image/*) or a PDF (application/pdf)")
+
+    if route in ('/summarize/text', '/triage') and media_type == 'text/plain':
+        return 'text', {'text': body.decode('utf-8', errors='replace'), 'patient_name': patient_name}
+
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError:
+        raise BadRequest("Body must be JSON") from None
+    if not isinstance(payload, dict):
+        raise BadRequest("Body must be a JSON object")
+    payload.setdefault('patient_name', patient_name)
+    for key in ('patient_name', 'input_method'):
+        if payload.get(key) is not None and not isinstance(payload[key], str):
+            raise BadRequest(f"'{key}' must be a string")
+
+    if route in ('/summarize/text', '/triage'):
+        if not isinstance(payload.get('text'), str) or not payload['text'].strip():
+            raise BadRequest("'text' is required")
+        return 'text', payload
+    if route == '/summarize/structured':
+        for field in STRUCTURED_FIELDS:
+            if payload.get(field) is not None:
+                try:
+                    check_structured_field(field, payload[field])
+                except ValueError as exc:
+                    raise BadRequest(str(exc)) from None
+        return 'structured', payload
+    raise BadRequest(f"Unknown endpoint: {route}")
+
+
+def parse_content_length(value: Optional[str]) -> int:
+    """
+    Body size from a Content-Length header (0 when there is none)
+
+    Raises:
+        BadRequest: the header is not a whole number of bytes (negative,
+                    signed or not a number)
+    """
+    if value is None or not value.strip():
+        return 0
+    value = value.strip()
+    if not (value.isascii() and value.isdigit()):
+        raise BadRequest("Content-Length must be a whole number of bytes")
+    return int(value)
+
+
+def make_handler(service: SummaryService):
+    """Request handler class bound to a running SummaryService"""
+
+    class SummaryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        server_version = 'BoomerHealth/1.0'
+
+        def log_message(self, format, *args):
+            # Access logs would swamp load tests; /metrics has the counts
+            pass
+
+        def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict] = None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            start = time.perf_counter()
+            route = urlparse(self.path).path
+            if route == '/health':
+                status, content_type = 200, 'application/json'
+                body = json.dumps(service.health()).encode('utf-8')
+            elif route == '/metrics':
+                status, content_type = 200, 'text/plain; version=0.0.4'
+                body = service.metrics.render(service).encode('utf-8')
+            else:
+                status, content_type, body = 404, 'application/json', _error_body("Not found")
+            self._send(status, content_type, body)
+            service.metrics.observe(route, status, time.perf_counter() - start)
+
+        def do_POST(self):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            route = url.path
+            query = parse_qs(url.query)
+            headers = None
+
+            try:
+                length = parse_content_length(self.headers.get('Content-Length'))
+            except BadRequest as exc:
+                # Where the body ends is unknown, so it cannot be skipped: answer and hang up
+                self.close_connection = True
+                self._send(400, 'application/json', _error_body(str(exc)))
+                service.metrics.observe(route, 400, time.perf_counter() - start)
+                return
+
+            if route == '/admin/reload-vocabulary':
+                self.rfile.read(length)
+                try:
+                    status, content_type = 200, 'application/json'
+                    body = json.dumps(service.reload_vocabulary()).encode('utf-8')
+                except VocabularyError as exc:
+                    status, content_type, body = 422, 'application/json', _error_body(str(exc))
+            elif length > MAX_BODY_BYTES:
+                status, content_type, body = 413, 'application/json', _error_body("Upload too large")
+                self.close_connection = True
+            else:
+                request_body = self.rfile.read(length)
+                try:
+                    kind, payload = parse_request(route, self.headers.get('Content-Type', ''),
+                                                  request_body, query)
+                    if route == '/triage':
+                        status, content_type = 200, 'application/json'
+                        body = json.dumps(service.triage(payload['text'])).encode('utf-8')
+                    else:
+                        output = 'text' if query.get('format', ['json'])[0] == 'text' else 'json'
+                        status, content_type, body = service.submit(kind, payload, output)
+                except InputTooLarge as exc:
+                    status, content_type, body = 413, 'application/json', _error_body(str(exc))
+                except BadRequest as exc:
+                    status, content_type, body = 400, 'application/json', _error_body(str(exc))
+                except QueueFull:
+                    status, content_type = 503, 'application/json'
+                    body = _error_body("Server busy - please retry shortly")
+                    headers = {'Retry-After': str(RETRY_AFTER_SECONDS)}
+
+            self._send(status, content_type, body, headers)
+            service.metrics.observe(route, status, time.perf_counter() - start)
+
+    return SummaryHandler
+
+
+def serve(host: str = DEFAULT_HOST,
+          port: int = DEFAULT_PORT,
+          workers: Optional[int] = None,
+          queue_size: int = DEFAULT_QUEUE_SIZE,
+          max_jobs: Optional[int] = DEFAULT_MAX_JOBS,
+          vocabulary_dir: Optional[str] = None,
+          budget: Optional[float] = DEFAULT_BUDGET,
+          input_limits: InputLimits = DEFAULT_LIMITS) -> None:
+    """Start the workers and serve until Ctrl+C"""
+    service = SummaryService(workers=workers, queue_size=queue_size, max_jobs=max_jobs,
+                             vocabulary_dir=vocabulary_dir, budget=budget, input_limits=input_limits)
+    print(f"🚀 Starting {service.workers} worker(s)...")
+    service.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    print(f"✨ Serving on http://{host}:{port} (capacity {service.capacity} requests)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+        service.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Boomer Health Summary HTTP service")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument('--max-jobs', type=int, default=DEFAULT_MAX_JOBS,
+                        help="documents per worker before it is re-forked")
+    parser.add_argument('--vocabulary-dir', default=None,
+                        help="folder of extra vocabulary CSV/JSON files (e.g. data/vocabulary)")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help="seconds before a summary is finished early and marked incomplete")
+    parser.add_argument('--max-chars', type=int, default=DEFAULT_LIMITS.max_chars,
+                        help="longest document text read")
+    parser.add_argument('--oversize', choices=(TRUNCATE, REJECT), default=DEFAULT_LIMITS.policy,
+                        help="truncate longer documents, or reject them with 413")
+    args = parser.parse_args()
+
+    limits = DEFAULT_LIMITS._replace(max_chars=args.max_chars, policy=args.oversize)
+    serve(args.host, args.port, args.workers, args.queue_size, args.max_jobs, args.vocabulary_dir,
+          args.budget, limits)
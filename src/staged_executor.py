@@ -0,0 +1,400 @@
+"""
+Staged Executor - runs a batch through the pipeline stages as a producer/consumer chain
+extract → explain → plan → assemble → render → write, with a bounded queue between stages
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from deadlines import apply_input_limits
+from records import ExtractionContext
+from summary_storage import SummarySink, write_atomic
+from triage import triage
+
+
+DEFAULT_QUEUE_SIZE = 16     # Items waiting between two stages (bounds batch memory)
+
+# Workers per stage for summary_stages(). Stages are threads: the CPU-bound
+# agents share the GIL, so extra workers pay off in the I/O stages (file
+# writes, fsync and gzip release it) and the gain comes from overlapping
+# one document's writing with the next documents' extraction.
+DEFAULT_STAGE_WORKERS = {
+    'extract': 1,
+    'explain': 1,
+    'plan': 1,
+    'assemble': 1,
+    'render': 1,
+    'write': 2,
+}
+
+_DONE = object()            # End-of-batch marker, one per downstream worker
+
+
+class Stage(NamedTuple):
+    """One step of the chain: fn turns the previous stage's output into this stage's output"""
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+class StageError(Exception):
+    """An item failed in one stage (later stages pass it through untouched)"""
+
+    def __init__(self, stage: str, index: int, error: BaseException):
+        super().__init__(f"Item {index} failed in stage '{stage}': {error!r}")
+        self.stage = stage
+        self.index = index
+        self.error = error
+
+
+class StageStats(NamedTuple):
+    """What one stage did during a run (see StagedExecutor.stats)"""
+    name: str
+    workers: int
+    processed: int          # Items the stage ran fn on
+    errors: int             # Items whose fn raised
+    queue_depth: int        # Items waiting in its input queue right now
+    max_queue_depth: int    # Most items ever waiting in its input queue
+    busy_seconds: float     # Time spent inside fn, summed over workers
+    cpu_seconds: float      # CPU time used inside fn (busy minus cpu = waiting on I/O or the GIL)
+    blocked_seconds: float  # Time spent waiting for room in the next queue
+    utilization: float      # busy_seconds / (workers * elapsed): near 1.0 = bottleneck
+
+
+class _StageState:
+    """Queue and counters for one running stage"""
+    __slots__ = ('stage', 'inbox', 'lock', 'processed', 'errors', 'max_depth',
+                 'busy', 'cpu', 'blocked', 'running')
+
+    def __init__(self, stage: Stage, queue_size: int):
+        self.stage = stage
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.busy = 0.0
+        self.cpu = 0.0
+        self.blocked = 0.0
+        self.running = stage.workers
+
+
+class StagedExecutor:
+    """
+    Runs items through a chain of stages, each with its own worker threads.
+
+    Every stage reads from a bounded input queue and writes to the next
+    stage's queue, so a slow stage makes the ones before it wait instead of
+    letting finished-but-unwritten items pile up in memory. Items leave in
+    any order; run() returns the results in input order.
+
+    An Exception from a stage fn fails just that item (StageError). Anything
+    else (KeyboardInterrupt, SystemExit) abandons the batch: feeding stops,
+    the items already queued pass through untouched so every worker reaches
+    its end marker, and run() re-raises it.
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            stages: Stages in order (at least one)
+            queue_size: Items allowed to wait in front of each stage
+
+        Raises:
+            ValueError: no stages, duplicate stage names, or a stage without workers
+        """
+        if not stages:
+            raise ValueError("StagedExecutor needs at least one stage")
+        if len({stage.name for stage in stages}) != len(stages):
+            raise ValueError("Stage names must be unique")
+        if any(stage.workers < 1 for stage in stages):
+            raise ValueError("Every stage needs at least one worker")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self._states: List[_StageState] = []
+        self._started = None
+        self._finished = None
+        self._fatal: Optional[BaseException] = None
+        self._fatal_lock = threading.Lock()
+
+    def run(self, items: Iterable) -> List[Any]:
+        """
+        Push every item through all stages and wait for the batch to finish
+
+        Returns:
+            One result per item, in input order: the last stage's output, or
+            a StageError for items that failed along the way
+
+        Raises:
+            BaseException: a stage fn raised something other than an Exception
+                           (the batch was abandoned)
+        """
+        self._states = [_StageState(stage, self.queue_size) for stage in self.stages]
+        self._started = time.perf_counter()
+        self._finished = None
+        self._fatal = None
+        results: Dict[int, Any] = {}
+
+        threads = []
+        for position, state in enumerate(self._states):
+            for number in range(state.stage.workers):
+                thread = threading.Thread(target=self._work, args=(position, results),
+                                          name=f"{state.stage.name}-{number}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        # Feed the first stage (blocks whenever its queue is full). If items
+        # itself raises, the workers still drain and stop before it propagates.
+        first = self._states[0]
+        count = 0
+        try:
+            for count, item in enumerate(items, 1):
+                if self._fatal is not None:
+                    break
+                self._put(first, (count - 1, item))
+        finally:
+            for _ in range(first.stage.workers):
+                first.inbox.put(_DONE)
+            for thread in threads:
+                thread.join()
+            self._finished = time.perf_counter()
+        if self._fatal is not None:
+            raise self._fatal
+        return [results[index] for index in range(count)]
+
+    def _put(self, state: _StageState, entry):
+        state.inbox.put(entry)
+        depth = state.inbox.qsize()
+        if depth > state.max_depth:
+            with state.lock:
+                state.max_depth = max(state.max_depth, depth)
+
+    def _work(self, position: int, results: Dict[int, Any]):
+        """Worker loop for one thread of one stage"""
+        state = self._states[position]
+        following = self._states[position + 1] if position + 1 < len(self._states) else None
+        name = state.stage.name
+        fn = state.stage.fn
+
+        while True:
+            entry = state.inbox.get()
+            if entry is _DONE:
+                break
+            index, item = entry
+
+            busy = cpu = 0.0
+            ran = not isinstance(item, StageError) and self._fatal is None
+            if not ran:
+                # Failed in an earlier stage, or the batch is being abandoned
+                output = item
+            else:
+                start = time.perf_counter()
+                cpu_start = time.thread_time()
+                try:
+                    output = fn(item)
+                except Exception as exc:
+                    output = StageError(name, index, exc)
+                except BaseException as exc:
+                    # Keep the worker alive so the end markers still flow; run() re-raises it
+                    with self._fatal_lock:
+                        if self._fatal is None:
+                            self._fatal = exc
+                    output = StageError(name, index, exc)
+                busy = time.perf_counter() - start
+                cpu = time.thread_time() - cpu_start
+
+            blocked = 0.0
+            if following is None:
+                results[index] = output
+            else:
+                start = time.perf_counter()
+                self._put(following, (index, output))
+                blocked = time.perf_counter() - start
+
+            with state.lock:
+                if ran:
+                    state.processed += 1
+                    state.errors += isinstance(output, StageError)
+                state.busy += busy
+                state.cpu += cpu
+                state.blocked += blocked
+
+        # The last worker of this stage to finish tells the next stage's workers
+        with state.lock:
+            state.running -= 1
+            last = state.running == 0
+        if last and following is not None:
+            for _ in range(following.stage.workers):
+                following.inbox.put(_DONE)
+
+    def stats(self) -> List[StageStats]:
+        """Per-stage counters for the current (or last) run; safe to call while running"""
+        if self._started is None:
+            return []
+        elapsed = max((self._finished or time.perf_counter()) - self._started, 1e-9)
+        report = []
+        for state in self._states:
+            with state.lock:
+                report.append(StageStats(
+                    name=state.stage.name,
+                    workers=state.stage.workers,
+                    processed=state.processed,
+                    errors=state.errors,
+                    queue_depth=state.inbox.qsize(),
+                    max_queue_depth=state.max_depth,
+                    busy_seconds=state.busy,
+                    cpu_seconds=state.cpu,
+                    blocked_seconds=state.blocked,
+                    utilization=state.busy / (state.stage.workers * elapsed),
+                ))
+        return report
+
+    def bottleneck(self) -> Optional[str]:
+        """Name of the stage with the highest utilization (the one to give more workers)"""
+        report = self.stats()
+        return max(report, key=lambda stats: stats.utilization).name if report else None
+
+
+def summary_stages(pipeline,
+                   sink: SummarySink,
+                   text_directory: Optional[str] = None,
+                   workers: Optional[Dict[str, int]] = None) -> List[Stage]:
+    """
+    The pipeline's stages for a batch of text documents
+
+    Items are document texts or (text, patient_name) pairs. The write stage
+    appends each summary to the sink and, with text_directory, also saves
+    the patient-facing text as <summary id>.txt; it returns the summary id.
+
+    Args:
+        pipeline: BoomerHealthPipeline whose agents do the work
+        sink: Where summaries are written
+        text_directory: Folder for rendered .txt summaries (no render stage if None)
+        workers: Workers per stage name (defaults: DEFAULT_STAGE_WORKERS)
+    """
+    workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+
+    def extract(job: Union[str, Tuple[str, Optional[str]]]):
+        text, patient_name = (job, None) if isinstance(job, str) else job
+        text, notes = apply_input_limits(text, pipeline.input_limits)
+        # Agent 2 explains with the vocabulary snapshot Agent 1 extracted with
+        snapshot = pipeline.vocabulary_snapshot
+        extracted_data = pipeline.agent1.extract_all(text, "free_text", lexicon=snapshot.lexicon)
+        return extracted_data, snapshot.tables, patient_name, notes, triage(text)
+
+    def explain(job):
+        extracted_data, tables, patient_name, notes, emergency = job
+        context = ExtractionContext.from_extraction(extracted_data)
+        return context, pipeline.agent2.explain_all(context, tables), patient_name, notes, emergency
+
+    def plan(job):
+        context, explained_data, patient_name, notes, emergency = job
+        action_plan = pipeline.agent3.generate_action_plan(explained_data, context)
+        return context, explained_data, action_plan, patient_name, notes, emergency
+
+    def assemble(job):
+        context, explained_data, action_plan, patient_name, notes, emergency = job
+        return pipeline.assemble_final_summary(context, explained_data, action_plan, patient_name, notes, emergency)
+
+    def render(summary):
+        return summary, pipeline.format_summary_for_display(summary)
+
+    def write(job):
+        summary, text = job if text_directory else (job, None)
+        summary_id = sink.append(summary)
+        if text is not None:
+            write_atomic(os.path.join(text_directory, f"{summary_id}.txt"), text.encode('utf-8'))
+        return summary_id
+
+    stages = [
+        Stage('extract', extract, workers['extract']),
+        Stage('explain', explain, workers['explain']),
+        Stage('plan', plan, workers['plan']),
+        Stage('assemble', assemble, workers['assemble']),
+    ]
+    if text_directory:
+        stages.append(Stage('render', render, workers['render']))
+    stages.append(Stage('write', write, workers['write']))
+    return stages
+
+
+def format_stats(report: List[StageStats]) -> str:
+    """Per-stage table for the console"""
+    lines = [f"   {'stage':<9} {'workers':>7} {'done':>6} {'errors':>6} {'max queue':>9} "
+             f"{'busy s':>7} {'cpu s':>6} {'blocked s':>9} {'util':>6}"]
+    for stats in report:
+        lines.append(f"   {stats.name:<9} {stats.workers:>7} {stats.processed:>6} {stats.errors:>6} "
+                     f"{stats.max_queue_depth:>9} {stats.busy_seconds:>7.2f} {stats.cpu_seconds:>6.2f} "
+                     f"{stats.blocked_seconds:>9.2f} {stats.utilization:>6.0%}")
+    return "\n".join(lines)
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import shutil
+    import tempfile
+
+    from benchmarks import make_documents
+    from pipeline import BoomerHealthPipeline
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = BoomerHealthPipeline()
+    documents = make_documents(300)
+
+    class SlowStorageSink(SummarySink):
+        """Sink on storage with a fixed per-write latency (e.g. a network volume)"""
+        latency = 0.0
+
+        def append(self, summary, summary_id=None):
+            time.sleep(self.latency)
+            return super().append(summary, summary_id)
+
+    def timed_run(label, latency, stage_workers=None, sequential=False):
+        output_dir = tempfile.mkdtemp(prefix='staged_')
+        text_dir = os.path.join(output_dir, 'text')
+        os.makedirs(text_dir)
+        SlowStorageSink.latency = latency
+        try:
+            with SlowStorageSink(output_dir, compress=True, buffer_size=50) as sink:
+                stages = summary_stages(pipeline, sink, text_dir, stage_workers)
+                executor = StagedExecutor(stages)
+                start = time.perf_counter()
+                if sequential:
+                    for document in documents:
+                        item = document
+                        for stage in stages:
+                            item = stage.fn(item)
+                else:
+                    executor.run(documents)
+                elapsed = time.perf_counter() - start
+            print(f"\n⚙️  {label}: {len(documents)} documents in {elapsed:.2f}s ({len(documents) / elapsed:.0f}/s)")
+            if not sequential:
+                print(format_stats(executor.stats()))
+                print(f"   Bottleneck: {executor.bottleneck()}")
+            return elapsed
+        finally:
+            shutil.rmtree(output_dir)
+
+    print(f"Local disk ({os.cpu_count()} CPU(s)):")
+    local_sequential = timed_run("Sequential loop", 0.0, sequential=True)
+    local_staged = timed_run("Staged (default workers)", 0.0)
+
+    print("\nStorage with 5 ms per write:")
+    slow_sequential = timed_run("Sequential loop", 0.005, sequential=True)
+    slow_staged = timed_run("Staged (write: 8 workers)", 0.005, {'write': 8})
+
+    print(f"\n🚀 Staged vs sequential: {local_sequential / local_staged:.2f}x on local disk, "
+          f"{slow_sequential / slow_staged:.2f}x with slow storage")
+    pipeline.close()
+
+    # A failing item does not stop the batch
+    executor = StagedExecutor([Stage('parse', int), Stage('double', lambda n: n * 2)], queue_size=2)
+    print(f"\n🧪 Errors pass through: {executor.run(['1', 'x', '3'])}")
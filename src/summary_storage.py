@@ -0,0 +1,470 @@
+"""
+Summary Storage
+Serializes health summaries to disk in pretty, compact, gzip or binary record formats
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from records import json_default
+
+
+# File extension for each supported output format
+FORMATS = {
+    'json': '.json',          # pretty-printed, human readable (indent=2)
+    'compact': '.json',       # no whitespace between tokens
+    'gzip': '.json.gz',       # compact JSON, gzip compressed
+    'binary': '.bhs',         # length-prefixed records, zlib with a boilerplate dictionary
+}
+
+# Binary record layout: magic | dictionary version | flags | payload length | payload
+RECORD_MAGIC = b'BHS1'
+RECORD_HEADER = struct.Struct('>4sBBI')
+FLAG_ZLIB = 0x01
+
+# Preset zlib dictionary of text that repeats in every summary (keys, section
+# titles, disclaimer, reminders). Records name the dictionary version they were
+# written with, so NEVER edit an existing entry - add a new version instead.
+ZDICT_VERSIONS = {
+    1: (
+        '"patient_name": "generated_date": "generated_time": '
+        '"section_1_diagnoses": {"title": "What Your Doctor Found", "diagnoses": '
+        '"test_results": "section_2_medications": {"title": "Your Medications Explained", '
+        '"medications": "section_3_action_plan": {"title": "Your Action Plan", "diet": '
+        '"exercise": "daily_habits": "medication_reminders": '
+        '"section_4_warning_signs": {"title": "Warning Signs - When to Get Help", "warning_signs": '
+        '"section_5_questions": {"title": "Questions to Ask Your Doctor", "questions": '
+        '"section_6_glossary": {"title": "Medical Terms Explained", "abbreviations": '
+        '"metadata": {"input_method": "extraction_quality": "unrecognized_terms": "agent_versions": "v1.0"} '
+        '{"diagnosis": "simple_name": "explanation": "analogy": '
+        '{"medication": "dosage": "See prescription", "what_it_does": '
+        '"reminder": "Take exactly as prescribed. Call your doctor if you have questions or side effects."} '
+        '{"test": "your_value": "what_it_means": "normal_range": "Normal is less than 120/80" '
+        '{"abbreviation": "meaning": '
+        '"\\u26a0\\ufe0f CALL 911 for: Severe chest pain, difficulty breathing, sudden weakness, severe bleeding", '
+        '"Take all medications exactly as prescribed", '
+        '"Don\'t stop taking medications without talking to your doctor first", '
+        '"Use a pill organizer to help remember doses", "Set phone alarms for medication times", '
+        '"Keep a list of all medications with you", '
+        '"What numbers or measurements should I be tracking at home?", '
+        '"When do I need to come back for a follow-up?", '
+        '"What symptoms mean I should call you versus going to the ER?", '
+        '"Are there any support groups or resources you recommend?", '
+        '"disclaimer": "\\u26a0\\ufe0f IMPORTANT DISCLAIMER:\\nThis information is for educational purposes '
+        'only and does not replace medical advice.\\nAlways consult your healthcare provider for medical '
+        'decisions, treatment plans, and \\nquestions about your specific health conditions. If you experience '
+        'emergency symptoms\\nlike chest pain, difficulty breathing, or severe symptoms, call 911 immediately."'
+    ).encode('utf-8'),
+}
+CURRENT_ZDICT_VERSION = 1
+
+# Fields that differ between two runs over the same input, left out of content ids
+VOLATILE_FIELDS = ('generated_date', 'generated_time')
+VOLATILE_METADATA = ('summary_id', 'updated_from')
+
+# mkstemp creates files as 0600; saved files get the usual 0666 minus the umask instead.
+# os.umask can only be read by setting it, so this is done once, at import time.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def to_compact_json(summary: Dict) -> bytes:
+    """Canonical compact encoding (also what content ids are computed from)"""
+    return json.dumps(summary, separators=(',', ':'), sort_keys=True, default=json_default).encode('utf-8')
+
+
+def content_part(summary: Dict) -> Dict:
+    """The summary without its VOLATILE_FIELDS and VOLATILE_METADATA"""
+    content = {field: summary[field] for field in summary.keys() if field not in VOLATILE_FIELDS}
+    if isinstance(content.get('metadata'), dict):
+        content['metadata'] = {key: value for key, value in content['metadata'].items()
+                               if key not in VOLATILE_METADATA}
+    return content
+
+
+def content_id(summary: Dict) -> str:
+    """
+    Stable content-addressed id for a summary
+
+    Only the content counts, so summarizing the same document twice - at
+    another time, under another summary_id - gives the same id.
+    """
+    return hashlib.sha256(to_compact_json(content_part(summary))).hexdigest()
+
+
+def encode_record(summary: Dict) -> bytes:
+    """Encode one summary as a length-prefixed binary record"""
+    compressor = zlib.compressobj(level=9, zdict=ZDICT_VERSIONS[CURRENT_ZDICT_VERSION])
+    payload = compressor.compress(to_compact_json(summary)) + compressor.flush()
+    return RECORD_HEADER.pack(RECORD_MAGIC, CURRENT_ZDICT_VERSION, FLAG_ZLIB, len(payload)) + payload
+
+
+def iter_records(stream: BinaryIO) -> Iterator[Dict]:
+    """Read binary records back one at a time from an open file"""
+    while True:
+        header = stream.read(RECORD_HEADER.size)
+        if not header:
+            return
+        if len(header) < RECORD_HEADER.size:
+            raise ValueError("Truncated record header")
+
+        magic, version, flags, length = RECORD_HEADER.unpack(header)
+        if magic != RECORD_MAGIC:
+            raise ValueError("Not a Boomer Health summary record")
+
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ValueError("Truncated record payload")
+
+        if flags & FLAG_ZLIB:
+            if version not in ZDICT_VERSIONS:
+                raise ValueError(f"Unknown dictionary version: {version}")
+            decompressor = zlib.decompressobj(zdict=ZDICT_VERSIONS[version])
+            payload = decompressor.decompress(payload) + decompressor.flush()
+
+        yield json.loads(payload)
+
+
+def serialize_summary(summary: Dict, fmt: str = 'json') -> bytes:
+    """Encode a summary in one of the FORMATS"""
+    if fmt == 'json':
+        return json.dumps(summary, indent=2, default=json_default).encode('utf-8')
+    if fmt == 'compact':
+        return to_compact_json(summary)
+    if fmt == 'gzip':
+        # mtime=0 keeps the output deterministic for identical summaries
+        return gzip.compress(to_compact_json(summary), compresslevel=9, mtime=0)
+    if fmt == 'binary':
+        return encode_record(summary)
+    raise ValueError(f"Unknown format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write via a temp file in the same directory, then rename over the target"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def save_summary(summary: Dict,
+                 filename: Optional[str] = None,
+                 fmt: str = 'json',
+                 directory: str = '') -> str:
+    """
+    Save a summary atomically
+
+    Args:
+        summary: Final summary from the pipeline
+        filename: Explicit path. When omitted, the name is derived from the
+                  summary's content hash, so two saves never collide.
+        fmt: One of FORMATS
+        directory: Where content-addressed files are written (default: current directory)
+
+    Returns:
+        Path that was written
+    """
+    data = serialize_summary(summary, fmt)
+
+    if filename is None:
+        filename = os.path.join(directory, f"health_summary_{content_id(summary)[:16]}{FORMATS[fmt]}")
+
+    write_atomic(filename, data)
+    return filename
+
+
+def load_summary(filename: str) -> Dict:
+    """Load a summary saved in any of the FORMATS (detected from the file contents)"""
+    with open(filename, 'rb') as f:
+        head = f.read(len(RECORD_MAGIC))
+        f.seek(0)
+
+        if head == RECORD_MAGIC:
+            return next(iter_records(f))
+        if head[:2] == b'\x1f\x8b':
+            return json.loads(gzip.decompress(f.read()))
+        return json.load(f)
+
+
+class SummarySink:
+    """
+    Append-only summary store for batch runs.
+
+    Summaries are buffered in memory and written in bulk to rotating JSONL
+    segment files (optionally gzip, one gzip member per flush), so a backfill
+    touches a handful of large files instead of creating one file - and one
+    fsync - per summary. A small side index (index.tsv) maps each summary id to
+    its (segment, offset) so single records can still be fetched quickly.
+
+    A background thread writes out buffered summaries once they are
+    flush_interval seconds old, even if no more appends arrive; close() (or
+    the context manager) writes the tail of a batch straight away.
+    """
+
+    INDEX_FILE = 'index.tsv'
+
+    def __init__(self,
+                 directory: str,
+                 compress: bool = False,
+                 buffer_size: int = 256,
+                 flush_interval: float = 5.0,
+                 max_segment_bytes: int = 64 * 1024 * 1024,
+                 fsync: bool = True):
+        """
+        Args:
+            directory: Folder for segment files and the index (created if missing)
+            compress: Write .jsonl.gz segments instead of plain .jsonl
+            buffer_size: Number of summaries held in memory before a bulk write
+            flush_interval: Seconds after which buffered summaries are written anyway,
+                            by a background thread (None = only on a full buffer,
+                            flush() or close())
+            max_segment_bytes: Start a new segment once the current one reaches this size
+            fsync: fsync once per flush (not per summary)
+        """
+        self.directory = directory
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync = fsync
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._buffer = []                 # [(summary_id, encoded line)]
+        self._pending = {}                # summary_id -> summary, until flushed
+        self._last_flush = time.monotonic()
+
+        # summary_id -> (segment name, offset, offset inside gzip member)
+        self.index = {}
+        index_path = os.path.join(directory, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            self._load_index(index_path)
+        self._index_file = open(index_path, 'a', encoding='utf-8')
+
+        # Continue the newest segment with the same extension, or start the first one
+        suffix = '.jsonl.gz' if compress else '.jsonl'
+        segments = sorted(name for name in os.listdir(directory)
+                          if name.startswith('segment_') and name.endswith(suffix))
+        self._segment_number = int(segments[-1][len('segment_'):-len(suffix)]) if segments else 1
+        self._suffix = suffix
+        self._open_segment()
+
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, name='summary-sink-flush', daemon=True)
+            self._flusher.start()
+
+    def _load_index(self, index_path: str):
+        """
+        Read index.tsv, dropping a partly written last line (a crash mid-write)
+
+        The torn tail is cut off the file too, so the next entry starts on a
+        fresh line. Its summaries are still in their segment, just not indexed.
+        """
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        if len(complete) != len(data):
+            with open(index_path, 'r+b') as f:
+                f.truncate(len(complete))
+
+        for line in complete.decode('utf-8', errors='replace').splitlines():
+            fields = line.split('\t')
+            if len(fields) != 4 or not (fields[2].isdigit() and fields[3].isdigit()):
+                continue
+            summary_id, segment, offset, inner = fields
+            self.index[summary_id] = (segment, int(offset), int(inner))
+
+    def _flush_periodically(self):
+        """Background thread: write out summaries that have waited flush_interval seconds"""
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_locked()
+
+    def _open_segment(self):
+        """Open the current segment for appending"""
+        self._segment_name = f"segment_{self._segment_number:06d}{self._suffix}"
+        self._segment = open(os.path.join(self.directory, self._segment_name), 'ab')
+        self._segment_size = self._segment.tell()
+
+    def append(self, summary: Dict, summary_id: Optional[str] = None) -> str:
+        """
+        Buffer one summary for writing
+
+        Returns:
+            The summary id (content-addressed unless one is given)
+        """
+        if summary_id is None:
+            summary_id = content_id(summary)
+
+        line = json.dumps({'id': summary_id, 'summary': summary}, separators=(',', ':'), default=json_default).encode('utf-8') + b'\n'
+
+        with self._lock:
+            self._buffer.append((summary_id, line))
+            self._pending[summary_id] = summary
+
+            if (len(self._buffer) >= self.buffer_size or (self.flush_interval and
+                    time.monotonic() - self._last_flush >= self.flush_interval)):
+                self._flush_locked()
+
+        return summary_id
+
+    def flush(self):
+        """Write all buffered summaries to the current segment"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        batch = b''.join(line for _, line in self._buffer)
+        start = self._segment_size
+
+        # Offsets: plain segments index the line directly; gzip segments index
+        # the start of this flush's gzip member plus the line's offset inside it
+        entries = []
+        position = 0
+        for summary_id, line in self._buffer:
+            if self.compress:
+                entries.append((summary_id, start, position))
+            else:
+                entries.append((summary_id, start + position, 0))
+            position += len(line)
+
+        data = gzip.compress(batch, mtime=0) if self.compress else batch
+        self._segment.write(data)
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._segment_size += len(data)
+
+        # Index goes after the data, so it never points past the end of a segment
+        for summary_id, offset, inner in entries:
+            self.index[summary_id] = (self._segment_name, offset, inner)
+            self._index_file.write(f"{summary_id}\t{self._segment_name}\t{offset}\t{inner}\n")
+        self._index_file.flush()
+
+        self._buffer = []
+        self._pending = {}
+
+        if self._segment_size >= self.max_segment_bytes:
+            self._segment.close()
+            self._segment_number += 1
+            self._open_segment()
+
+    def get(self, summary_id: str) -> Dict:
+        """Fetch one summary by id (KeyError if unknown)"""
+        with self._lock:
+            if summary_id in self._pending:
+                return self._pending[summary_id]
+            segment, offset, inner = self.index[summary_id]
+
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            if segment.endswith('.gz'):
+                with gzip.GzipFile(fileobj=f) as member:
+                    member.seek(inner)
+                    line = member.readline()
+            else:
+                line = f.readline()
+
+        return json.loads(line)['summary']
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over every flushed summary, segment by segment"""
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith('segment_'):
+                continue
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(os.path.join(self.directory, name), 'rb') as f:
+                for line in f:
+                    yield json.loads(line)['summary']
+
+    def __len__(self) -> int:
+        """Number of distinct summary ids, flushed or still buffered"""
+        with self._lock:
+            return len(self.index) + sum(1 for summary_id in self._pending if summary_id not in self.index)
+
+    def close(self):
+        """Stop the flush thread, then flush and release the segment and index files"""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._flush_locked()
+            self._segment.close()
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import shutil
+
+    from pipeline import BoomerHealthPipeline
+    from records import to_plain
+
+    with contextlib.redirect_stdout(io.StringIO()), BoomerHealthPipeline() as pipeline:
+        summary = pipeline.process_document(
+            "Diagnoses: Hypertension, Type 2 Diabetes. Metformin 500mg twice daily. "
+            "Lisinopril 10mg daily. BP: 150/95. A1C: 7.4%. Walk 20 minutes daily.",
+            patient_name="Sample Patient"
+        )
+
+    output_dir = tempfile.mkdtemp(prefix='summaries_')
+    print("Format comparison for one summary:")
+    for fmt in FORMATS:
+        path = save_summary(summary, fmt=fmt, directory=output_dir)
+        assert load_summary(path) == to_plain(summary)
+        print(f"   {fmt:<8} {os.path.getsize(path):>6} bytes  {os.path.basename(path)}")
+
+    # Batch run: thousands of summaries into a few JSONL segments
+    print("\nBatch sink (gzip segments):")
+    with SummarySink(output_dir, compress=True, buffer_size=500) as sink:
+        ids = []
+        for i in range(2000):
+            copy = summary.replace(patient_name=f"Patient {i}")
+            ids.append(sink.append(copy))
+        print(f"   Buffered and wrote {len(sink)} summaries")
+
+    segments = [name for name in os.listdir(output_dir) if name.startswith('segment_')]
+    total_bytes = sum(os.path.getsize(os.path.join(output_dir, name)) for name in segments)
+    print(f"   {len(segments)} segment file(s), {total_bytes / 2000:.0f} bytes per summary on disk")
+
+    with SummarySink(output_dir, compress=True) as sink:
+        fetched = sink.get(ids[1234])
+        print(f"   Fetched by id: {fetched['patient_name']}")
+    shutil.rmtree(output_dir)
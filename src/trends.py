@@ -0,0 +1,288 @@
+"""
+Trend Detection - rolling-window rules over stored BP, A1C and weight readings
+Evaluated with NumPy for every patient at once (see patient_store.py for the data)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent2_educator import parse_a1c, parse_systolic
+from lab_registry import LAB_DEFINITIONS
+from records import TrendAlert
+
+# Rule kinds
+RISE = 'rise'        # value rose by at least `amount` above the lowest reading in the window
+SLOPE = 'slope'      # least-squares slope over the window is at least `amount` per day
+ABOVE = 'above'      # value is at least `amount` on `min_readings` readings in a row
+
+# Alert severities
+URGENT = 'urgent'
+DISCUSS = 'discuss'
+
+# Patients are kept apart in the combined sort key by spacing them this many days
+PATIENT_STRIDE = 10_000_000
+
+
+def parse_weight(weight_value: str) -> Optional[float]:
+    """Pounds from a weight reading like "182 lbs" (None if unreadable)"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)', str(weight_value))
+    return float(match.group(1)) if match else None
+
+
+_LAB_KEYS = {lab.key: lab.name.lower() for lab in LAB_DEFINITIONS}
+
+# Trend series: name -> (patient_store item key, parser from stored text to a number)
+SERIES: Dict[str, Tuple[str, Callable[[str], Optional[float]]]] = {
+    'weight': (_LAB_KEYS['weight'], parse_weight),
+    'bp_systolic': (_LAB_KEYS['bp'], parse_systolic),
+    'a1c': (_LAB_KEYS['a1c'], parse_a1c),
+}
+
+
+class TrendRule(NamedTuple):
+    """
+    One rolling-window rule
+
+    message is formatted with {value} (the latest reading), {change} (the
+    rise or slope that triggered) and {days} (the window).
+    """
+    name: str
+    series: str
+    kind: str
+    amount: float
+    window_days: int = 0
+    min_readings: int = 1
+    severity: str = DISCUSS
+    message: str = ''
+
+
+DEFAULT_TREND_RULES = (
+    # Heart failure guidance from Agent 3: call if weight is up 3 lbs in a day or 5 in a week
+    TrendRule('weight_gain_day', 'weight', RISE, 3, window_days=1, severity=URGENT,
+              message="Your weight went up {change:.0f} pounds in a day ({value:.0f} lbs). "
+                      "With heart failure this can mean fluid build-up - call your doctor today."),
+    TrendRule('weight_gain_week', 'weight', RISE, 5, window_days=7, severity=URGENT,
+              message="Your weight went up {change:.0f} pounds within a week ({value:.0f} lbs). "
+                      "With heart failure this can mean fluid build-up - call your doctor."),
+    TrendRule('bp_very_high', 'bp_systolic', ABOVE, 180, severity=URGENT,
+              message="Your top blood pressure number was {value:.0f}. A reading of 180 or higher "
+                      "needs prompt attention - call your doctor, or 911 if you have chest pain or confusion."),
+    TrendRule('bp_high_repeated', 'bp_systolic', ABOVE, 140, min_readings=3,
+              message="Your top blood pressure number has been 140 or higher on your last 3 readings "
+                      "(latest {value:.0f}). Ask your doctor whether your treatment needs a change."),
+    TrendRule('bp_rising', 'bp_systolic', SLOPE, 0.3, window_days=90, min_readings=3,
+              message="Your blood pressure has been creeping up over the last {days} days "
+                      "(about {change:.1f} points a week). Bring your readings to your next visit."),
+    TrendRule('a1c_rising', 'a1c', RISE, 0.5, window_days=200,
+              message="Your A1C rose {change:.1f} points in the last few months (now {value:.1f}%). "
+                      "Ask your doctor about adjusting your diabetes plan."),
+    TrendRule('a1c_very_high', 'a1c', ABOVE, 9.0,
+              message="Your A1C is {value:.1f}%, well above target. Ask your doctor about next steps."),
+)
+
+
+class SeriesTable:
+    """
+    One series for many patients as flat arrays, sorted by patient then day.
+
+    For each reading, window_start(days) gives the index of the first
+    reading of the same patient within `days` before it, so every rule is
+    a handful of whole-array operations.
+    """
+
+    def __init__(self, patient_ids: Sequence[str], days: Sequence[int], values: Sequence[float]):
+        patient_index, patients = pd.factorize(np.asarray(patient_ids, dtype=object), sort=True)
+        days = np.asarray(days, dtype=np.int64)
+        order = np.lexsort((days, patient_index))
+
+        self.patients = patients
+        self.patient = patient_index[order]
+        self.day = days[order]
+        self.value = np.asarray(values, dtype=np.float64)[order]
+        self.index = np.arange(len(self.day))
+        self._key = self.patient.astype(np.int64) * PATIENT_STRIDE + self.day
+        # Last reading of each patient
+        self.is_last = np.ones(len(self.day), dtype=bool)
+        self.is_last[:-1] = self.patient[1:] != self.patient[:-1]
+        self.is_first = np.ones(len(self.day), dtype=bool)
+        self.is_first[1:] = self.patient[1:] != self.patient[:-1]
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def window_start(self, days: int) -> np.ndarray:
+        """Index of the first same-patient reading at most `days` before each reading"""
+        return np.searchsorted(self._key, self._key - days, side='left')
+
+    def rise(self, days: int) -> np.ndarray:
+        """Each reading minus the lowest earlier reading in the window (NaN if none)"""
+        start = self.window_start(days)
+        earlier = self.index - start
+        lowest = np.full(len(self), np.inf)
+        for offset in range(1, int(earlier.max(initial=0)) + 1):
+            has = earlier >= offset
+            previous = self.value[np.maximum(self.index - offset, 0)]
+            lowest = np.minimum(lowest, np.where(has, previous, np.inf))
+        return np.where(np.isfinite(lowest), self.value - lowest, np.nan)
+
+    def slope(self, days: int, min_readings: int = 2) -> np.ndarray:
+        """Least-squares slope per day over the window ending at each reading (NaN if too few)"""
+        start = self.window_start(days)
+        count = (self.index - start + 1).astype(np.float64)
+        x = (self.day - self.day.min(initial=0)).astype(np.float64)
+        y = self.value
+
+        def window_sum(values: np.ndarray) -> np.ndarray:
+            totals = np.concatenate(([0.0], np.cumsum(values)))
+            return totals[self.index + 1] - totals[start]
+
+        sum_x, sum_y = window_sum(x), window_sum(y)
+        sum_xx, sum_xy = window_sum(x * x), window_sum(x * y)
+        denominator = count * sum_xx - sum_x * sum_x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (count * sum_xy - sum_x * sum_y) / denominator
+        return np.where((count >= min_readings) & (denominator > 0), slope, np.nan)
+
+    def run_length(self, condition: np.ndarray) -> np.ndarray:
+        """How many readings in a row (same patient) meet the condition, ending at each one"""
+        breaks = np.where(~condition, self.index, np.where(self.is_first, self.index - 1, -1))
+        return np.where(condition, self.index - np.maximum.accumulate(breaks), 0)
+
+
+class TrendEngine:
+    """
+    Evaluates trend rules over stored readings and produces TrendAlerts.
+
+    Alerts are raised for each patient's latest reading of a series (or
+    every reading since a given date), so a nightly run over every patient
+    and a run for one patient after a visit see the same rules.
+    """
+
+    def __init__(self, rules: Iterable[TrendRule] = DEFAULT_TREND_RULES):
+        self.rules = tuple(rules)
+        for rule in self.rules:
+            if rule.series not in SERIES:
+                raise ValueError(f"Rule {rule.name}: unknown series {rule.series!r}")
+            if rule.kind not in (RISE, SLOPE, ABOVE):
+                raise ValueError(f"Rule {rule.name}: unknown kind {rule.kind!r}")
+
+    def build_tables(self, rows: Iterable[Tuple[str, str, str, str]]) -> Dict[str, SeriesTable]:
+        """SeriesTables from (patient_id, item_key, reading_date, value) rows; unreadable values are skipped"""
+        series_by_key = {item_key: name for name, (item_key, _) in SERIES.items()}
+        columns: Dict[str, Tuple[List, List, List]] = {name: ([], [], []) for name in SERIES}
+        for patient_id, item_key, reading_date, value in rows:
+            name = series_by_key.get(item_key)
+            if name is None:
+                continue
+            number = SERIES[name][1](value)
+            if number is None:
+                continue
+            patients, days, values = columns[name]
+            patients.append(patient_id)
+            days.append(date.fromisoformat(reading_date).toordinal())
+            values.append(number)
+        return {name: SeriesTable(*column) for name, column in columns.items() if column[0]}
+
+    def evaluate_tables(self, tables: Dict[str, SeriesTable], since: Optional[str] = None) -> List[TrendAlert]:
+        """Run every rule; alerts for latest readings (or readings on/after `since`)"""
+        alerts = []
+        for rule in self.rules:
+            table = tables.get(rule.series)
+            if table is None or not len(table):
+                continue
+
+            if rule.kind == RISE:
+                change = table.rise(rule.window_days)
+                fired = change >= rule.amount
+            elif rule.kind == SLOPE:
+                change = table.slope(rule.window_days, rule.min_readings)
+                fired = change >= rule.amount
+                change = change * 7  # Shown per week
+            else:
+                above = table.value >= rule.amount
+                change = table.run_length(above).astype(np.float64)
+                fired = change >= rule.min_readings
+
+            if since is None:
+                fired &= table.is_last
+            else:
+                fired &= table.day >= date.fromisoformat(since).toordinal()
+
+            for i in np.flatnonzero(fired):
+                value = float(table.value[i])
+                alerts.append(TrendAlert(
+                    patient_id=str(table.patients[table.patient[i]]),
+                    rule=rule.name,
+                    series=rule.series,
+                    severity=rule.severity,
+                    message=rule.message.format(value=value, change=float(change[i]), days=rule.window_days),
+                    value=value,
+                    reading_date=date.fromordinal(int(table.day[i])).isoformat(),
+                ))
+        return alerts
+
+    def evaluate(self, rows: Iterable[Tuple[str, str, str, str]], since: Optional[str] = None) -> List[TrendAlert]:
+        """Alerts from (patient_id, item_key, reading_date, value) rows"""
+        return self.evaluate_tables(self.build_tables(rows), since)
+
+    def evaluate_store(self, store, patient_ids: Optional[Iterable[str]] = None,
+                       since: Optional[str] = None) -> List[TrendAlert]:
+        """
+        Evaluate a PatientStore's readings and queue the alerts for each
+        patient's next summary (alerts already queued are not repeated)
+
+        Args:
+            store: patient_store.PatientStore
+            patient_ids: Only these patients (default: everyone)
+            since: Alert on readings from this date on (default: latest readings only)
+        """
+        rows = store.series([item_key for item_key, _ in SERIES.values()], patient_ids)
+        alerts = self.evaluate(rows, since)
+        store.queue_alerts(alerts)
+        return alerts
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import time
+
+    from patient_store import PatientStore
+
+    engine = TrendEngine()
+    with PatientStore() as store:
+        # A heart-failure patient logging weight at home
+        for day, weight in enumerate([182, 182, 183, 183, 184, 185, 188]):
+            store.record_reading('chf-patient', 'Weight', f"{weight} lbs", date(2026, 3, 1 + day))
+        for visit_date, bp in [('2026-01-05', '132/84'), ('2026-02-02', '141/88'),
+                               ('2026-02-20', '146/90'), ('2026-03-06', '152/92')]:
+            store.record_visit('chf-patient', {'test_results': [{'test': 'Blood Pressure', 'value': bp}]}, visit_date)
+
+        alerts = engine.evaluate_store(store)
+        print(f"🔔 {len(alerts)} alerts queued for the next summary:")
+        for alert in store.take_alerts('chf-patient'):
+            icon = "🚨" if alert.severity == URGENT else "📈"
+            print(f"   {icon} [{alert.rule}] {alert.message}")
+        print(f"   Re-running queues {store.queue_alerts(engine.evaluate_store(store))} duplicates")
+
+    # Scale: 20,000 patients x 60 daily weights, all rules at once
+    rng = np.random.default_rng(0)
+    patients, days = 20_000, 60
+    patient_ids = np.repeat(np.array([f"p{i}" for i in range(patients)], dtype=object), days)
+    day_numbers = np.tile(np.arange(days) + date(2026, 1, 1).toordinal(), patients)
+    weights = np.repeat(rng.normal(180, 25, patients), days) + rng.normal(0, 0.5, patients * days)
+    weights[rng.choice(patients * days, 200, replace=False)] += 6  # Some sudden gains
+
+    start = time.perf_counter()
+    tables = {'weight': SeriesTable(patient_ids, day_numbers, weights)}
+    built = time.perf_counter()
+    alerts = engine.evaluate_tables(tables, since='2026-01-01')
+    finished = time.perf_counter()
+    print(f"\n⚡ {patients * days:,} readings: arrays {built - start:.2f}s, "
+          f"rules {finished - built:.2f}s, {len(alerts)} alerts")
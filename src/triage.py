@@ -0,0 +1,251 @@
+"""
+Emergency Triage - a fast scan for emergency signs that runs before Agent 1
+A "Call 911" banner is ready in microseconds; the full summary can follow later
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import re
+from typing import Iterable, Optional
+
+from records import EmergencyAlert
+from renderer import DEFAULT_RENDERER
+from vocabulary import trie_pattern
+
+
+CHEST_PAIN_PHRASES = ('chest pain', 'chest pressure', 'chest tightness', 'pain in my chest', 'crushing chest')
+
+BREATHING_PHRASES = ('shortness of breath', 'short of breath', 'difficulty breathing', 'trouble breathing',
+                     'hard to breathe', "can't breathe", 'cannot breathe', 'struggling to breathe',
+                     'gasping for air')
+
+STROKE_PHRASES = ('facial droop', 'face drooping', 'face is drooping', 'drooping face', 'droopy face',
+                  'slurred speech', 'speech is slurred', 'trouble speaking', 'difficulty speaking',
+                  'weakness on one side', 'one-sided weakness', 'numbness on one side', 'sudden numbness',
+                  'sudden weakness', 'sudden arm weakness', 'sudden confusion', 'stroke symptoms',
+                  'signs of a stroke', 'having a stroke')
+
+# Chest pain only counts together with breathing trouble mentioned this close to it
+CO_OCCURRENCE_CHARS = 200
+
+# Readings at or beyond these are emergencies (hypertensive crisis, hypoglycemia)
+CRISIS_SYSTOLIC = 180
+CRISIS_DIASTOLIC = 120
+LOW_BLOOD_SUGAR = 70
+
+MESSAGES = {
+    'chest_pain_breathing': "Chest pain together with shortness of breath can be a heart attack "
+                            "or a blood clot in the lungs.",
+    'stroke_signs': "These can be signs of a stroke. Note the time the symptoms started.",
+    'bp_crisis': "A blood pressure of {value} is dangerously high ({systolic}/{diastolic} or above).",
+    'low_blood_sugar': "A blood sugar of {value} is dangerously low (below {limit}).",
+}
+
+READING_PHRASES = {
+    'bp': ('blood pressure', 'bp'),
+    'sugar': ('blood sugar', 'blood glucose', 'glucose', 'bg', 'fbg', 'cbg'),
+}
+
+# Headings that start a section about what to watch for, not what is happening now
+GUIDANCE_PHRASES = ('call 911', 'call your doctor', 'call your provider', 'seek emergency', 'seek immediate',
+                    'warning signs', 'emergency signs', 'when to call', 'return precautions', 'go to the er')
+
+PHRASE_KINDS = {phrase: kind for kind, phrases in (
+    ('chest', CHEST_PAIN_PHRASES), ('breathing', BREATHING_PHRASES + ('sob',)), ('stroke', STROKE_PHRASES),
+    ('guidance', GUIDANCE_PHRASES), *READING_PHRASES.items()) for phrase in phrases}
+
+# Every phrase the scan looks for as one case-sensitive trie regex over the
+# lower-cased text: a literal-prefixed pattern the regex engine can skip
+# through quickly, so the scan costs a few nanoseconds per character
+EMERGENCY_PATTERN = re.compile(trie_pattern(PHRASE_KINDS))
+
+# What follows a reading phrase: "BP: 192/124", "BP 185 over 110", "glucose was 54 mg/dL"
+BP_READING = re.compile(r"[^\d\n]{0,20}?(\d{2,3})[ \t]*(?:/|over)[ \t]*(\d{2,3})\b")
+# Later blood pressures in the same sentence ("140/90, then 195/125 an hour later")
+BP_VALUE = re.compile(r"\b(\d{2,3})[ \t]*(?:/|over)[ \t]*(\d{2,3})\b")
+SUGAR_READING = re.compile(r"([^\d\n]{0,20}?)(\d{2,3})\b(?![ \t]*(?:mmol|%|\.\d))")
+
+# Section heading lines (same shape as Agent 1's): "TITLE:" at the start of a line
+HEADING_PATTERN = re.compile(r"^[ \t]*(?:\d+[.)][ \t]*)?[A-Za-z][A-Za-z0-9 /&,()'+-]{1,60}?[ \t]*:", re.MULTILINE)
+
+# Words just before a mention that make it conditional or negative
+# ("call if you have chest pain", "denies shortness of breath")
+CONDITIONAL_CUE = re.compile(r"\b(?:if|when|unless|call|seek|watch|return|denies|denied|no|not|without|"
+                             r"negative for|goal|target)\b")
+
+# A number after one of these is a threshold ("below 70"), not a reading
+THRESHOLD_CUE = re.compile(r"\b(?:below|under|less than|above|over|goal|target|range)\b|[<>]")
+
+# A cue only reaches this many words ahead, and never past a comma, "but" or
+# the end of a sentence (NegEx-style scope): "no chest pain yesterday but
+# today I have chest pain", "severe chest pain, not able to catch breath,
+# short of breath"
+CUE_WINDOW_WORDS = 5
+CUE_WINDOW_CHARS = 100
+CUE_SCOPE_BREAK = re.compile(r"[,.;\n]|\bbut\b")
+
+# How far ahead to look for the end of the sentence a reading is in
+MAX_SENTENCE_CHARS = 300
+SENTENCE_END = re.compile(r"[\n;]|\.(?!\d)")
+
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    """True if text[start:end] is not part of a longer word"""
+    return ((start == 0 or not text[start - 1].isalnum())
+            and (end == len(text) or not text[end].isalnum()))
+
+
+def _cue_window(text: str, position: int) -> str:
+    """The last few words before position that are still in a cue's scope"""
+    prefix = text[max(0, position - CUE_WINDOW_CHARS):position]
+    scope_start = 0
+    for scope_break in CUE_SCOPE_BREAK.finditer(prefix):
+        scope_start = scope_break.end()
+    return ' '.join(prefix[scope_start:].split()[-CUE_WINDOW_WORDS:])
+
+
+def _sentence_end(text: str, position: int) -> int:
+    """Where the sentence (within its line) containing position ends"""
+    limit = min(len(text), position + MAX_SENTENCE_CHARS)
+    end = SENTENCE_END.search(text, position, limit)
+    return end.start() if end else limit
+
+
+def _bp_readings(lowered: str, end: int):
+    """
+    Blood pressures for a "blood pressure" mention ending at end: the
+    reading right after it, then any later ones in the same sentence that
+    are not thresholds ("call if over 180/120")
+    """
+    reading = BP_READING.match(lowered, end)
+    if reading is None:
+        return
+    yield reading
+    for reading in BP_VALUE.finditer(lowered, reading.end(), _sentence_end(lowered, reading.end())):
+        window = _cue_window(lowered, reading.start())
+        if not (CONDITIONAL_CUE.search(window) or THRESHOLD_CUE.search(window)):
+            yield reading
+
+
+def triage(text: str) -> Optional[EmergencyAlert]:
+    """
+    Scan a document for emergency signs, stopping at the first one
+
+    Looks for chest pain with shortness of breath, stroke signs, a blood
+    pressure of 180/120 or higher and a blood sugar below 70. Mentions
+    in warning sections ("Call 911 if:") and mentions a few words after a
+    conditional or negative cue ("call if you have chest pain", "no
+    shortness of breath") are not emergencies and are skipped.
+
+    Args:
+        text: Document text (capped by deadlines.apply_input_limits when limits are set)
+
+    Returns:
+        EmergencyAlert for the first emergency sign, or None
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few non-ASCII characters change length when lower-cased; keep offsets aligned
+        lowered = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+    guidance_end = -1       # A guidance section runs from its heading to the next heading
+    last_chest = last_breathing = None
+
+    for match in EMERGENCY_PATTERN.finditer(lowered):
+        start, end = match.span()
+        if not _is_word(lowered, start, end):
+            continue
+        kind = PHRASE_KINDS[match[0]]
+
+        if kind == 'guidance':
+            # "Call 911 if:" heads a section; "call 911 if this happens" is just a sentence
+            line_end = lowered.find('\n', end)
+            line_end = len(lowered) if line_end < 0 else line_end
+            if line_end >= guidance_end and lowered.find(':', end, line_end) >= 0:
+                heading = HEADING_PATTERN.search(text, line_end)
+                guidance_end = heading.start() if heading else len(text)
+            continue
+        if start < guidance_end or CONDITIONAL_CUE.search(_cue_window(lowered, start)):
+            continue
+
+        if kind == 'chest' or kind == 'breathing':
+            if kind == 'chest':
+                last_chest = (start, end)
+            else:
+                last_breathing = (start, end)
+            if last_chest and last_breathing and abs(last_chest[0] - last_breathing[0]) <= CO_OCCURRENCE_CHARS:
+                first, second = sorted((last_chest, last_breathing))
+                return EmergencyAlert('chest_pain_breathing', MESSAGES['chest_pain_breathing'],
+                                      text[first[0]:second[1]])
+
+        elif kind == 'stroke':
+            return EmergencyAlert('stroke_signs', MESSAGES['stroke_signs'], text[start:end])
+
+        elif kind == 'bp':
+            for reading in _bp_readings(lowered, end):
+                systolic, diastolic = int(reading[1]), int(reading[2])
+                # Skip things that are not blood pressures at all (dates, ratios)
+                if 60 <= systolic <= 300 and 30 <= diastolic <= 200 and systolic > diastolic and (
+                        systolic >= CRISIS_SYSTOLIC or diastolic >= CRISIS_DIASTOLIC):
+                    return EmergencyAlert('bp_crisis', MESSAGES['bp_crisis'].format(
+                        value=f"{systolic}/{diastolic}", systolic=CRISIS_SYSTOLIC, diastolic=CRISIS_DIASTOLIC),
+                        text[start:reading.end()])
+
+        elif kind == 'sugar':
+            reading = SUGAR_READING.match(lowered, end)
+            if reading and 10 <= int(reading[2]) < LOW_BLOOD_SUGAR and not THRESHOLD_CUE.search(reading[1]):
+                return EmergencyAlert('low_blood_sugar', MESSAGES['low_blood_sugar'].format(
+                    value=int(reading[2]), limit=LOW_BLOOD_SUGAR), text[start:reading.end()])
+
+    return None
+
+
+def form_text(diagnoses: Iterable[str] = (), test_results: Iterable = ()) -> str:
+    """
+    Guided-form fields as text for triage(): each diagnosis on its own line,
+    then each reading as "Test: value" (e.g. "Blood Pressure: 210/130")
+    """
+    lines = list(diagnoses)
+    lines.extend(f"{result['test']}: {result['value']}" for result in test_results)
+    return '\n'.join(lines)
+
+
+def emergency_banner(alert: EmergencyAlert) -> str:
+    """The "Call 911" banner for an alert, as shown at the top of the summary"""
+    return DEFAULT_RENDERER.to_string(DEFAULT_RENDERER.render_emergency, alert)
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import timeit
+
+    samples = {
+        "Patient message": "Since this morning I have chest pain and I am short of breath when I walk.",
+        "Home reading": "Blood pressure this morning: 192/124. Took my lisinopril.",
+        "Low sugar": "Glucose: 54 mg/dL at 3am, felt shaky.",
+        "Stroke signs": "My husband has slurred speech and his face is drooping on the left.",
+        "Discharge paper": """
+        DIAGNOSES: Congestive Heart Failure
+        Blood Pressure: 142/88 mmHg
+        Glucose: 112 mg/dL
+        Patient denies chest pain or shortness of breath.
+
+        SEEK EMERGENCY CARE (CALL 911) IF:
+        - Severe chest pain
+        - Extreme difficulty breathing
+        - Facial droop or slurred speech
+        - Blood sugar below 70 that does not come up
+        """,
+    }
+
+    for name, text in samples.items():
+        alert = triage(text)
+        seconds = min(timeit.repeat(lambda: triage(text), number=1000, repeat=3)) / 1000
+        if alert:
+            print(f"🚨 {name}: {alert.rule} ({seconds * 1e6:.0f} µs) - \"{alert.evidence}\"")
+        else:
+            print(f"✅ {name}: no emergency signs ({seconds * 1e6:.0f} µs)")
+
+    print()
+    print(emergency_banner(triage(samples["Home reading"])), end='')
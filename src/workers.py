@@ -0,0 +1,326 @@
+"""
+Worker Supervisor - pre-forked workers that share the parent's agents
+Agents and compiled patterns are built once in the parent, frozen, then
+inherited copy-on-write by every worker
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import gc
+import os
+import queue
+import signal
+import threading
+from multiprocessing import Pipe
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WorkerError(Exception):
+    """A job raised inside a worker (message carries the original error)"""
+
+
+class WorkerCrashed(Exception):
+    """A worker died while running a job (it has been replaced)"""
+
+
+class WorkerTimeout(WorkerCrashed):
+    """A worker took too long and was killed (it has been replaced)"""
+
+
+def read_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Memory of a process in KB from /proc/<pid>/smaps_rollup (Linux only)
+
+    Returns:
+        {'rss', 'pss', 'uss', 'shared'} or None if unavailable. USS (private
+        clean + private dirty) is what the process would free on exit;
+        shared pages are the ones still shared copy-on-write with the parent.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+    }
+
+
+def _worker_main(conn, state, handle: Callable, max_jobs: Optional[int], teardown: Optional[Callable]):
+    """Child process loop: run jobs from the pipe until told to stop or max_jobs is reached"""
+    # Own process group, so a kill from the parent also reaches any processes this worker starts
+    os.setpgid(0, 0)
+    # Ctrl+C is handled by the parent, which then stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs = 0
+    try:
+        while max_jobs is None or jobs < max_jobs:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            try:
+                result = (True, handle(state, job))
+            except Exception as exc:
+                result = (False, f"{type(exc).__name__}: {exc}")
+            conn.send(result)
+            jobs += 1
+    finally:
+        conn.close()
+        try:
+            if teardown is not None:
+                # os._exit skips atexit and finalizers: release what the jobs started first
+                teardown(state)
+        finally:
+            os._exit(0)
+
+
+class _Worker:
+    """Parent-side handle on one forked worker"""
+    __slots__ = ('pid', 'conn', 'jobs', 'generation')
+
+    def __init__(self, pid: int, conn, generation: int = 0):
+        self.pid = pid
+        self.conn = conn
+        self.jobs = 0
+        self.generation = generation
+
+
+class WorkerSupervisor:
+    """
+    Forks a fixed set of workers from a parent that already built the agents.
+
+    setup() runs once in the parent; its result (the warm pipeline, lookup
+    tables, compiled regexes) is moved to the GC's permanent generation with
+    gc.freeze() before forking, so the workers' garbage collections never
+    write to those pages and they stay shared instead of being copied into
+    every worker. Each worker runs handle(state, job) for the jobs it is
+    given and is replaced with a fresh fork after max_jobs documents, which
+    caps slow memory growth in long-running workers.
+
+    A worker that exits runs teardown(state) first, to shut down anything
+    its jobs started (process pools, temp files). Each worker leads its own
+    process group, so a worker killed on timeout takes its child processes
+    with it.
+
+    reload() rebuilds the shared state (e.g. after a vocabulary change)
+    while the old workers keep serving; each old worker is replaced by a
+    fork of the new state the next time it comes free.
+
+    POSIX only (needs os.fork).
+    """
+
+    def __init__(self,
+                 setup: Callable[[], Any],
+                 handle: Callable[[Any, Any], Any],
+                 workers: Optional[int] = None,
+                 max_jobs: Optional[int] = 500,
+                 teardown: Optional[Callable[[Any], None]] = None):
+        """
+        Args:
+            setup: Builds the shared state (runs once, in the parent)
+            handle: Runs one job in a worker: handle(state, job) -> result
+            workers: Number of worker processes (default: one per CPU)
+            max_jobs: Documents per worker before it is replaced (None = never)
+            teardown: Runs in a worker just before it exits: teardown(state)
+        """
+        self.setup = setup
+        self.handle = handle
+        self.teardown = teardown
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.restarts = 0
+        self.state = None
+        self.generation = 0
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._all: Dict[int, _Worker] = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """Build the shared state, freeze it and fork the workers"""
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("WorkerSupervisor needs os.fork (Linux or macOS)")
+
+        self.state = self.setup()
+        gc.collect()
+        gc.freeze()
+
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+        self._started = True
+
+    def _spawn(self) -> _Worker:
+        """Fork one worker (caller holds no worker lock)"""
+        parent_conn, child_conn = Pipe()
+        with self._lock:
+            pid = os.fork()
+            if pid == 0:
+                # Keep only this worker's own pipe end
+                parent_conn.close()
+                for other in self._all.values():
+                    other.conn.close()
+                _worker_main(child_conn, self.state, self.handle, self.max_jobs, self.teardown)
+            child_conn.close()
+            try:
+                # Also set from the parent, so a kill right after fork already finds the group
+                os.setpgid(pid, pid)
+            except OSError:
+                pass
+            worker = _Worker(pid, parent_conn, self.generation)
+            self._all[pid] = worker
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False):
+        """Reap a worker that exited (or kill it) and fork its replacement"""
+        with self._lock:
+            self._all.pop(worker.pid, None)
+        worker.conn.close()
+        if kill:
+            try:
+                os.killpg(worker.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        try:
+            os.waitpid(worker.pid, 0)
+        except ChildProcessError:
+            pass
+
+        if self._started:
+            self.restarts += 1
+            self._idle.put(self._spawn())
+
+    def reload(self, setup: Optional[Callable[[], Any]] = None):
+        """
+        Build new shared state and roll the workers over to it
+
+        Jobs keep running on the old workers while the new state is built;
+        afterwards every old worker is retired as soon as it is free.
+
+        Args:
+            setup: New state builder (default: the one given at construction)
+        """
+        with self._reload_lock:
+            if setup is not None:
+                self.setup = setup
+            state = self.setup()
+            with self._lock:
+                # The old state no longer needs to stay frozen
+                gc.unfreeze()
+                self.state = state
+                gc.collect()
+                gc.freeze()
+                self.generation += 1
+
+    def run(self, job, timeout: Optional[float] = None):
+        """
+        Run a job on the next free worker (blocks until one is free)
+
+        Raises:
+            WorkerError: the job raised an exception
+            WorkerCrashed: the worker died
+            WorkerTimeout: the worker took longer than timeout
+        """
+        worker = self._idle.get()
+        while worker.generation != self.generation:
+            # Forked before the last reload: replace it, then take the next free one
+            self._retire(worker)
+            worker = self._idle.get()
+        try:
+            worker.conn.send(job)
+            if not worker.conn.poll(timeout):
+                self._retire(worker, kill=True)
+                raise WorkerTimeout(f"Worker {worker.pid} timed out after {timeout}s")
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            self._retire(worker, kill=True)
+            raise WorkerCrashed(f"Worker {worker.pid} died: {exc}") from None
+
+        worker.jobs += 1
+        if worker.generation != self.generation or (self.max_jobs is not None and worker.jobs >= self.max_jobs):
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        if not ok:
+            raise WorkerError(value)
+        return value
+
+    def memory_report(self) -> List[Dict]:
+        """Per-worker memory (KB) and job counts, plus the parent"""
+        with self._lock:
+            workers = list(self._all.values())
+        report = [dict(pid=os.getpid(), role='parent', jobs=None, **(read_memory(os.getpid()) or {}))]
+        for worker in workers:
+            report.append(dict(pid=worker.pid, role='worker', jobs=worker.jobs, **(read_memory(worker.pid) or {})))
+        return report
+
+    def close(self):
+        """Stop every worker"""
+        self._started = False
+        with self._lock:
+            workers = list(self._all.values())
+            self._all.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.conn.close()
+        for worker in workers:
+            try:
+                os.waitpid(worker.pid, 0)
+            except ChildProcessError:
+                pass
+        gc.unfreeze()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    from benchmarks import make_documents
+
+    def build_pipeline():
+        from pipeline import BoomerHealthPipeline
+        with contextlib.redirect_stdout(io.StringIO()):
+            return BoomerHealthPipeline()
+
+    def summarize(pipeline, document):
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = pipeline.process_document(document)
+        pipeline.clear_history()
+        return len(summary['section_2_medications']['medications'])
+
+    documents = make_documents(40)
+    with WorkerSupervisor(build_pipeline, summarize, workers=4, max_jobs=8) as supervisor:
+        results = [supervisor.run(document, timeout=30) for document in documents]
+        print(f"✅ {len(results)} documents processed, {supervisor.restarts} worker restarts (every 8 documents)")
+
+        print("\nMemory per process (KB):")
+        for row in supervisor.memory_report():
+            if 'uss' in row:
+                print(f"   {row['role']:<6} pid {row['pid']:<7} rss {row['rss']:>7}  "
+                      f"unique {row['uss']:>7}  shared {row['shared']:>7}")
+            else:
+                print(f"   {row['role']:<6} pid {row['pid']:<7} (no /proc/<pid>/smaps_rollup on this system)")
@@ -0,0 +1,13 @@
+"""
+Test configuration - modules in src/ import each other by plain name
+(from records import ...), so src/ goes on the path the same way
+running `python pipeline.py` from src/ would put it there.
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
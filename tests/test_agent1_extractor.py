@@ -0,0 +1,152 @@
+"""
+Tests for Agent 1's section-aware extraction (agent1_extractor.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+from agent1_extractor import MedicalExtractor
+
+
+# The discharge paper from the pipeline.py demo
+SAMPLE_DOCUMENT = """
+    DISCHARGE SUMMARY
+    Patient: Mary Johnson | Age: 72 | Date: November 25, 2025
+
+    DISCHARGE DIAGNOSES:
+    1. Congestive Heart Failure (CHF), acute exacerbation
+    2. Hypertension, uncontrolled
+    3. Type 2 Diabetes Mellitus
+
+    VITAL SIGNS AT DISCHARGE:
+    Blood Pressure: 142/88 mmHg
+    Heart Rate: 78 bpm
+    Weight: 198 lbs (up 12 lbs from baseline)
+    A1C: 8.2%
+
+    MEDICATIONS PRESCRIBED:
+    1. Furosemide 40mg - Take one tablet by mouth once daily in the morning
+    2. Lisinopril 20mg - Take one tablet by mouth once daily
+    3. Metformin 1000mg - Take one tablet by mouth twice daily with meals
+    4. Aspirin 81mg - Take one tablet by mouth once daily
+
+    CHIEF COMPLAINT ON ADMISSION:
+    Patient presented with shortness of breath, significant leg swelling,
+    and fatigue for the past 3 days.
+
+    HOSPITAL COURSE:
+    Patient responded well to diuretic therapy. Fluid overload improved.
+    Shortness of breath resolved. Patient is now able to lie flat without
+    difficulty breathing.
+
+    DISCHARGE INSTRUCTIONS:
+    1. Weigh yourself every morning before breakfast and after using bathroom
+    2. Call Dr. Smith if weight increases by 3 pounds in one day or 5 pounds in one week
+    3. Limit sodium intake to 2000mg per day
+    4. Avoid salty foods: chips, canned soups, deli meats, pickles, restaurant food
+    5. Limit fluid intake to 2 liters (8 cups) per day
+    6. Take all medications as prescribed
+    7. Monitor blood pressure at home daily
+    8. Walk 10-15 minutes daily as tolerated
+
+    FOLLOW-UP APPOINTMENTS:
+    - Cardiology: Dr. Sarah Smith - December 2, 2025 (1 week)
+    - Primary Care: Dr. James Brown - December 9, 2025 (2 weeks)
+
+    CALL YOUR DOCTOR IF YOU EXPERIENCE:
+    - Sudden weight gain (3+ pounds in a day)
+    - Increased swelling in legs or abdomen
+    - Worsening shortness of breath
+    - Chest pain or pressure
+    - Dizziness or fainting
+
+    SEEK EMERGENCY CARE (CALL 911) IF:
+    - Severe chest pain
+    - Extreme difficulty breathing
+    - Confusion or altered mental status
+    """
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return MedicalExtractor()
+
+
+def test_sample_document_follow_ups_come_from_their_section(extractor):
+    extracted = extractor.extract_all(SAMPLE_DOCUMENT)
+    assert extracted['followups'] == [
+        'Cardiology: Dr. Sarah Smith - December 2, 2025 (1 week)',
+        'Primary Care: Dr. James Brown - December 9, 2025 (2 weeks)',
+    ]
+
+
+def test_sample_document_instructions_are_the_numbered_lines(extractor):
+    instructions = extractor.extract_all(SAMPLE_DOCUMENT)['instructions']
+    assert len(instructions) == 8
+    assert 'Call Dr. Smith if weight increases by 3 pounds in one day or 5 pounds in one week' in instructions
+    assert not any('Cardiology' in instruction for instruction in instructions)
+
+
+def test_warning_sign_symptoms_are_kept(extractor):
+    symptoms = extractor.extract_all(SAMPLE_DOCUMENT)['symptoms']
+    for symptom in ('Shortness Of Breath', 'Fatigue', 'Chest Pain', 'Dizziness', 'Confusion'):
+        assert symptom in symptoms
+
+
+def test_wrapped_bullet_lines_join_their_item(extractor):
+    document = "FOLLOW-UP:\n- Cardiology with Dr. Smith,\n  bring your weight log\n- Labs on Monday\n"
+    assert extractor.extract_all(document)['followups'] == [
+        'Cardiology with Dr. Smith, bring your weight log',
+        'Labs on Monday',
+    ]
+
+
+def test_without_sections_indicator_words_pick_follow_ups(extractor):
+    document = "Your heart is doing better. Follow up with cardiology in 2 weeks. Rest today."
+    assert extractor.extract_all(document)['followups'] == ['Follow up with cardiology in 2 weeks']
+
+
+@pytest.mark.parametrize('text', [
+    "I was aspiring to walk more after my Lasik surgery.",
+    "Walking and breakfast are part of my morning routine.",
+    "Lasik eye surgery, aspiring marathon runner, likes lasagna.",
+])
+def test_english_near_misses_are_not_medications(extractor, text):
+    for input_method in ('free_text', 'photo_ocr', 'pdf'):
+        assert extractor.extract_all(text, input_method)['medications'] == []
+
+
+def test_short_near_miss_next_to_a_dosage_is_not_corrected(extractor):
+    names = [med.name for med in extractor.extract_medications("Lasik 20mg daily", ocr=True)]
+    assert 'Lasix' not in names
+
+
+def test_ocr_garbled_names_are_recovered_from_ocr_input(extractor):
+    text = "Lisinoprll 10mg daily\nMetf0rmin 500 mg twice daily\nAtorvastatn 20mg at night"
+    names = [med.name for med in extractor.extract_all(text, 'photo_ocr')['medications']]
+    assert {'Lisinopril', 'Metformin', 'Atorvastatin'} <= set(names)
+
+
+def test_typed_text_is_not_fuzzy_matched(extractor):
+    names = [med.name for med in extractor.extract_all("Lisinoprll 10mg daily", 'free_text')['medications']]
+    assert 'Lisinopril' not in names
+
+
+@pytest.mark.parametrize('fields, field', [
+    ({'medications': [{'name': 'Lisinopril', 'dosage': 10}]}, 'medications'),
+    ({'diagnoses': ['Hypertension', 42]}, 'diagnoses'),
+    ({'test_results': [{'test': 'A1C', 'value': 8.2}]}, 'test_results'),
+    ({'instructions': "Walk daily"}, 'instructions'),
+])
+def test_structured_fields_of_the_wrong_type_name_the_field(extractor, fields, field):
+    with pytest.raises(ValueError, match=f"'{field}'"):
+        extractor.extract_structured(**fields)
+
+
+def test_structured_names_keep_the_lexicon_spelling(extractor):
+    extracted = extractor.extract_structured(diagnoses=['chf', 'hypertension'],
+                                             medications=[{'name': 'lisinopril', 'dosage': '10mg'}])
+    assert extracted['diagnoses'] == ['CHF', 'Hypertension']
+    assert [med.name for med in extracted['medications']] == ['Lisinopril']
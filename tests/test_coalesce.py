@@ -0,0 +1,66 @@
+"""
+Tests for request coalescing (coalesce.py) and the pipeline's async entry point
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import asyncio
+import contextlib
+import io
+import threading
+
+import pytest
+
+from coalesce import AsyncSingleFlight
+
+
+def test_async_single_flight_shares_one_run():
+    flight = AsyncSingleFlight()
+
+    async def main():
+        async def work():
+            await asyncio.sleep(0.01)
+            return object()
+
+        return await asyncio.gather(*(flight.do('key', work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert all(result is results[0] for result in results)
+    assert (flight.executed, flight.coalesced) == (1, 4)
+
+
+def test_async_single_flight_refuses_a_second_loop():
+    flight = AsyncSingleFlight()
+
+    async def work():
+        return 1
+
+    asyncio.run(flight.do('key', work))
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(RuntimeError):
+            loop.run_until_complete(flight.do('key', work))
+    finally:
+        loop.close()
+
+
+def test_process_document_async_works_on_several_loops():
+    from pipeline import BoomerHealthPipeline
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = BoomerHealthPipeline()
+
+        async def summarize():
+            return await asyncio.gather(*(pipeline.process_document_async("Hypertension. Lisinopril 10mg daily.")
+                                          for _ in range(3)))
+
+        first = asyncio.run(summarize())
+        results = []
+        thread = threading.Thread(target=lambda: results.append(asyncio.run(summarize())))
+        thread.start()
+        thread.join()
+
+    assert all(summary is first[0] for summary in first)
+    assert len(results) == 1 and all(summary is results[0][0] for summary in results[0])
+    assert first[0]['section_2_medications']['medications'][0]['medication'] == 'Lisinopril'
@@ -0,0 +1,102 @@
+"""
+Tests for input limits and request deadlines (deadlines.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+from agent1_extractor import MedicalExtractor
+from deadlines import DEFAULT_LIMITS, HEADING_SHAPE, Deadline, InputLimits, apply_input_limits
+from pipeline import BoomerHealthPipeline
+from triage import triage
+
+
+class TickingClock:
+    """Fake monotonic clock that moves forward a fixed step every time it is read"""
+
+    def __init__(self, step: float):
+        self.step = step
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+DOCUMENT = """
+DIAGNOSES:
+Hypertension
+MEDICATIONS:
+Lisinopril 10mg daily
+Metformin 500mg twice daily
+FOLLOW-UP:
+- Primary care in 2 weeks
+INSTRUCTIONS:
+- Walk 20 minutes daily
+"""
+
+
+@pytest.mark.parametrize('unit', [
+    "Patient is stable. Medications: continue as before. ",
+    "word Diagnosis: hypertension ",
+    "ab: ",
+    "Medications:",
+])
+def test_wrapped_pieces_never_start_like_a_heading(unit):
+    text, _ = apply_input_limits(unit * 5_000, InputLimits(max_line_chars=500))
+    lines = text.split('\n')
+    assert len(lines) > 1
+    assert not any(HEADING_SHAPE.match(line) for line in lines[1:])
+    assert max(map(len, lines)) <= 500 + 61
+
+
+def test_wrapping_cuts_after_sentences_so_triage_phrases_survive():
+    sentence = "Since this morning I have chest pain and I am short of breath when I walk. "
+    text, _ = apply_input_limits("Note: " + sentence * 300, InputLimits(max_line_chars=500))
+    assert all(line.endswith('walk.') for line in text.split('\n')[:-1])
+    assert triage(text).rule == 'chest_pain_breathing'
+
+
+def test_no_limits_means_no_caps():
+    document = "x" * (DEFAULT_LIMITS.max_chars + 10)
+    assert apply_input_limits(document, None) == (document, [])
+
+
+def test_pipeline_caps_input_only_with_a_budget_or_explicit_limits():
+    assert BoomerHealthPipeline().input_limits is None
+    assert BoomerHealthPipeline(budget_seconds=5.0).input_limits == DEFAULT_LIMITS
+    limits = InputLimits(max_chars=1_000)
+    assert BoomerHealthPipeline(input_limits=limits).input_limits == limits
+
+
+def test_expired_extract_stage_skips_the_remaining_fields():
+    # Every clock read moves 1s on; the extract stage ends at 0.6 * 10s
+    deadline = Deadline(10.0, clock=TickingClock(1.0))
+    extracted = MedicalExtractor().extract_all(DOCUMENT, "free_text", deadline)
+    assert [med.name for med in extracted['medications']] == ['Lisinopril', 'Metformin']
+    assert extracted['skipped_fields']
+    assert 'flagged_terms' in extracted['skipped_fields']
+    assert all(extracted[field] == [] for field in extracted['skipped_fields'])
+
+
+def test_fuzzy_lookups_stop_at_the_deadline():
+    extractor = MedicalExtractor()
+    text = "Lisinoprll 10mg daily and Furosemlde in the morning"
+    assert [med.name for med in extractor.extract_medications(text, ocr=True)] == ['Lisinopril', 'Furosemide']
+    # Furosemlde has no dosage after it, so only the fuzzy pass finds it
+    spent = Deadline(1.0, clock=TickingClock(10.0))
+    assert [med.name for med in extractor.extract_medications(text, ocr=True, deadline=spent)] == ['Lisinopril']
+
+
+def test_budget_expiry_marks_the_summary_incomplete():
+    pipeline = BoomerHealthPipeline(budget_seconds=10.0)
+    pipeline.new_deadline = lambda: Deadline(10.0, clock=TickingClock(4.0))
+    summary = pipeline.process_document(DOCUMENT, patient_name="Mary Johnson")
+    metadata = summary['metadata']
+    assert metadata['incomplete'] is True
+    reasons = ' '.join(metadata['incomplete_reasons'])
+    assert "not looked for in time" in reasons
+    assert "Detailed explanations were skipped" in reasons
+    assert "Diet, exercise and daily habit tips were skipped" in reasons
@@ -0,0 +1,105 @@
+"""
+Tests for visit history and the merged patient view (patient_store.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+from patient_store import PatientStore
+from records import Medication
+
+
+PATIENT = 'patient-001'
+
+
+def visit(diagnoses=(), medications=(), tests=()):
+    """An Agent 1 extraction with just the fields the store reads"""
+    return {
+        'diagnoses': list(diagnoses),
+        'medications': [{'name': name, 'dosage': dosage} for name, dosage in medications],
+        'test_results': [{'test': test, 'value': value} for test, value in tests],
+    }
+
+
+@pytest.fixture
+def store():
+    with PatientStore() as store:
+        yield store
+
+
+def medications(store):
+    return [(med.name, med.dosage) for med in store.current_view(PATIENT).medications]
+
+
+def test_first_visit_has_no_previous_visit_and_no_changes(store):
+    assert store.current_view(PATIENT) is None
+    delta = store.record_visit(PATIENT, visit(['Hypertension'], [('Lisinopril', '10mg')], [('BP', '150/95')]),
+                               '2026-01-10')
+    assert delta.previous_visit_date == ''
+    assert not delta.has_changes()
+
+    view = store.current_view(PATIENT)
+    assert (view.as_of, view.visit_count) == ('2026-01-10', 1)
+    assert view.diagnoses == ['Hypertension']
+    assert medications(store) == [('Lisinopril', '10mg')]
+
+
+def test_lab_only_visit_does_not_stop_medications(store):
+    store.record_visit(PATIENT, visit(['Hypertension'], [('Lisinopril', '10mg'), ('Aspirin', '81mg')],
+                                      [('A1C', '7.4%')]), '2026-01-10')
+    delta = store.record_visit(PATIENT, visit(tests=[('A1C', '6.9%')]), '2026-02-10')
+
+    assert delta.stopped_medications == []
+    assert delta.changed_tests == [{'test': 'A1C', 'previous': '7.4%', 'current': '6.9%'}]
+    assert medications(store) == [('Lisinopril', '10mg'), ('Aspirin', '81mg')]
+
+    # The next visit with medications is compared with the last list, not the lab visit
+    delta = store.record_visit(PATIENT, visit(medications=[('Lisinopril', '20mg')]), '2026-03-10')
+    assert delta.previous_visit_date == '2026-02-10'
+    assert delta.stopped_medications == [Medication('Aspirin', '81mg')]
+    assert delta.changed_dosages == [{'name': 'Lisinopril', 'previous': '10mg', 'current': '20mg'}]
+    assert medications(store) == [('Lisinopril', '20mg')]
+
+
+def test_out_of_order_visit_fills_history_without_replacing_newer_data(store):
+    store.record_visit(PATIENT, visit(['Hypertension'], [('Lisinopril', '20mg')], [('BP', '130/85')]),
+                       '2026-06-01')
+    delta = store.record_visit(PATIENT, visit(['Hypertension', 'Type 2 Diabetes'], [('Metformin', '500mg')],
+                                              [('BP', '150/95')]), '2026-01-10')
+
+    # Nothing was recorded before January, so it is compared with nothing
+    assert delta.previous_visit_date == ''
+    view = store.current_view(PATIENT)
+    assert view.as_of == '2026-06-01'
+    assert view.visit_count == 2
+    assert medications(store) == [('Lisinopril', '20mg')]
+    assert [(test.test, test.value) for test in view.test_results] == [('BP', '130/85')]
+    assert set(view.diagnoses) == {'Hypertension', 'Type 2 Diabetes'}
+    assert store.visit_dates(PATIENT) == ['2026-01-10', '2026-06-01']
+
+    # A visit in between sees January as its previous visit
+    delta = store.record_visit(PATIENT, visit(['Hypertension'], [('Metformin', '500mg')], [('BP', '140/90')]),
+                               '2026-03-01')
+    assert delta.previous_visit_date == '2026-01-10'
+    assert delta.new_diagnoses == []
+    assert delta.changed_tests == [{'test': 'BP', 'previous': '150/95', 'current': '140/90'}]
+    assert medications(store) == [('Lisinopril', '20mg')]
+
+
+def test_recording_the_same_document_twice_stores_it_once(store):
+    store.record_visit(PATIENT, visit(['Hypertension'], [('Lisinopril', '10mg')]), '2026-01-10')
+    document = visit(['Hypertension', 'Type 2 Diabetes'], [('Lisinopril', '20mg')], [('A1C', '7.4%')])
+    first = store.record_visit(PATIENT, document, '2026-04-02')
+    again = store.record_visit(PATIENT, document, '2026-04-02')
+
+    assert again == first
+    assert first.new_diagnoses == ['Type 2 Diabetes']
+    assert store.current_view(PATIENT).visit_count == 2
+    assert store.visit_dates(PATIENT) == ['2026-01-10', '2026-04-02']
+
+
+def test_patient_id_is_required(store):
+    with pytest.raises(ValueError):
+        store.record_visit('  ', visit(['Hypertension']))
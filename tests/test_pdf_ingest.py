@@ -0,0 +1,43 @@
+"""
+Tests for reading PDF pages (pdf_ingest.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+import pdf_ingest
+from pdf_ingest import PAGE_TEXT, PDFError, read_page
+
+
+class TextPage:
+    def extract_text(self):
+        return "Lisinopril 10mg daily, Metformin 500mg"
+
+
+class BrokenPage:
+    """A page whose content stream points at a missing object"""
+
+    def extract_text(self):
+        raise KeyError('/Contents')
+
+
+class FakeReader:
+    pages = [TextPage(), BrokenPage()]
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    monkeypatch.setattr(pdf_ingest, '_worker_reader', {'packet.pdf': FakeReader()})
+    return 'packet.pdf'
+
+
+def test_readable_page_returns_its_text(fake_pdf):
+    assert read_page(fake_pdf, 0) == (0, "Lisinopril 10mg daily, Metformin 500mg", PAGE_TEXT)
+
+
+@pytest.mark.parametrize('index', [1, 5])
+def test_any_page_error_becomes_a_pdf_error_naming_the_page(fake_pdf, index):
+    with pytest.raises(PDFError, match=f"^Page {index + 1}:"):
+        read_page(fake_pdf, index)
@@ -0,0 +1,37 @@
+"""
+Tests for the records that travel between agents (records.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import json
+
+import pytest
+
+import records
+from records import ActionPlan, Medication, json_default
+
+
+def test_equal_records_hash_equal():
+    assert hash(Medication('Lisinopril', '10mg')) == hash(Medication('Lisinopril', '10mg'))
+    assert len({Medication('Lisinopril', '10mg'), Medication('Lisinopril', '10mg'),
+                Medication('Metformin', '500mg')}) == 2
+    assert {Medication('Lisinopril', '10mg'): 1}[Medication('Lisinopril', '10mg')] == 1
+
+
+def test_records_of_different_types_are_distinct_keys():
+    assert Medication('A1C', '7.1%') != records.TestResult('A1C', '7.1%')
+    assert len({Medication('A1C', '7.1%'), records.TestResult('A1C', '7.1%')}) == 2
+
+
+def test_record_holding_a_list_is_not_hashable():
+    plan = ActionPlan(['Eat vegetables'], [], [], [], [], [], '')
+    with pytest.raises(TypeError):
+        hash(plan)
+
+
+def test_json_default_writes_records_and_tuples():
+    data = {'medications': (Medication('Lisinopril', '10mg'),)}
+    assert json.loads(json.dumps(data, default=json_default)) == {
+        'medications': [{'name': 'Lisinopril', 'dosage': '10mg'}]}
@@ -0,0 +1,24 @@
+"""
+Tests that Agent 1 stays linear on the adversarial corpus (benchmarks.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+from benchmarks import ADVERSARIAL_SIZES, MAX_GROWTH_EXPONENT, adversarial_corpus, check_linear_scaling
+
+
+@pytest.fixture(scope='module')
+def scaling():
+    return check_linear_scaling()
+
+
+@pytest.mark.parametrize('case', sorted(adversarial_corpus(1_000)))
+def test_agent1_runtime_grows_linearly(scaling, case):
+    result = scaling[case]
+    assert len(result['seconds']) == len(ADVERSARIAL_SIZES)
+    assert result['exponent'] <= MAX_GROWTH_EXPONENT, (
+        f"{case}: runtime ~ size ** {result['exponent']:.2f} "
+        f"({', '.join(f'{seconds * 1e3:.0f} ms' for seconds in result['seconds'])})")
@@ -0,0 +1,84 @@
+"""
+Tests for request parsing in the HTTP service (service.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from service import BadRequest, SummaryService, make_handler, parse_content_length, parse_request
+
+
+def structured(**fields) -> bytes:
+    return json.dumps(fields).encode('utf-8')
+
+
+def test_valid_structured_request_is_accepted():
+    kind, payload = parse_request('/summarize/structured', 'application/json', structured(
+        diagnoses=['Hypertension'],
+        medications=[{'name': 'Lisinopril', 'dosage': '10mg'}, {'name': 'Metformin'}],
+        test_results=[{'test': 'A1C', 'value': '7.1%'}],
+        instructions=['Walk daily']), {})
+    assert kind == 'structured'
+    assert payload['medications'][1] == {'name': 'Metformin'}
+
+
+@pytest.mark.parametrize('fields', [
+    {'diagnoses': [42]},
+    {'diagnoses': 'Hypertension'},
+    {'medications': ['Lisinopril 10mg']},
+    {'medications': [{'dosage': '10mg'}]},
+    {'medications': [{'name': 'Lisinopril', 'dosage': 10}]},
+    {'test_results': [{'test': 'A1C'}]},
+    {'followups': [None]},
+    {'patient_name': ['Mary']},
+])
+def test_malformed_structured_request_is_a_bad_request(fields):
+    with pytest.raises(BadRequest):
+        parse_request('/summarize/structured', 'application/json', structured(**fields), {})
+
+
+def test_text_request_needs_string_input_method():
+    with pytest.raises(BadRequest):
+        parse_request('/summarize/text', 'application/json', structured(text="BP 150/95", input_method=3), {})
+
+
+@pytest.mark.parametrize('value, length', [(None, 0), ('', 0), ('0', 0), (' 512 ', 512)])
+def test_content_length_is_read_as_bytes(value, length):
+    assert parse_content_length(value) == length
+
+
+@pytest.mark.parametrize('value', ['abc', '-1', '+5', '1e3', '12.5', '1_000'])
+def test_bad_content_length_is_a_bad_request(value):
+    with pytest.raises(BadRequest):
+        parse_content_length(value)
+
+
+@pytest.fixture
+def server():
+    # The workers are never started: a bad Content-Length is answered before any job runs
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(SummaryService(workers=1)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('value', ['abc', '-1'])
+def test_server_answers_400_to_a_bad_content_length(server, value):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    connection.putrequest('POST', '/summarize/text')
+    connection.putheader('Content-Type', 'text/plain')
+    connection.putheader('Content-Length', value)
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    assert 'Content-Length' in json.loads(response.read())['error']
+    connection.close()
@@ -0,0 +1,102 @@
+"""
+Tests for the producer/consumer stage chain (staged_executor.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import threading
+import time
+
+import pytest
+
+from staged_executor import Stage, StagedExecutor, StageError
+
+
+def jittered(fn):
+    """Stage fn that takes longer for some items, so items finish out of order"""
+    def run(item):
+        time.sleep(0.002 * (item % 3))
+        return fn(item)
+    return run
+
+
+def run_with_timeout(executor, items, seconds=30):
+    """executor.run(items) in a thread; fails the test instead of hanging"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['results'] = executor.run(items)
+        except BaseException as exc:
+            outcome['error'] = exc
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "run() did not finish"
+    return outcome
+
+
+def test_results_come_back_in_input_order():
+    executor = StagedExecutor([Stage('double', jittered(lambda x: x * 2), workers=3),
+                               Stage('add', jittered(lambda x: x + 1), workers=2)], queue_size=2)
+    assert executor.run(range(50)) == [x * 2 + 1 for x in range(50)]
+
+
+def test_failed_items_pass_through_later_stages_untouched():
+    later_calls = []
+
+    def check(x):
+        if x % 4 == 0:
+            raise ValueError(f"bad item {x}")
+        return x
+
+    def record(x):
+        later_calls.append(x)
+        return -x
+
+    executor = StagedExecutor([Stage('check', check), Stage('record', record, workers=2)])
+    results = executor.run(range(8))
+
+    failed = [result for result in results if isinstance(result, StageError)]
+    assert [(error.stage, error.index) for error in failed] == [('check', 0), ('check', 4)]
+    assert isinstance(failed[0].error, ValueError)
+    assert [result for result in results if not isinstance(result, StageError)] == [-1, -2, -3, -5, -6, -7]
+    assert sorted(later_calls) == [1, 2, 3, 5, 6, 7]
+
+
+def test_stats_count_each_stage():
+    def check(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    executor = StagedExecutor([Stage('check', check), Stage('copy', lambda x: x, workers=2)], queue_size=4)
+    assert executor.stats() == []
+    executor.run(range(10))
+
+    check_stats, copy_stats = executor.stats()
+    assert (check_stats.name, check_stats.workers, check_stats.processed, check_stats.errors) == ('check', 1, 10, 1)
+    assert (copy_stats.name, copy_stats.workers, copy_stats.processed, copy_stats.errors) == ('copy', 2, 9, 0)
+    assert all(stats.queue_depth == 0 and stats.max_queue_depth <= 4 for stats in (check_stats, copy_stats))
+    assert executor.bottleneck() in ('check', 'copy')
+
+
+@pytest.mark.parametrize('error', [KeyboardInterrupt, SystemExit])
+def test_base_exception_in_a_stage_stops_the_batch_and_is_raised(error):
+    def interrupt(x):
+        if x == 5:
+            raise error()
+        return x
+
+    later_calls = []
+    executor = StagedExecutor([Stage('first', interrupt, workers=2),
+                               Stage('second', later_calls.append)], queue_size=2)
+    outcome = run_with_timeout(executor, range(1_000))
+
+    assert isinstance(outcome.get('error'), error)
+    assert len(later_calls) < 1_000
+    # Every worker finished: nothing is left running or waiting in a queue
+    assert not any(thread.name.startswith(('first-', 'second-')) for thread in threading.enumerate())
+    assert all(stats.queue_depth == 0 for stats in executor.stats())
@@ -0,0 +1,84 @@
+"""
+Tests for SummarySink (summary_storage.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import contextlib
+import io
+import os
+import stat
+import time
+
+import pytest
+
+from pipeline import BoomerHealthPipeline
+from summary_storage import SummarySink, content_id, save_summary
+
+
+def make_summary(number):
+    return {'patient_name': f"Patient {number}", 'metadata': {}}
+
+
+def test_buffered_summaries_are_flushed_without_further_appends(tmp_path):
+    with SummarySink(str(tmp_path), buffer_size=100, flush_interval=0.05, fsync=False) as sink:
+        summary_id = sink.append(make_summary(1))
+        deadline = time.monotonic() + 5
+        while summary_id not in sink.index and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert summary_id in sink.index
+
+
+def test_len_counts_each_id_once(tmp_path):
+    with SummarySink(str(tmp_path), flush_interval=None, fsync=False) as sink:
+        summary_id = sink.append(make_summary(1))
+        sink.flush()
+        sink.append(make_summary(1), summary_id)
+        sink.append(make_summary(2))
+        assert len(sink) == 2
+
+
+def test_partly_written_index_line_is_skipped(tmp_path):
+    with SummarySink(str(tmp_path), fsync=False) as sink:
+        summary_id = sink.append(make_summary(1))
+    with open(os.path.join(str(tmp_path), SummarySink.INDEX_FILE), 'a', encoding='utf-8') as f:
+        f.write("abc123\tsegment_0000")
+
+    with SummarySink(str(tmp_path), fsync=False) as sink:
+        assert list(sink.index) == [summary_id]
+        new_id = sink.append(make_summary(2))
+
+    with SummarySink(str(tmp_path), fsync=False) as sink:
+        assert set(sink.index) == {summary_id, new_id}
+        assert sink.get(new_id)['patient_name'] == "Patient 2"
+
+
+@pytest.fixture(scope='module')
+def two_runs():
+    document = "Diagnoses: Hypertension. Lisinopril 10mg daily. BP: 150/95."
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = BoomerHealthPipeline()
+        first = pipeline.process_document(document, patient_name="Sample Patient")
+        second = pipeline.process_document(document, patient_name="Sample Patient")
+    return first, second.replace(generated_time="11:59 PM")
+
+
+def test_content_id_ignores_summary_id_and_timestamps(two_runs):
+    first, second = two_runs
+    assert first['metadata']['summary_id'] != second['metadata']['summary_id']
+    assert content_id(first) == content_id(second)
+    assert content_id(first) != content_id(first.replace(patient_name="Someone Else"))
+
+
+def test_saving_the_same_content_twice_writes_one_file(tmp_path, two_runs):
+    first, second = two_runs
+    assert save_summary(first, directory=str(tmp_path)) == save_summary(second, directory=str(tmp_path))
+    assert len(os.listdir(str(tmp_path))) == 1
+
+
+def test_saved_files_follow_the_umask(tmp_path, two_runs):
+    old_umask = os.umask(0o022)
+    os.umask(old_umask)
+    path = save_summary(two_runs[0], directory=str(tmp_path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~old_umask
@@ -0,0 +1,173 @@
+"""
+Tests for sharing one pipeline between threads (pipeline.py, agent2, agent3)
+
+Many threads share one BoomerHealthPipeline while another thread keeps
+hot-reloading its vocabulary. The switch interval is cut to 1 microsecond
+so the GIL changes hands constantly; a free-threaded build runs the
+threads truly in parallel instead.
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent2_educator import HealthExplainer
+from agent3_organizer import LifestyleCoach
+from benchmarks import make_documents
+from pipeline import BoomerHealthPipeline
+from records import json_default
+from vocabulary import EMPTY_VOCABULARY, Vocabulary, VocabularyEntry
+
+
+THREADS = 16
+DOCUMENTS_PER_THREAD = 8
+
+# Summary parts that must not depend on which thread made the summary or when
+STABLE_SECTIONS = ('section_1_diagnoses', 'section_2_medications', 'section_3_action_plan',
+                   'section_4_warning_signs', 'section_5_questions', 'section_6_glossary')
+
+
+def stable_part(summary):
+    return json.dumps({section: summary[section] for section in STABLE_SECTIONS}, default=json_default)
+
+
+def rating(index):
+    return index % 5 + 1
+
+
+@pytest.fixture(scope='module')
+def stress_run():
+    """
+    Every thread summarizes its own documents and leaves feedback on them by id
+
+    Returns:
+        (single-threaded reference summaries, the shared pipeline,
+         [(document index, summary, reward)], exceptions raised by threads)
+    """
+    documents = make_documents(THREADS * DOCUMENTS_PER_THREAD)
+    # Adds a term the documents never use, so reloads change the tables but not the summaries
+    reloaded = Vocabulary([VocabularyEntry('diagnoses', 'sarcoidosis', 'Inflamed cells clump in organs')])
+
+    reference_pipeline = BoomerHealthPipeline()
+    expected = [stable_part(reference_pipeline.process_document(document)) for document in documents]
+    pipeline = BoomerHealthPipeline()
+
+    done = threading.Event()
+    reloads = 0
+
+    def reloader():
+        nonlocal reloads
+        while not done.is_set():
+            pipeline.use_vocabulary(reloaded if reloads % 2 == 0 else EMPTY_VOCABULARY)
+            reloads += 1
+
+    def worker(number):
+        outcomes = []
+        for i in range(number * DOCUMENTS_PER_THREAD, (number + 1) * DOCUMENTS_PER_THREAD):
+            summary = pipeline.process_document(documents[i])
+            reward = pipeline.collect_feedback(summary['metadata']['summary_id'],
+                                               {'clarity': rating(i), 'helpfulness': rating(i),
+                                                'completeness': rating(i)})
+            outcomes.append((i, summary, reward))
+        return outcomes
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    reload_thread = threading.Thread(target=reloader)
+    reload_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            futures = [pool.submit(worker, number) for number in range(THREADS)]
+    finally:
+        done.set()
+        reload_thread.join()
+        sys.setswitchinterval(interval)
+
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    outcomes = [outcome for future in futures if future.exception() is None for outcome in future.result()]
+    assert reloads > 0
+    return expected, pipeline, outcomes, errors
+
+
+def test_no_thread_fails(stress_run):
+    _, _, outcomes, errors = stress_run
+    assert errors == []
+    assert len(outcomes) == THREADS * DOCUMENTS_PER_THREAD
+
+
+def test_summaries_match_single_threaded_ones(stress_run):
+    expected, _, outcomes, _ = stress_run
+    assert [i for i, summary, _ in outcomes if stable_part(summary) != expected[i]] == []
+
+
+def test_every_summary_has_its_own_id_and_history_entry(stress_run):
+    _, pipeline, outcomes, _ = stress_run
+    ids = {summary['metadata']['summary_id'] for _, summary, _ in outcomes}
+    assert len(ids) == len(outcomes)
+    assert {entry['summary']['metadata']['summary_id'] for entry in pipeline.history()} == ids
+    assert len(pipeline.history()) == len(outcomes)
+
+
+def test_feedback_lands_on_its_own_summary(stress_run):
+    _, pipeline, outcomes, _ = stress_run
+    history = {entry['summary']['metadata']['summary_id']: entry for entry in pipeline.history()}
+    for i, summary, reward in outcomes:
+        entry = history[summary['metadata']['summary_id']]
+        assert reward is not None
+        assert entry['summary'] is summary
+        assert entry['feedback']['clarity'] == rating(i)
+        assert entry['reward'] == reward
+
+
+def test_explanation_tables_are_read_only_all_the_way_down():
+    tables = HealthExplainer().tables
+    with pytest.raises(TypeError):
+        tables.diagnoses['hypertension']['simple'] = 'Changed'
+    with pytest.raises(TypeError):
+        tables.medications['aspirin'] = 'Changed'
+    with pytest.raises(TypeError):
+        tables.abbreviations['BP'] = 'Changed'
+
+
+def test_vocabulary_explanations_are_read_only_too():
+    explainer = HealthExplainer(Vocabulary([VocabularyEntry('diagnoses', 'sarcoidosis', 'Inflamed cells')]))
+    with pytest.raises(TypeError):
+        explainer.tables.diagnoses['sarcoidosis']['explanation'] = 'Changed'
+
+
+def test_lifestyle_recommendations_are_read_only_all_the_way_down():
+    recommendations = LifestyleCoach().lifestyle_recommendations
+    with pytest.raises(TypeError):
+        recommendations['hypertension']['diet'] = []
+    with pytest.raises(AttributeError):
+        recommendations['hypertension']['diet'].append("Eat more salt")
+    assert all(isinstance(tips, tuple) for plan in recommendations.values() for tips in plan.values())
+
+
+def test_a_reload_mid_document_does_not_mix_vocabularies(monkeypatch):
+    vocabulary = Vocabulary([VocabularyEntry('diagnoses', 'sarcoidosis', 'Inflamed cells clump in organs')])
+    pipeline = BoomerHealthPipeline(vocabulary)
+    extract_all = pipeline.agent1.extract_all
+
+    def extract_then_reload(*args, **kwargs):
+        # The reload lands between Agent 1 and Agent 2
+        extracted = extract_all(*args, **kwargs)
+        pipeline.use_vocabulary(EMPTY_VOCABULARY)
+        return extracted
+
+    monkeypatch.setattr(pipeline.agent1, 'extract_all', extract_then_reload)
+    summary = pipeline.process_document("Diagnoses: Sarcoidosis, Hypertension")
+    explained = {item['diagnosis']: item['explanation'] for item in summary['section_1_diagnoses']['diagnoses']}
+    assert explained['Sarcoidosis'] == 'Inflamed cells clump in organs'
+
+    # The next document sees the new vocabulary in both agents
+    monkeypatch.undo()
+    summary = pipeline.process_document("Diagnoses: Sarcoidosis, Hypertension")
+    assert [item['diagnosis'] for item in summary['section_1_diagnoses']['diagnoses']] == ['Hypertension']
+    assert pipeline.vocabulary_snapshot.vocabulary is EMPTY_VOCABULARY
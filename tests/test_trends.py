@@ -0,0 +1,107 @@
+"""
+Tests for the rolling-window trend rules (trends.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from patient_store import PatientStore
+from trends import SERIES, URGENT, SeriesTable, TrendEngine
+
+
+WEIGHT_KEY = SERIES['weight'][0]
+START = date(2026, 3, 1)
+
+
+def weights(patient_id, pounds, start=START):
+    """(patient_id, item_key, reading_date, value) rows, one reading a day"""
+    return [(patient_id, WEIGHT_KEY, (start + timedelta(days=day)).isoformat(), f"{value} lbs")
+            for day, value in enumerate(pounds)]
+
+
+def fired(rows, since=None):
+    return sorted((alert.patient_id, alert.rule, alert.reading_date)
+                  for alert in TrendEngine().evaluate(rows, since))
+
+
+def test_rise_is_above_the_lowest_reading_in_the_window():
+    table = SeriesTable(['p'] * 5, [0, 1, 2, 5, 20], [180, 178, 183, 184, 186])
+    rise = table.rise(3)
+    assert np.isnan(rise[0])
+    # Day 5 looks back to day 2 only; day 20 has nothing within 3 days
+    np.testing.assert_allclose(rise[1:4], [-2, 5, 1])
+    assert np.isnan(rise[4])
+
+
+def test_slope_is_per_day_and_needs_enough_readings():
+    table = SeriesTable(['p'] * 4, [0, 10, 20, 30], [130, 132, 134, 136])
+    slope = table.slope(90, min_readings=3)
+    assert np.isnan(slope[:2]).all()
+    np.testing.assert_allclose(slope[2:], [0.2, 0.2])
+
+
+def test_run_length_restarts_after_a_miss_and_for_each_patient():
+    table = SeriesTable(['a', 'a', 'a', 'a', 'b', 'b'], [1, 2, 3, 4, 1, 2], [150, 150, 120, 150, 150, 150])
+    assert table.run_length(table.value >= 140).tolist() == [1, 2, 0, 1, 1, 2]
+
+
+def test_readings_are_sorted_by_patient_then_day():
+    table = SeriesTable(['b', 'a', 'a'], [3, 2, 1], [3.0, 2.0, 1.0])
+    assert list(table.patients) == ['a', 'b']
+    assert table.value.tolist() == [1.0, 2.0, 3.0]
+    assert table.is_last.tolist() == [False, True, True]
+
+
+def test_three_pounds_in_a_day_is_urgent():
+    alerts = TrendEngine().evaluate(weights('chf', [182, 182, 185]))
+    assert [(alert.rule, alert.severity, alert.value) for alert in alerts] == [('weight_gain_day', URGENT, 185.0)]
+    assert "3 pounds in a day" in alerts[0].message
+
+
+def test_five_pounds_in_a_week_is_urgent_without_a_jump_in_a_day():
+    assert fired(weights('chf', [180, 181, 182, 183, 184, 185])) == [('chf', 'weight_gain_week', '2026-03-06')]
+
+
+@pytest.mark.parametrize('pounds', [
+    [182, 182, 184],                              # +2 in a day
+    [180, 181, 182, 183, 184],                    # +4 in a week
+    [180, 182, 182, 182, 182, 182, 182, 183, 185],   # +5, but over 8 days
+])
+def test_smaller_or_slower_gains_do_not_fire(pounds):
+    assert fired(weights('chf', pounds)) == []
+
+
+def test_since_reports_every_reading_from_that_date():
+    rows = weights('chf', [180, 184, 184, 188])
+    assert fired(rows) == [('chf', 'weight_gain_day', '2026-03-04'), ('chf', 'weight_gain_week', '2026-03-04')]
+    assert fired(rows, since='2026-03-01') == [('chf', 'weight_gain_day', '2026-03-02'),
+                                               ('chf', 'weight_gain_day', '2026-03-04'),
+                                               ('chf', 'weight_gain_week', '2026-03-04')]
+
+
+def test_patients_never_share_a_window():
+    # b's first reading is a day after a's last and much higher: not a gain for either
+    rows = weights('a', [150, 150]) + weights('b', [200, 200], start=START + timedelta(days=2))
+    table = TrendEngine().build_tables(rows)['weight']
+    assert np.isnan(table.rise(7)[2])
+    assert table.run_length(np.ones(4, dtype=bool)).tolist() == [1, 2, 1, 2]
+    assert fired(rows, since='2026-03-01') == []
+
+    rows += weights('b', [204], start=START + timedelta(days=4))
+    assert fired(rows) == [('b', 'weight_gain_day', '2026-03-05')]
+
+
+def test_alerts_from_the_store_are_queued_once():
+    with PatientStore() as store:
+        for day, pounds in enumerate([182, 182, 186]):
+            store.record_reading('chf', 'Weight', f"{pounds} lbs", START + timedelta(days=day))
+        engine = TrendEngine()
+        assert [alert.rule for alert in engine.evaluate_store(store)] == ['weight_gain_day']
+        assert store.queue_alerts(engine.evaluate_store(store)) == 0
+        assert [alert.rule for alert in store.take_alerts('chf')] == ['weight_gain_day']
+        assert store.take_alerts('chf') == []
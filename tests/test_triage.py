@@ -0,0 +1,107 @@
+"""
+Tests for the emergency triage scan and its fast path (triage.py, pipeline.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+import pipeline as pipeline_module
+from pipeline import BoomerHealthPipeline
+from triage import emergency_banner, form_text, triage
+
+
+PATIENT_MESSAGE = ("My blood pressure this morning was 192/124 and I have a bad headache. "
+                   "I take lisinopril 20mg daily for hypertension.")
+
+
+@pytest.fixture
+def pipeline():
+    with BoomerHealthPipeline() as pipeline:
+        yield pipeline
+
+
+@pytest.fixture
+def triage_calls(monkeypatch):
+    calls = []
+
+    def counting_triage(text):
+        calls.append(text)
+        return triage(text)
+
+    monkeypatch.setattr(pipeline_module, 'triage', counting_triage)
+    return calls
+
+
+def test_triage_finds_a_crisis_reading():
+    alert = triage(PATIENT_MESSAGE)
+    assert alert.rule == 'bp_crisis'
+    assert '192/124' in alert.evidence
+
+
+def test_warning_sections_are_not_emergencies():
+    assert triage("SEEK EMERGENCY CARE (CALL 911) IF:\n- Severe chest pain\n- Extreme difficulty breathing\n") is None
+
+
+@pytest.mark.parametrize('text, rule', [
+    # "when" only makes a reading conditional within a few words before it
+    ("My chest pain started when I was walking and now I'm short of breath.", 'chest_pain_breathing'),
+    # "but" ends the scope of the "no"
+    ("No chest pain yesterday but today I have chest pain and shortness of breath", 'chest_pain_breathing'),
+    # so does a comma
+    ("Severe chest pain, not able to catch breath, short of breath", 'chest_pain_breathing'),
+])
+def test_cues_only_reach_a_few_words(text, rule):
+    assert triage(text).rule == rule
+
+
+@pytest.mark.parametrize('text, evidence', [
+    ("Blood pressure 140/90, then 195/125 an hour later", '195/125'),
+    ("BP 185 over 110 this morning", '185 over 110'),
+])
+def test_every_reading_in_the_sentence_is_checked(text, evidence):
+    alert = triage(text)
+    assert alert.rule == 'bp_crisis'
+    assert evidence in alert.evidence
+
+
+@pytest.mark.parametrize('text', [
+    "Blood pressure 140/90, call your doctor if it is 185/115",
+    "Patient denies chest pain and shortness of breath",
+    "Blood pressure goal: below 130/80",
+])
+def test_thresholds_and_denials_stay_quiet(text):
+    assert triage(text) is None
+
+
+def test_form_text_puts_each_field_on_its_own_line():
+    results = [{'test': 'Blood Pressure', 'value': '210/130'}, {'test': 'Glucose', 'value': '45'}]
+    assert form_text(['Hypertension'], results) == "Hypertension\nBlood Pressure: 210/130\nGlucose: 45"
+
+
+def test_guided_form_readings_are_triaged(pipeline, capsys):
+    summary = pipeline.process_structured(
+        diagnoses=['Hypertension'],
+        test_results=[{'test': 'Blood Pressure', 'value': '210/130'}, {'test': 'Glucose', 'value': '45'}])
+    emergency = summary['metadata']['emergency']
+    assert emergency.rule == 'bp_crisis'
+    assert emergency_banner(emergency) in capsys.readouterr().out
+
+
+def test_fast_path_scans_and_announces_once(pipeline, triage_calls, capsys):
+    announced = []
+    emergency, pending = pipeline.triage_and_summarize(PATIENT_MESSAGE, on_emergency=announced.append)
+    summary = pending.result(timeout=30)
+
+    assert len(triage_calls) == 1
+    assert announced == [emergency]
+    assert summary['metadata']['emergency'] is emergency
+    # Only the caller announces; the background run does not print the banner again
+    assert emergency_banner(emergency) not in capsys.readouterr().out
+
+
+def test_process_document_still_announces_its_own_scan(pipeline, triage_calls, capsys):
+    summary = pipeline.process_document(PATIENT_MESSAGE)
+    assert len(triage_calls) == 1
+    assert capsys.readouterr().out.count(emergency_banner(summary['metadata']['emergency'])) == 1
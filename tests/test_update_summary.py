@@ -0,0 +1,94 @@
+"""
+Tests for incremental summary updates after a guided-form edit (pipeline.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import pytest
+
+from deadlines import Deadline
+from pipeline import BoomerHealthPipeline
+from records import Medication
+
+
+DIAGNOSES = ['Hypertension', 'Type 2 Diabetes']
+MEDICATIONS = [{'name': 'Lisinopril', 'dosage': '10mg'}, {'name': 'Metformin', 'dosage': '500mg'}]
+
+
+class TickingClock:
+    """Fake monotonic clock that moves forward a fixed step every time it is read"""
+
+    def __init__(self, step: float):
+        self.step = step
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    with BoomerHealthPipeline() as pipeline:
+        yield pipeline
+
+
+@pytest.fixture
+def summary(pipeline):
+    return pipeline.process_structured(diagnoses=DIAGNOSES, medications=MEDICATIONS, patient_name="Mary Johnson")
+
+
+def add_medication(pipeline, summary, name, dosage='40mg'):
+    medications = pipeline.summary_fields(summary)['medications'] + [Medication(name, dosage)]
+    return pipeline.update_summary(summary, {'medications': medications})
+
+
+def test_medication_edit_leaves_lifestyle_tips_and_diagnoses_alone(pipeline, summary):
+    updated = add_medication(pipeline, summary, 'Atorvastatin')
+
+    assert [med['medication'] for med in updated['section_2_medications']['medications']][-1] == 'Atorvastatin'
+    assert updated['section_1_diagnoses'] is summary['section_1_diagnoses']
+    for tips in ('diet', 'exercise', 'daily_habits'):
+        assert updated['section_3_action_plan'][tips] is summary['section_3_action_plan'][tips]
+    assert updated['section_3_action_plan']['medication_reminders'] is not \
+        summary['section_3_action_plan']['medication_reminders']
+    assert updated['section_4_warning_signs'] is summary['section_4_warning_signs']
+
+
+def test_update_gets_its_own_id_and_history_entry(pipeline, summary):
+    updated = add_medication(pipeline, summary, 'Atorvastatin')
+    old_id, new_id = summary['metadata']['summary_id'], updated['metadata']['summary_id']
+    assert new_id != old_id
+    assert updated['metadata']['updated_from'] == old_id
+
+    pipeline.collect_feedback(new_id, {'clarity': 5, 'helpfulness': 5, 'completeness': 5})
+    history = {entry['summary']['metadata']['summary_id']: entry for entry in pipeline.history()}
+    assert history[new_id]['summary'] is updated
+    assert history[new_id]['feedback']['clarity'] == 5
+    assert 'feedback' not in history[old_id]
+
+
+def test_update_recomputes_unrecognized_terms(pipeline, summary):
+    assert summary['metadata']['unrecognized_terms'] == []
+    updated = add_medication(pipeline, summary, 'Zorbacillin')
+    assert updated['metadata']['unrecognized_terms'] == ['Zorbacillin']
+    assert summary['metadata']['unrecognized_terms'] == []
+
+
+def test_update_drops_incomplete_reasons_it_resolved():
+    pipeline = BoomerHealthPipeline(budget_seconds=10.0)
+    # Agent 1 gets one field done, then every later stage falls back
+    pipeline.new_deadline = lambda: Deadline(10.0, clock=TickingClock(4.0))
+    partial = pipeline.process_document("MEDICATIONS:\nLisinopril 10mg daily\nDIAGNOSES:\nHypertension\n")
+    assert 'diagnoses' in partial['metadata']['skipped_fields']
+    assert any("Diet, exercise" in reason for reason in partial['metadata']['incomplete_reasons'])
+
+    updated = pipeline.update_summary(partial, {'diagnoses': ['Hypertension']})
+    metadata = updated['metadata']
+    assert 'diagnoses' not in metadata['skipped_fields']
+    assert not any("Diet, exercise" in reason for reason in metadata['incomplete_reasons'])
+    # Medication explanations are still the generic ones
+    assert any("Detailed explanations" in reason for reason in metadata['incomplete_reasons'])
+    assert metadata['incomplete'] is True
+    assert updated['section_3_action_plan']['diet']
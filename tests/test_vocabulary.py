@@ -0,0 +1,107 @@
+"""
+Tests for vocabulary files and hot reloads (vocabulary.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import json
+import os
+import re
+
+import pytest
+
+from vocabulary import MAX_TERM_LENGTH, VocabularyError, VocabularyStore, load_vocabulary, parse_csv, parse_json
+
+
+FORMULARY = "kind,term,explanation\nmedication,Apixaban,A blood thinner\nabbreviation,OSA,Obstructive Sleep Apnea\n"
+
+
+def write(directory, name, text):
+    path = os.path.join(str(directory), name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def test_csv_terms_are_normalized():
+    entries = parse_csv(FORMULARY.encode('utf-8'), 'formulary.csv')
+    assert [(entry.kind, entry.term) for entry in entries] == [('medications', 'apixaban'), ('abbreviations', 'OSA')]
+    assert entries[0].explanation == "A blood thinner"
+
+
+@pytest.mark.parametrize('text, message', [
+    ("term,explanation\napixaban,x\n", "header must include 'kind' and 'term'"),
+    ("kind,term,dose\nmedication,apixaban,5mg\n", "unknown columns ['dose']"),
+    ("kind,term\nsupplement,fish oil\n", "line 2: unknown kind 'supplement'"),
+    ("kind,term\nmedication,\n", "line 2: empty term"),
+    ("kind,term\nmedication,apixaban,extra\n", "line 2: more fields than header columns"),
+    ("kind,term\nmedication," + "x" * (MAX_TERM_LENGTH + 1) + "\n", "term longer than"),
+])
+def test_invalid_csv_names_the_problem(text, message):
+    with pytest.raises(VocabularyError, match=f"^formulary.csv: .*{re.escape(message)}"):
+        parse_csv(text.encode('utf-8'), 'formulary.csv')
+
+
+def test_csv_must_be_utf8():
+    with pytest.raises(VocabularyError, match="not UTF-8"):
+        parse_csv(b"kind,term\nmedication,caf\xe9\n", 'formulary.csv')
+
+
+def test_json_accepts_terms_and_objects():
+    entries = parse_json(json.dumps({'diagnoses': ['Gout', {'term': 'Sleep Apnea', 'simple': 'Breathing Stops'}]})
+                         .encode('utf-8'), 'cardiology.json')
+    assert [entry.term for entry in entries] == ['gout', 'sleep apnea']
+    assert entries[1].simple == 'Breathing Stops'
+
+
+@pytest.mark.parametrize('document, message', [
+    ('{"diagnoses": ', "not valid JSON"),
+    ('["gout"]', "expected an object of lists"),
+    ('{"diagnoses": "gout"}', "'diagnoses' must be a list"),
+    ('{"diagnoses": [{"term": "gout", "dose": "x"}]}', r"diagnoses\[0\]: unknown fields"),
+    ('{"diagnoses": [42]}', r"diagnoses\[0\]: expected a term"),
+    ('{"diagnoses": [{"explanation": "no term"}]}', r"diagnoses\[0\]: empty term"),
+    ('{"diagnoses": [{"term": 42}]}', r"diagnoses\[0\]: term must be text"),
+    ('{"supplements": ["fish oil"]}', r"supplements\[0\]: unknown kind"),
+])
+def test_invalid_json_names_the_problem(document, message):
+    with pytest.raises(VocabularyError, match=f"^cardiology.json: .*{message}"):
+        parse_json(document.encode('utf-8'), 'cardiology.json')
+
+
+def test_unchanged_files_load_the_cached_vocabulary(tmp_path):
+    write(tmp_path, 'formulary.csv', FORMULARY)
+    first = load_vocabulary(str(tmp_path))
+    assert load_vocabulary(str(tmp_path)) is first
+
+    write(tmp_path, 'formulary.csv', FORMULARY + "symptom,palpitations,\n")
+    changed = load_vocabulary(str(tmp_path))
+    assert changed is not first
+    assert changed.fingerprint != first.fingerprint
+    assert changed.terms('symptoms') == ('palpitations',)
+
+
+def test_renaming_a_file_changes_the_fingerprint(tmp_path):
+    path = write(tmp_path, 'formulary.csv', FORMULARY)
+    first = load_vocabulary(str(tmp_path))
+    os.rename(path, os.path.join(str(tmp_path), 'pharmacy.csv'))
+    assert load_vocabulary(str(tmp_path)).fingerprint != first.fingerprint
+
+
+def test_reload_keeps_the_old_vocabulary_when_new_files_are_bad(tmp_path):
+    write(tmp_path, 'formulary.csv', FORMULARY)
+    store = VocabularyStore(str(tmp_path))
+    before = store.current
+    assert store.reload() is False
+
+    write(tmp_path, 'broken.csv', "kind,term\nsupplement,fish oil\n")
+    with pytest.raises(VocabularyError, match="broken.csv"):
+        store.reload()
+    assert store.current is before
+
+    os.remove(os.path.join(str(tmp_path), 'broken.csv'))
+    write(tmp_path, 'symptoms.csv', "kind,term\nsymptom,palpitations\n")
+    assert store.reload() is True
+    assert store.current.terms('symptoms') == ('palpitations',)
+    assert store.current.terms('medications') == ('apixaban',)
@@ -0,0 +1,68 @@
+"""
+Tests for worker cleanup in the pre-forked supervisor (workers.py)
+
+Team: Oyinade Balogun, Hilary C Bruton, Glen Sam, Kaleb
+Course: ITAI 2376 - Boomer Health Summary Project
+"""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+from workers import WorkerSupervisor, WorkerTimeout
+
+
+def worker_pid(directory, job):
+    return os.getpid()
+
+
+def start_helper_and_hang(directory, job):
+    """Job that starts a child process (like an OCR pool) and then never finishes"""
+    helper = subprocess.Popen(['sleep', '60'])
+    with open(os.path.join(directory, 'helper.pid'), 'w') as f:
+        f.write(str(helper.pid))
+    time.sleep(60)
+
+
+def mark_exit(directory):
+    open(os.path.join(directory, f"{os.getpid()}.closed"), 'w').close()
+
+
+def running(pid):
+    """True while pid exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+def wait_until(condition, seconds=10.0):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+def test_timed_out_worker_takes_its_child_processes_with_it(tmp_path):
+    directory = str(tmp_path)
+    with WorkerSupervisor(lambda: directory, start_helper_and_hang, workers=1) as supervisor:
+        with pytest.raises(WorkerTimeout):
+            supervisor.run('job', timeout=2)
+        with open(os.path.join(directory, 'helper.pid')) as f:
+            helper = int(f.read())
+        assert wait_until(lambda: not running(helper))
+
+
+def test_teardown_runs_when_a_worker_retires(tmp_path):
+    directory = str(tmp_path)
+    with WorkerSupervisor(lambda: directory, worker_pid, workers=1, max_jobs=1, teardown=mark_exit) as supervisor:
+        first = supervisor.run('job', timeout=10)
+        # Reaching max_jobs retired the first worker, which cleaned up before exiting
+        assert os.path.exists(os.path.join(directory, f"{first}.closed"))
+        second = supervisor.run('job', timeout=10)
+        assert second != first
+    assert os.path.exists(os.path.join(directory, f"{second}.closed"))